@@ -0,0 +1,285 @@
+"""
+基于asyncio的并发请求
+一个后台线程运行事件循环，成百上千个请求（如检查图片链接）以协程并发执行，不需要同样多的系统线程；
+结果通过线程安全的队列交给Tkinter，由after定时取出在GUI线程中处理
+
+aiohttp为可选依赖：已安装时请求完全在事件循环中完成；
+未安装时退回到在少量线程中执行requests请求，并发数受FALLBACK_WORKERS限制
+
+网页加载不经过这里：它需要共享会话的HTTP缓存、重试、边下载边解码提取以及HTTPS/HTTP切换，
+界面一次只加载一个网页，仍在固定大小的I/O线程池中用requests流式读取
+"""
+
+import asyncio
+import contextlib
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from cancellation import Cancelled
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+# 同时进行的请求数上限
+DEFAULT_CONCURRENCY = 100
+
+# 同一主机同时进行的请求数上限，避免对单个服务器造成压力
+DEFAULT_PER_HOST = 8
+
+# 未安装aiohttp时执行requests请求的线程数
+FALLBACK_WORKERS = 16
+
+# 服务器不支持HEAD时返回的状态码，此时改用只取第一个字节的GET
+HEAD_UNSUPPORTED = frozenset([405, 501])
+
+# TkBridge取队列的间隔（毫秒）和每次最多占用的时间（秒）
+BRIDGE_POLL_MS = 20
+BRIDGE_SLICE_SECONDS = 0.015
+
+
+def async_backend():
+    """当前使用的请求后端：aiohttp或requests（线程）"""
+    return 'aiohttp' if aiohttp is not None else 'requests'
+
+
+class TkBridge:
+    """
+    从任意线程向Tkinter GUI线程传递回调
+    post()只把回调放入线程安全的队列，GUI线程用after定时取出执行，后台线程不直接调用任何Tk方法
+
+    用法:
+        bridge = TkBridge(root)
+        bridge.start()
+        bridge.post(label.config, text='完成')   # 任意线程
+
+    参数:
+        root: Tk根窗口
+        interval (int): 取队列的间隔（毫秒）
+    """
+
+    def __init__(self, root, interval=BRIDGE_POLL_MS):
+        self.root = root
+        self.interval = interval
+        self.queue = queue.SimpleQueue()
+        self.job = None
+
+    def post(self, func, *args):
+        """安排func(*args)在GUI线程中执行（线程安全）"""
+        self.queue.put((func, args))
+
+    def start(self):
+        """开始定时取队列（在GUI线程中调用）"""
+        if self.job is None:
+            self._poll()
+
+    def stop(self):
+        """停止取队列，未执行的回调被丢弃"""
+        if self.job is not None:
+            self.root.after_cancel(self.job)
+            self.job = None
+
+    def _poll(self):
+        # 回调很多时分几轮执行，每轮不超过BRIDGE_SLICE_SECONDS，界面保持响应
+        deadline = time.monotonic() + BRIDGE_SLICE_SECONDS
+        while time.monotonic() < deadline:
+            try:
+                func, args = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                func(*args)
+            except Exception:
+                self.root.report_callback_exception(*sys.exc_info())
+        self.job = self.root.after(self.interval, self._poll)
+
+
+class AsyncFetcher:
+    """
+    在后台线程中运行的asyncio请求核心
+
+    用法:
+        fetcher = AsyncFetcher(headers, session)
+        future = fetcher.submit(fetcher.check_urls(urls, on_result=...))
+        ...
+        fetcher.close()
+
+    参数:
+        headers (dict): 请求头
+        session: 未安装aiohttp时使用的requests会话，默认新建
+        concurrency (int): 同时进行的请求数上限
+        per_host (int): 同一主机同时进行的请求数上限
+        timeout (float): 单个请求的超时（秒）
+    """
+
+    def __init__(self, headers=None, session=None, concurrency=DEFAULT_CONCURRENCY, per_host=DEFAULT_PER_HOST,
+                 timeout=10):
+        self.headers = dict(headers or {})
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.client = None  # aiohttp.ClientSession，在事件循环中第一次请求时创建
+        self.session = session  # 退回requests时使用的会话
+        self.owns_session = session is None
+        self.executor = None
+        self.semaphore = None
+        self.host_slots = {}  # 主机 -> [Semaphore, 占用和等待的请求数]，该主机没有请求时删除，不会随访问过的主机无限增长
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run_loop, name='async-fetch', daemon=True)
+        self.thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coroutine):
+        """
+        在事件循环中执行协程（线程安全）
+
+        返回:
+            concurrent.futures.Future: 协程的结果，可在其他线程中等待或取消
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def _prepare(self):
+        """第一次请求时在事件循环线程中创建客户端"""
+        if self.semaphore is not None:
+            return
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        if aiohttp is not None:
+            connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host)
+            self.client = aiohttp.ClientSession(headers=self.headers, connector=connector,
+                                                timeout=aiohttp.ClientTimeout(total=self.timeout))
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=FALLBACK_WORKERS, thread_name_prefix='async-fallback')
+            if self.session is None:
+                self.session = requests.Session()
+                self.session.headers.update(self.headers)
+
+    async def head(self, url, token=None):
+        """
+        检查一个URL是否可以访问，服务器不支持HEAD时改用只取第一个字节的GET
+
+        参数:
+            url (str): 要检查的URL
+            token (CancelToken): 取消令牌，排队期间被取消时抛出Cancelled，不再发出请求
+
+        返回:
+            dict: {'url', 'status', 'content_type', 'length', 'error'}，请求失败时status为None
+        """
+        self._prepare()
+        # 先取得主机名额再占用全局名额，同一主机排队的请求不会占满全局名额
+        async with self._host_slot(url), self.semaphore:
+            if token is not None:
+                token.check()
+            try:
+                if self.client is not None:
+                    status, headers = await self._head_aiohttp(url)
+                else:
+                    status, headers = await self.loop.run_in_executor(self.executor, self._head_requests, url)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                return {'url': url, 'status': None, 'content_type': None, 'length': None,
+                        'error': str(e) or type(e).__name__}
+
+        length = headers.get('Content-Length', '')
+        content_range = headers.get('Content-Range', '')
+        if '/' in content_range:
+            length = content_range.rsplit('/', 1)[1]  # 用GET探测时从 bytes 0-0/12345 取总大小
+        return {
+            'url': url,
+            'status': status,
+            'content_type': headers.get('Content-Type', '').split(';')[0].strip() or None,
+            'length': int(length) if length.isdigit() else None,
+            'error': None if status < 400 else f"HTTP {status}"
+        }
+
+    @contextlib.asynccontextmanager
+    async def _host_slot(self, url):
+        """占用url所在主机的一个请求名额（只在事件循环线程中使用，不需要加锁）"""
+        host = urlparse(url).netloc
+        slot = self.host_slots.get(host)
+        if slot is None:
+            slot = self.host_slots[host] = [asyncio.Semaphore(self.per_host), 0]
+        slot[1] += 1
+        try:
+            async with slot[0]:
+                yield
+        finally:
+            slot[1] -= 1
+            if slot[1] == 0:
+                del self.host_slots[host]
+
+    async def _head_aiohttp(self, url):
+        # 响应头名不区分大小写，复制时保留这一点，小写的content-length等也能取到
+        async with self.client.head(url, allow_redirects=True) as response:
+            if response.status not in HEAD_UNSUPPORTED:
+                return response.status, CaseInsensitiveDict(response.headers)
+        async with self.client.get(url, headers={'Range': 'bytes=0-0'}) as response:
+            return response.status, CaseInsensitiveDict(response.headers)
+
+    def _head_requests(self, url):
+        response = self.session.head(url, allow_redirects=True, timeout=self.timeout)
+        if response.status_code in HEAD_UNSUPPORTED:
+            with self.session.get(url, headers={'Range': 'bytes=0-0'}, stream=True, timeout=self.timeout) as response:
+                pass
+        return response.status_code, response.headers
+
+    async def check_urls(self, urls, on_result=None, token=None):
+        """
+        并发检查多个URL
+
+        参数:
+            urls (list): URL列表
+            on_result: 每个URL检查完成时的回调 on_result(结果)，在事件循环线程中调用，
+                       需要更新界面时应通过TkBridge.post转交
+            token (CancelToken): 取消令牌，取消后不再发出新的请求
+
+        返回:
+            list: 与urls顺序一致的检查结果，取消时未检查的URL不在其中
+        """
+        async def check(url):
+            try:
+                result = await self.head(url, token)
+            except Cancelled:
+                return None
+            if on_result and not (token is not None and token.cancelled):
+                on_result(result)
+            return result
+
+        results = await asyncio.gather(*(check(url) for url in urls))
+        return [result for result in results if result is not None]
+
+    async def _close_clients(self):
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.client is not None:
+            await self.client.close()
+
+    def close(self, timeout=5):
+        """关闭客户端并停止事件循环，未完成的请求被取消"""
+        if not self.loop.is_running():
+            return
+        try:
+            self.submit(self._close_clients()).result(timeout)
+        except Exception:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout)
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.session is not None and self.owns_session:
+            self.session.close()
@@ -0,0 +1,106 @@
+"""
+网页内容批量提取（命令行版，不需要图形界面）
+从文件或标准输入读取URL，每个网页输出一行JSON记录（JSON Lines）
+
+用法:
+    python batch_extract.py urls.txt -o result.jsonl
+    cat urls.txt | python batch_extract.py --workers 16 --per-host 4 --rate 10
+
+输入每行一个URL，也可以是带url字段的JSON对象，例如 {"url": "https://example.com"}
+"""
+
+import argparse
+import json
+import sys
+
+from crawler import Crawler
+from http_cache import HTTPCache, DEFAULT_CACHE_DIR
+from extractor import PARSER_BACKENDS, STREAM_PARSER
+
+
+def read_urls(lines):
+    """
+    从输入行中读取URL，跳过空行和#开头的注释
+
+    参数:
+        lines: 可迭代的文本行
+
+    返回:
+        生成器，逐个产生补全协议后的URL
+    """
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+
+        if line.startswith(('{', '[', '"')):  # JSONL行
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            # 与格式错误的行一样跳过：不是对象，或url不是非空字符串
+            url = record.get('url') if isinstance(record, dict) else None
+            if not url or not isinstance(url, str):
+                continue
+        else:
+            url = line
+
+        if not url.startswith(('http://', 'https://')):
+            url = 'https://' + url
+        yield url
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量提取网页文字、图片和视频，输出JSON Lines")
+    parser.add_argument('input', nargs='?', default='-', help="URL列表文件，默认从标准输入读取")
+    parser.add_argument('-o', '--output', default='-', help="输出文件，默认输出到标准输出")
+    parser.add_argument('--timeout', type=int, default=10, help="单个请求的超时时间（秒）")
+    parser.add_argument('--html', action='store_true', help="在记录中包含HTML源码")
+    parser.add_argument('--workers', type=int, default=8, help="并发抓取的线程数")
+    parser.add_argument('--per-host', type=int, default=2, help="同一主机的最大并发请求数")
+    parser.add_argument('--rate', type=float, default=0, help="全局每秒最大请求数，0表示不限速")
+    parser.add_argument('--parser', default='auto', choices=['auto'] + PARSER_BACKENDS + [STREAM_PARSER],
+                        help="HTML解析器后端，auto选择已安装的最快后端，未安装时退回html.parser；"
+                             "stream为边下载边提取的流式解析器")
+    parser.add_argument('--max-size', type=float, default=20, help="单个网页的大小上限（MB），0表示不限制")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="本地HTTP缓存目录")
+    parser.add_argument('--no-cache', action='store_true', help="不使用本地HTTP缓存")
+    args = parser.parse_args(argv)
+
+    infile = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+    outfile = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+
+    crawler = Crawler(
+        max_workers=args.workers,
+        max_per_host=args.per_host,
+        rate=args.rate,
+        timeout=args.timeout,
+        include_html=args.html,
+        parser=args.parser,
+        max_bytes=int(args.max_size * 1024 * 1024),
+        cache=None if args.no_cache else HTTPCache(args.cache_dir)
+    )
+    failed = 0
+    try:
+        # 记录按完成顺序输出，可通过url字段对应输入
+        for record in crawler.crawl(read_urls(infile)):
+            if 'error' in record:
+                failed += 1
+                print(f"{record['url']}: {record['error']}", file=sys.stderr)
+            outfile.write(json.dumps(record, ensure_ascii=False) + '\n')
+            outfile.flush()
+    finally:
+        crawler.close()
+        if crawler.cache is not None:
+            cache = crawler.cache
+            print(f"缓存: 命中 {cache.hits}，验证未修改 {cache.revalidated}，下载 {cache.misses}", file=sys.stderr)
+        if infile is not sys.stdin:
+            infile.close()
+        if outfile is not sys.stdout:
+            outfile.close()
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
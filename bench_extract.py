@@ -0,0 +1,116 @@
+"""
+提取性能测试
+对每个已安装的解析器后端，测量解析耗时，并比较逐项多次遍历（extract_text + extract_images + extract_videos）
+与单次遍历（extract_page）的耗时，检查两者结果一致；另外测量流式解析器（StreamingExtractor）的解析加提取总耗时
+
+用法:
+    python bench_extract.py              # 使用自动生成的大型新闻页面
+    python bench_extract.py html.txt ... # 使用保存的网页
+"""
+
+import sys
+import time
+
+from extractor import (available_parsers, parse_html, extract_text, extract_images, extract_videos, extract_page,
+                       StreamingExtractor)
+
+
+def generate_page(articles=800):
+    """生成一个结构类似新闻列表页的大型HTML（每篇文章约15个节点）"""
+    parts = ['<html><head><title>新闻</title><style>p { margin: 0 }</style>'
+             '<script>var cfg = {"video": "https://cdn.example.com/a.mp4"};</script></head><body>']
+    for i in range(articles):
+        parts.append(
+            f'<div class="item"><h2><a href="/news/{i}.html">标题 {i}</a></h2>'
+            f'<img src="/img/{i}.jpg" alt="配图 {i}"><p>第{i}篇文章的摘要，<b>重点</b>内容。</p>'
+            f'<noscript><img src="/img/{i}-lazy.jpg"></noscript><!-- 广告位 {i} -->'
+        )
+        if i % 50 == 0:
+            parts.append(f'<video src="/video/{i}.mp4" title="视频 {i}"><source src="/video/{i}.webm"></video>')
+            parts.append(f'<iframe src="https://www.youtube.com/embed/{i}" title="嵌入 {i}"></iframe>')
+            parts.append(f'<a href="/download/{i}.mp4"><span>下载</span> 视频</a>')
+        parts.append('</div>')
+    parts.append('</body></html>')
+    return ''.join(parts)
+
+
+def run_multi_pass(soup, base_url):
+    text = extract_text(soup)
+    return {
+        'text': text,
+        'images': extract_images(soup, base_url),
+        'videos': extract_videos(soup, base_url)
+    }
+
+
+def bench(name, html, parser, base_url='https://example.com/', rounds=5):
+    """对同一页面分别计时解析和两种提取方式"""
+    parse_time = 0.0
+    multi_time = 0.0
+    single_time = 0.0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        soup = parse_html(html, parser)
+        parse_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = run_multi_pass(soup, base_url)
+        multi_time += time.perf_counter() - start
+
+        soup = parse_html(html, parser)
+        start = time.perf_counter()
+        result = extract_page(soup, base_url)
+        single_time += time.perf_counter() - start
+
+    for key in ('text', 'images', 'videos'):
+        if result[key] != expected[key]:
+            print(f"{name} [{parser}]: {key} 结果不一致！")
+            return False
+
+    nodes = sum(1 for _ in parse_html(html, parser).descendants)
+    print(f"{name} [{parser}]: {nodes} 个节点，解析 {parse_time / rounds * 1000:.1f} ms，"
+          f"多次遍历 {multi_time / rounds * 1000:.1f} ms，单次遍历 {single_time / rounds * 1000:.1f} ms，"
+          f"提取加速 {multi_time / single_time:.2f}x")
+    return True
+
+
+def bench_stream(name, html, base_url='https://example.com/', rounds=5, chunk_size=64 * 1024):
+    """流式解析按64KB分块送入，结果与html.parser + extract_page比较"""
+    stream_time = 0.0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        extractor = StreamingExtractor(base_url)
+        for i in range(0, len(html), chunk_size):
+            extractor.feed(html[i:i + chunk_size])
+        result = extractor.close()
+        stream_time += time.perf_counter() - start
+
+    expected = extract_page(parse_html(html, 'html.parser'), base_url)
+    for key in ('text', 'images', 'videos', 'links'):
+        if result[key] != expected[key]:
+            print(f"{name} [stream]: {key} 结果与html.parser不一致！")
+            return False
+
+    print(f"{name} [stream]: 解析并提取 {stream_time / rounds * 1000:.1f} ms")
+    return True
+
+
+def main():
+    pages = []
+    if len(sys.argv) > 1:
+        for path in sys.argv[1:]:
+            with open(path, encoding='utf-8') as f:
+                pages.append((path, f.read()))
+    else:
+        pages.append(('生成页面', generate_page()))
+
+    ok = True
+    for name, html in pages:
+        for parser in available_parsers():
+            ok = bench(name, html, parser) and ok
+        ok = bench_stream(name, html) and ok
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
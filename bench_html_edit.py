@@ -0,0 +1,346 @@
+"""
+HTML编辑器解析和生成性能测试
+比较html_edit.HTMLParser（按标记线性扫描）与原来逐字符扫描、递归解析的版本（保留在本文件的LegacyHTMLParser中），
+以及WebElement.to_html与原来递归生成的版本（legacy_to_html）的耗时，并检查元素树和生成的HTML完全一致；
+另外比较先拼出整个字符串再写文件与WebElement.write_html流式写入的峰值内存，
+以及原来每个节点带__dict__、属性字典和子元素列表的元素树（LegacyWebElement）与现在WebElement元素树占用的内存
+
+用法:
+    python bench_html_edit.py              # 使用自动生成的不同大小的页面
+    python bench_html_edit.py html.txt ... # 使用保存的网页
+"""
+
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+from bench_extract import generate_page
+from html_edit import HTMLParser
+
+
+# 原解析器每层嵌套递归一次，在单独的大栈线程中运行，避免深层页面超过递归深度限制
+LEGACY_STACK_SIZE = 512 * 1024 * 1024
+LEGACY_RECURSION_LIMIT = 1000000
+
+# 原to_html的耗时随深度×输出大小增长，输出超过此大小（字符）时不再运行它
+LEGACY_TO_HTML_LIMIT = 4 * 1024 * 1024
+
+
+class LegacyWebElement:
+    """原来的元素节点：普通类，每个节点都有自己的__dict__、属性字典和子元素列表"""
+
+    def __init__(self, tag="", content="", attributes=None, children=None):
+        self.tag = tag
+        self.content = content
+        self.attributes = attributes or {}
+        self.children = children or []
+
+
+class LegacyHTMLParser:
+    """原来的解析器，逐字符扫描，每个元素递归一次，生成LegacyWebElement"""
+
+    def __init__(self):
+        self.current_index = 0
+        self.html = ""
+
+    def parse(self, html_content):
+        self.html = html_content
+        self.current_index = 0
+        elements = []
+
+        while self.current_index < len(self.html):
+            if self.html[self.current_index].isspace():
+                self.current_index += 1
+                continue
+
+            if self.html.startswith("<!--", self.current_index):
+                end_index = self.html.find("-->", self.current_index)
+                if end_index != -1:
+                    self.current_index = end_index + 3
+                continue
+
+            if self.html[self.current_index] == '<':
+                element = self.parse_element()
+                if element:
+                    elements.append(element)
+            else:
+                text = self.parse_text()
+                if text.strip():
+                    text_element = LegacyWebElement("text", text.strip())
+                    elements.append(text_element)
+
+        return elements
+
+    def parse_element(self):
+        if self.current_index >= len(self.html) or self.html[self.current_index] != '<':
+            return None
+
+        if self.html[self.current_index + 1] == '/':
+            end_bracket = self.html.find('>', self.current_index)
+            if end_bracket != -1:
+                self.current_index = end_bracket + 1
+            return None
+
+        self.current_index += 1
+
+        tag_end = self.current_index
+        while tag_end < len(self.html) and not self.html[tag_end].isspace() and self.html[tag_end] != '>' and self.html[tag_end] != '/':
+            tag_end += 1
+
+        tag = self.html[self.current_index:tag_end]
+        self.current_index = tag_end
+
+        attributes = {}
+        while self.current_index < len(self.html) and self.html[self.current_index] != '>' and self.html[self.current_index] != '/':
+            if self.html[self.current_index].isspace():
+                self.current_index += 1
+                continue
+
+            attr_start = self.current_index
+            while (self.current_index < len(self.html) and
+                   not self.html[self.current_index].isspace() and
+                   self.html[self.current_index] != '=' and
+                   self.html[self.current_index] != '>' and
+                   self.html[self.current_index] != '/'):
+                self.current_index += 1
+
+            attr_name = self.html[attr_start:self.current_index]
+
+            if self.current_index < len(self.html) and self.html[self.current_index] == '=':
+                self.current_index += 1
+
+                while self.current_index < len(self.html) and self.html[self.current_index].isspace():
+                    self.current_index += 1
+
+                quote_char = self.html[self.current_index] if self.html[self.current_index] in ('"', "'") else None
+                if quote_char:
+                    self.current_index += 1
+                    attr_start = self.current_index
+                    while (self.current_index < len(self.html) and
+                           self.html[self.current_index] != quote_char):
+                        self.current_index += 1
+                    attr_value = self.html[attr_start:self.current_index]
+                    self.current_index += 1
+                else:
+                    attr_start = self.current_index
+                    while (self.current_index < len(self.html) and
+                           not self.html[self.current_index].isspace() and
+                           self.html[self.current_index] != '>' and
+                           self.html[self.current_index] != '/'):
+                        self.current_index += 1
+                    attr_value = self.html[attr_start:self.current_index]
+
+                attributes[attr_name] = attr_value
+
+        is_self_closing = False
+        if self.current_index < len(self.html) and self.html[self.current_index] == '/':
+            is_self_closing = True
+            self.current_index += 1
+
+        if self.current_index < len(self.html) and self.html[self.current_index] == '>':
+            self.current_index += 1
+
+        element = LegacyWebElement(tag, "", attributes)
+
+        if not is_self_closing and tag.lower() not in ["br", "hr", "img", "input", "meta", "link"]:
+            children = []
+
+            while self.current_index < len(self.html):
+                if (self.current_index + 1 < len(self.html) and
+                    self.html[self.current_index] == '<' and
+                    self.html[self.current_index + 1] == '/'):
+
+                    end_tag_start = self.current_index + 2
+                    end_tag_end = self.html.find('>', end_tag_start)
+                    if end_tag_end != -1:
+                        end_tag = self.html[end_tag_start:end_tag_end].strip()
+                        if end_tag.lower() == tag.lower():
+                            self.current_index = end_tag_end + 1
+                            break
+
+                if self.html[self.current_index] == '<':
+                    child = self.parse_element()
+                    if child:
+                        children.append(child)
+                else:
+                    text = self.parse_text()
+                    if text.strip():
+                        text_element = LegacyWebElement("text", text.strip())
+                        children.append(text_element)
+
+            element.children = children
+
+        return element
+
+    def parse_text(self):
+        start_index = self.current_index
+        while (self.current_index < len(self.html) and
+               self.html[self.current_index] != '<'):
+            self.current_index += 1
+
+        return self.html[start_index:self.current_index]
+
+
+def legacy_to_html(element, indent=0):
+    """原来的WebElement.to_html，每层嵌套递归一次"""
+    indent_str = "  " * indent
+    attrs = " ".join([f'{k}="{v}"' for k, v in element.attributes.items()])
+    attr_str = f" {attrs}" if attrs else ""
+
+    if element.tag == "text":
+        return indent_str + element.content
+
+    if element.children:
+        children_html = "\n".join([legacy_to_html(child, indent + 1) for child in element.children])
+        return f"{indent_str}<{element.tag}{attr_str}>\n{children_html}\n{indent_str}</{element.tag}>"
+    elif element.content:
+        return f"{indent_str}<{element.tag}{attr_str}>{element.content}</{element.tag}>"
+    else:
+        return f"{indent_str}<{element.tag}{attr_str} />"
+
+
+def run_with_deep_stack(func, *args):
+    """在大栈线程中调用func，返回 (结果, 耗时)"""
+    result = {}
+
+    def target():
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(LEGACY_RECURSION_LIMIT)
+        try:
+            start = time.perf_counter()
+            result['value'] = func(*args)
+            result['time'] = time.perf_counter() - start
+        finally:
+            sys.setrecursionlimit(limit)
+
+    old_size = threading.stack_size(LEGACY_STACK_SIZE)
+    try:
+        thread = threading.Thread(target=target)
+        thread.start()
+        thread.join()
+    finally:
+        threading.stack_size(old_size)
+    return result['value'], result['time']
+
+
+def peak_memory(func, *args):
+    """func执行期间新分配内存的峰值（字节）"""
+    tracemalloc.start()
+    try:
+        func(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def tree_memory(parse, html):
+    """
+    解析html，统计解析结果占用的内存
+
+    返回:
+        tuple: (元素树, 字节数)
+    """
+    tracemalloc.start()
+    try:
+        elements = parse(html)
+        return elements, tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def write_joined(elements, path):
+    """原来保存文件的方式：先生成整个字符串再写入"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(element.to_html() for element in elements))
+
+
+def write_streamed(elements, path):
+    """流式写入，与HTMLEditor.write_html相同"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for i, element in enumerate(elements):
+            if i:
+                f.write("\n")
+            element.write_html(f)
+
+
+def flatten(elements):
+    """把元素树按先序展开为 (深度, 标签, 内容, 属性列表) 的列表，不递归"""
+    nodes = []
+    stack = [(element, 0) for element in reversed(elements)]
+    while stack:
+        element, depth = stack.pop()
+        nodes.append((depth, element.tag, element.content, list(element.attributes.items())))
+        stack.extend((child, depth + 1) for child in reversed(element.children))
+    return nodes
+
+
+def bench(name, html, rounds=3):
+    """对同一页面分别计时新旧解析器和HTML生成，检查结果一致"""
+    legacy_time = 0.0
+    new_time = 0.0
+    for _ in range(rounds):
+        expected, elapsed = run_with_deep_stack(LegacyHTMLParser().parse, html)
+        legacy_time += elapsed
+
+        start = time.perf_counter()
+        result = HTMLParser().parse(html)
+        new_time += time.perf_counter() - start
+
+    (_, legacy_memory), _ = run_with_deep_stack(tree_memory, LegacyHTMLParser().parse, html)
+    _, new_memory = tree_memory(HTMLParser().parse, html)
+
+    expected_nodes = flatten(expected)
+    result_nodes = flatten(result)
+    if result_nodes != expected_nodes:
+        print(f"{name}: 元素树不一致！")
+        return False
+
+    depth = max((node[0] for node in result_nodes), default=-1) + 1
+    print(f"{name}: {len(html) / 1024 / 1024:.2f}MB，{len(result_nodes)} 个节点，最大深度 {depth}")
+    print(f"  解析: 原解析器 {legacy_time / rounds * 1000:.1f} ms，新解析器 {new_time / rounds * 1000:.1f} ms，"
+          f"加速 {legacy_time / new_time:.1f}x")
+    print(f"  元素树内存: 原节点 {legacy_memory / 1024 / 1024:.2f}MB，现节点 {new_memory / 1024 / 1024:.2f}MB，"
+          f"每节点 {legacy_memory / len(result_nodes):.0f} → {new_memory / len(result_nodes):.0f} 字节")
+
+    start = time.perf_counter()
+    result_html = "\n".join(element.to_html() for element in result)
+    new_time = time.perf_counter() - start
+    size = f"{len(result_html) / 1024 / 1024:.2f}MB"
+    if len(result_html) > LEGACY_TO_HTML_LIMIT:
+        print(f"  生成: 新版本 {new_time * 1000:.1f} ms，{size}（输出太大，跳过原递归版本）")
+    else:
+        expected_html, legacy_time = run_with_deep_stack(
+            lambda: "\n".join(legacy_to_html(element) for element in result))
+        if result_html != expected_html:
+            print(f"{name}: 生成的HTML不一致！")
+            return False
+        print(f"  生成: 原递归版本 {legacy_time * 1000:.1f} ms，新版本 {new_time * 1000:.1f} ms，"
+              f"加速 {legacy_time / new_time:.1f}x，{size}")
+
+    joined_peak = peak_memory(write_joined, result, os.devnull)
+    streamed_peak = peak_memory(write_streamed, result, os.devnull)
+    print(f"  写入文件峰值内存: 拼接字符串 {joined_peak / 1024 / 1024:.2f}MB，"
+          f"流式写入 {streamed_peak / 1024 / 1024:.2f}MB")
+    return True
+
+
+def main():
+    pages = []
+    if len(sys.argv) > 1:
+        for path in sys.argv[1:]:
+            with open(path, encoding='utf-8') as f:
+                pages.append((path, f.read()))
+    else:
+        for articles in (200, 800, 1600):
+            pages.append((f"生成页面({articles}篇)", generate_page(articles)))
+
+    ok = True
+    for name, html in pages:
+        ok = bench(name, html) and ok
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+后台任务的协作式取消
+每次发起新的网页请求就开始新的一代（generation），上一代的令牌被取消：正在进行的HTTP读取被中断，
+解析在下一个检查点停止，已经完成的旧结果也不会再显示到界面上
+"""
+
+import threading
+
+
+class Cancelled(Exception):
+    """任务已被取消（有更新的请求取代了它）"""
+
+
+class CancelToken:
+    """
+    一代任务的取消令牌（线程安全）
+    后台线程在各个阶段之间调用check()，取消后抛出Cancelled；
+    attach()登记的响应会在取消时被关闭，阻塞中的读取随之结束
+
+    属性:
+        generation (int): 代号，越大越新
+    """
+
+    def __init__(self, generation=0):
+        self.generation = generation
+        self.event = threading.Event()
+        self.lock = threading.Lock()
+        self.responses = []
+
+    @property
+    def cancelled(self):
+        """是否已被取消"""
+        return self.event.is_set()
+
+    def cancel(self):
+        """取消任务并关闭登记的响应（可在任意线程调用，重复调用无影响）"""
+        with self.lock:
+            self.event.set()
+            responses, self.responses = self.responses, []
+        for response in responses:
+            try:
+                response.close()
+            except Exception:
+                pass  # 读取线程可能正在关闭同一个连接
+
+    def check(self):
+        """已被取消时抛出Cancelled"""
+        if self.event.is_set():
+            raise Cancelled(self.generation)
+
+    def attach(self, response):
+        """
+        登记正在读取的响应，取消时关闭它；已取消时立即关闭并抛出Cancelled
+
+        参数:
+            response: 以stream=True发出的requests响应
+
+        返回:
+            传入的response，便于写在with语句中
+        """
+        with self.lock:
+            if not self.event.is_set():
+                self.responses.append(response)
+                return response
+        response.close()
+        raise Cancelled(self.generation)
+
+
+class Generations:
+    """
+    请求代数计数器：start()开始新的一代并取消上一代
+
+    用法:
+        token = generations.start()            # GUI线程中，每次发起请求时
+        ... 后台线程中 token.check() ...
+        if generations.is_current(token): ...   # GUI线程中，显示结果前
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.token = CancelToken()
+        self.token.cancel()  # 还没有开始任何请求
+
+    def start(self):
+        """取消当前一代，返回新一代的令牌"""
+        with self.lock:
+            previous = self.token
+            self.token = CancelToken(previous.generation + 1)
+            token = self.token
+        previous.cancel()
+        return token
+
+    def cancel(self):
+        """取消当前一代（如关闭窗口时）"""
+        with self.lock:
+            token = self.token
+        token.cancel()
+
+    def is_current(self, token):
+        """token是否是最新一代且未被取消"""
+        with self.lock:
+            return token is self.token and not token.cancelled
@@ -0,0 +1,200 @@
+"""
+多URL并发抓取
+使用有界线程池抓取大量网页，支持每主机并发限制、全局限速和背压（不会一次性读入全部URL）
+"""
+
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+
+import requests
+
+from extractor import parse_html, extract_page, StreamingExtractor, STREAM_PARSER
+from http_session import create_session, DecodedBody, DEFAULT_MAX_BYTES
+
+
+def fetch_record(session, url, timeout=10, include_html=False, parser='auto', max_bytes=DEFAULT_MAX_BYTES):
+    """
+    获取并提取一个网页，返回可序列化为JSON的记录
+
+    参数:
+        session: requests会话
+        url (str): 网页URL
+        timeout (int): 超时时间（秒）
+        include_html (bool): 是否在记录中包含HTML源码
+        parser (str): 解析器后端，stream表示边下载边提取
+        max_bytes (int): 网页大小上限，超过时记录为错误
+
+    返回:
+        dict: 成功时包含text/images/videos/links，失败时包含error
+    """
+    try:
+        with session.get(url, timeout=timeout, stream=True) as response:
+            response.raise_for_status()
+            body = DecodedBody(response, max_bytes)
+            if parser == STREAM_PARSER:
+                streamer = StreamingExtractor(url)
+                parts = []
+                for text in body:
+                    parts.append(text)
+                    streamer.feed(text)
+                html = ''.join(parts)
+                page = streamer.close()
+            else:
+                html = ''.join(body)
+                page = extract_page(parse_html(html, parser), url)
+        encoding = body.encoding
+    except requests.exceptions.RequestException as e:
+        return {'url': url, 'error': f"网络请求错误: {e}"}
+    except Exception as e:
+        return {'url': url, 'error': f"发生错误: {e}"}
+
+    record = {
+        'url': url,
+        'status': response.status_code,
+        'encoding': encoding,
+        'text': page['text'],
+        'images': [{'url': img_url, 'alt': img_alt} for img_url, img_alt in page['images']],
+        'videos': [{'url': video_url, 'title': title, 'type': vtype}
+                   for video_url, title, vtype in page['videos']],
+        'links': [{'url': link_url, 'text': link_text} for link_url, link_text in page['links']]
+    }
+    if include_html:
+        record['html'] = html
+    return record
+
+
+class RateLimiter:
+    """
+    令牌桶限速器（线程安全）
+    rate为每秒允许的请求数，0表示不限速
+    """
+
+    def __init__(self, rate=0, burst=1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """取得一个令牌，必要时等待"""
+        if self.rate <= 0:
+            return
+
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+
+
+class Crawler:
+    """
+    并发抓取器
+
+    参数:
+        max_workers (int): 线程池大小，即全局最大并发请求数
+        max_per_host (int): 同一主机的最大并发请求数
+        rate (float): 全局每秒最大请求数，0表示不限速
+        timeout (int): 单个请求的超时时间（秒）
+        include_html (bool): 是否在记录中包含HTML源码
+        parser (str): 解析器后端
+        max_bytes (int): 单个网页的大小上限
+        max_backlog (int): 因主机并发已满而暂存的URL上限，超过后暂停读取输入
+        cache (HTTPCache): 可选的本地HTTP缓存
+        session: 可选的requests会话，默认按并发参数创建
+    """
+
+    def __init__(self, max_workers=8, max_per_host=2, rate=0, timeout=10,
+                 include_html=False, parser='auto', max_bytes=DEFAULT_MAX_BYTES, max_backlog=None, cache=None, session=None):
+        self.max_workers = max(1, max_workers)
+        self.max_per_host = max(1, max_per_host)
+        self.timeout = timeout
+        self.include_html = include_html
+        self.parser = parser
+        self.max_bytes = max_bytes
+        self.max_backlog = max_backlog or self.max_workers * 16
+        self.limiter = RateLimiter(rate, burst=self.max_workers)
+        self.cache = cache
+        # 每个主机的连接池大小与主机并发上限一致，套接字总数不会超过并发数
+        self.session = session or create_session(
+            pool_connections=max(10, self.max_workers),
+            pool_maxsize=self.max_per_host,
+            cache=cache
+        )
+
+    def _fetch(self, url):
+        self.limiter.acquire()
+        return fetch_record(self.session, url, self.timeout, self.include_html, self.parser, self.max_bytes)
+
+    def crawl(self, urls):
+        """
+        抓取URL序列，按完成顺序逐个产生记录
+
+        参数:
+            urls: 可迭代的URL（可以是生成器，会按需读取）
+
+        返回:
+            生成器，产生fetch_record返回的记录
+        """
+        url_iter = iter(urls)
+        exhausted = False
+        pending = {}                  # future -> 主机
+        active = defaultdict(int)     # 主机 -> 正在进行的请求数
+        waiting = defaultdict(deque)  # 主机 -> 等待中的URL
+        backlog = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                # 填充线程池：优先处理已暂存的URL，在途请求数不超过线程数
+                while len(pending) < self.max_workers:
+                    url, host = None, None
+                    for waiting_host, queue in waiting.items():
+                        if active[waiting_host] < self.max_per_host:
+                            url, host = queue.popleft(), waiting_host
+                            backlog -= 1
+                            if not queue:
+                                del waiting[waiting_host]
+                            break
+
+                    if url is None:
+                        if exhausted or backlog >= self.max_backlog:
+                            break
+                        try:
+                            url = next(url_iter)
+                        except StopIteration:
+                            exhausted = True
+                            break
+                        host = urlparse(url).netloc.lower()
+                        if active[host] >= self.max_per_host:
+                            waiting[host].append(url)
+                            backlog += 1
+                            continue
+
+                    active[host] += 1
+                    pending[executor.submit(self._fetch, url)] = host
+
+                if not pending:
+                    if exhausted and not waiting:
+                        break
+                    continue
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    host = pending.pop(future)
+                    active[host] -= 1
+                    if not active[host]:
+                        del active[host]
+                    yield future.result()
+
+    def close(self):
+        """关闭会话，释放连接"""
+        self.session.close()
@@ -0,0 +1,307 @@
+"""
+下载队列管理
+所有下载进入同一个优先级队列，同时进行的下载数不超过上限，每个任务可以暂停、继续、取消和调整优先级
+"""
+
+import heapq
+import itertools
+import os
+import re
+import threading
+from urllib.parse import urlparse
+
+from downloader import Download, DownloadStopped, DEFAULT_SEGMENTS
+from extractor import VIDEO_EXTENSIONS
+from progress import ProgressReporter
+
+
+# 默认同时进行的下载数
+DEFAULT_MAX_CONCURRENT = 3
+
+# 任务状态
+QUEUED = 'queued'
+RUNNING = 'running'
+PAUSED = 'paused'
+COMPLETED = 'completed'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+STATE_LABELS = {
+    QUEUED: '等待中',
+    RUNNING: '下载中',
+    PAUSED: '已暂停',
+    COMPLETED: '已完成',
+    FAILED: '失败',
+    CANCELLED: '已取消'
+}
+
+# 文件名中不允许的字符（Windows）
+INVALID_FILENAME_CHARS = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+
+
+def video_file_name(title, url, default_ext='.mp4'):
+    """
+    根据视频标题和URL生成文件名，扩展名取自URL，去掉文件名中不允许的字符
+
+    参数:
+        title (str): 视频标题
+        url (str): 视频URL
+        default_ext (str): URL中没有视频扩展名时使用的扩展名
+
+    返回:
+        str: 文件名
+    """
+    ext = os.path.splitext(urlparse(url).path)[1].lower()
+    if ext not in VIDEO_EXTENSIONS:
+        ext = default_ext
+    name = INVALID_FILENAME_CHARS.sub('_', title).strip(' .')[:80]
+    return (name or 'video') + ext
+
+
+def unique_path(path, taken=()):
+    """
+    文件已存在或已在下载队列中时，在文件名后加序号，如 video (2).mp4
+
+    参数:
+        path (str): 期望的保存路径
+        taken: 已被其他任务占用的路径集合
+
+    返回:
+        str: 不冲突的路径
+    """
+    base, ext = os.path.splitext(path)
+    candidate = path
+    number = 2
+    while candidate in taken or os.path.exists(candidate):
+        candidate = f"{base} ({number}){ext}"
+        number += 1
+    return candidate
+
+
+class DownloadTask:
+    """
+    一个下载任务，状态由DownloadManager维护
+
+    属性:
+        url (str): 文件URL
+        path (str): 保存路径
+        title (str): 显示用的标题
+        priority (int): 优先级，越大越先开始
+        state (str): 任务状态
+        error (str): 失败原因
+        progress (ProgressReporter): 下载进度，开始下载前为None
+    """
+
+    def __init__(self, url, path, title='', headers=None, priority=0):
+        self.url = url
+        self.path = path
+        self.title = title or os.path.basename(path)
+        self.headers = headers
+        self.priority = priority
+        self.state = QUEUED
+        self.error = None
+        self.progress = None
+        self.download = None
+        self.requested = None  # 运行中被请求的状态（PAUSED或CANCELLED）
+        self.seq = 0           # 最近一次入队的序号，堆中序号不同的旧条目会被跳过
+
+    def describe(self):
+        """生成任务描述，例如 "[下载中] 标题 45.0% (12.3MB/27.3MB)，5.2MB/s，剩余 0:03" """
+        text = f"[{STATE_LABELS[self.state]}] {self.title[:30]}"
+        if self.state == FAILED:
+            text += f" {self.error}"
+        elif self.progress is not None and self.state in (RUNNING, PAUSED):
+            text += f" {self.progress.describe()}"
+        return text
+
+
+class DownloadManager:
+    """
+    下载队列（线程安全）
+    每个运行中的任务占用一个线程，任务结束后自动开始队列中优先级最高的下一个
+
+    参数:
+        session: requests会话
+        max_concurrent (int): 同时进行的下载数上限
+        segments (int): 每个下载的最大并行连接数
+        on_change: 任务状态或进度变化时的回调 on_change(task)，在下载线程中调用，进度变化每秒最多10次
+    """
+
+    def __init__(self, session, max_concurrent=DEFAULT_MAX_CONCURRENT, segments=DEFAULT_SEGMENTS, on_change=None):
+        self.session = session
+        self.max_concurrent = max(1, max_concurrent)
+        self.segments = segments
+        self.on_change = on_change
+        self.tasks = []   # 按添加顺序保存的全部任务
+        self.queue = []   # (-优先级, 序号, 任务) 组成的堆
+        self.running = 0
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)  # 运行中的任务结束时通知
+        self._counter = itertools.count()
+
+    def _notify(self, task):
+        if self.on_change:
+            self.on_change(task)
+
+    def _enqueue(self, task):
+        """把任务放入队列（调用时需持有锁）"""
+        task.state = QUEUED
+        task.seq = next(self._counter)
+        heapq.heappush(self.queue, (-task.priority, task.seq, task))
+
+    def _schedule(self):
+        """有空闲名额时启动优先级最高的等待任务（调用时需持有锁）"""
+        while self.running < self.max_concurrent and self.queue:
+            _, seq, task = heapq.heappop(self.queue)
+            if task.state != QUEUED or seq != task.seq:
+                continue  # 已暂停、取消或调整过优先级的旧条目
+            task.state = RUNNING
+            task.requested = None
+            self.running += 1
+            threading.Thread(target=self._run, args=(task,), daemon=True).start()
+
+    def _run(self, task):
+        task.progress = ProgressReporter(lambda progress: self._notify(task))
+        download = Download(self.session, task.url, task.path, headers=task.headers,
+                            segments=self.segments, progress=task.progress.update)
+        with self.lock:
+            task.download = download
+            if task.requested:
+                download.stop()
+        self._notify(task)
+
+        state, error = COMPLETED, None
+        try:
+            download.run()
+        except DownloadStopped:
+            state = task.requested
+            if state == CANCELLED:
+                download.discard()
+        except Exception as e:
+            state, error = FAILED, str(e)
+
+        with self.lock:
+            task.state = state
+            task.error = error
+            task.download = None
+            self.running -= 1
+            self._schedule()
+            self.idle.notify_all()
+        self._notify(task)
+
+    def add(self, url, path, title='', headers=None, priority=0):
+        """
+        添加下载任务
+
+        参数:
+            url (str): 文件URL
+            path (str): 保存路径
+            title (str): 显示用的标题
+            headers (dict): 附加请求头，如Referer
+            priority (int): 优先级，越大越先开始
+
+        返回:
+            DownloadTask: 新任务
+        """
+        task = DownloadTask(url, path, title, headers, priority)
+        with self.lock:
+            self.tasks.append(task)
+            self._enqueue(task)
+            self._schedule()
+        self._notify(task)
+        return task
+
+    def pause(self, task):
+        """暂停任务；运行中的分段下载会保留进度，继续时从中断处开始"""
+        with self.lock:
+            if task.state == QUEUED:
+                task.state = PAUSED
+            elif task.state == RUNNING:
+                task.requested = PAUSED
+                if task.download:
+                    task.download.stop()
+                return
+            else:
+                return
+        self._notify(task)
+
+    def resume(self, task):
+        """继续已暂停的任务，或重试失败的任务"""
+        with self.lock:
+            if task.state not in (PAUSED, FAILED):
+                return
+            task.error = None
+            self._enqueue(task)
+            self._schedule()
+        self._notify(task)
+
+    def cancel(self, task):
+        """取消任务并删除未完成的临时文件"""
+        with self.lock:
+            if task.state == RUNNING:
+                task.requested = CANCELLED
+                if task.download:
+                    task.download.stop()
+                return
+            if task.state not in (QUEUED, PAUSED, FAILED):
+                return
+            task.state = CANCELLED
+        Download(self.session, task.url, task.path).discard()
+        self._notify(task)
+
+    def set_priority(self, task, priority):
+        """调整任务优先级，对等待中的任务立即生效"""
+        with self.lock:
+            task.priority = priority
+            if task.state == QUEUED:
+                self._enqueue(task)
+                self._schedule()
+
+    def raise_priority(self, task):
+        """把任务的优先级提到所有任务之上（在锁内取最大值，不会与其他线程的修改交错）"""
+        with self.lock:
+            task.priority = max((t.priority for t in self.tasks), default=task.priority) + 1
+            if task.state == QUEUED:
+                self._enqueue(task)
+                self._schedule()
+
+    def snapshot(self):
+        """
+        当前全部任务的副本，供GUI线程遍历
+
+        返回:
+            list: 按添加顺序排列的DownloadTask
+        """
+        with self.lock:
+            return list(self.tasks)
+
+    def set_max_concurrent(self, max_concurrent):
+        """调整同时进行的下载数上限；调小时运行中的任务会继续完成"""
+        with self.lock:
+            self.max_concurrent = max(1, max_concurrent)
+            self._schedule()
+
+    def active_count(self):
+        """等待中和下载中的任务数"""
+        with self.lock:
+            return sum(1 for task in self.tasks if task.state in (QUEUED, RUNNING))
+
+    def clear_finished(self):
+        """从任务列表中移除已完成和已取消的任务"""
+        with self.lock:
+            self.tasks = [task for task in self.tasks if task.state not in (COMPLETED, CANCELLED)]
+
+    def shutdown(self, timeout=5):
+        """
+        暂停所有任务并等待运行中的下载停下（程序退出时调用），分段下载的进度保留在状态文件中
+
+        参数:
+            timeout (float): 最长等待时间（秒）
+        """
+        self.on_change = None
+        with self.lock:
+            tasks = list(self.tasks)
+        for task in tasks:
+            self.pause(task)
+        with self.idle:
+            self.idle.wait_for(lambda: self.running == 0, timeout)
@@ -0,0 +1,333 @@
+"""
+多连接分段下载
+服务器支持Range请求时，把文件分成几段用多个连接并行下载到预分配的文件中，
+进度保存在旁边的状态文件里，中断后再次下载同一文件会从中断处继续；不支持时退回单连接下载
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+
+import requests
+from urllib3.exceptions import ProtocolError, ReadTimeoutError, DecodeError
+
+
+# 默认并行连接数
+DEFAULT_SEGMENTS = 4
+
+# 每段的最小大小，小文件不值得分段
+MIN_SEGMENT_BYTES = 1024 * 1024
+
+# 每次从连接读取的初始字节数，之后按速度自动调整
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# 自适应读取块大小的范围
+MIN_CHUNK_SIZE = 16 * 1024
+MAX_CHUNK_SIZE = 4 * 1024 * 1024
+
+# 每次读取的目标耗时（秒）：快速连接上块变大以减少循环和系统调用，慢速连接上块变小以保证进度及时刷新
+CHUNK_TARGET_SECONDS = 0.1
+
+# 单段连接中断后的重试次数（从已下载的位置继续）
+SEGMENT_RETRIES = 3
+
+# 状态文件的最短保存间隔（秒）
+STATE_SAVE_INTERVAL = 1.0
+
+# 下载中的临时文件和状态文件后缀，完成后临时文件改名为目标文件，状态文件删除
+PART_SUFFIX = '.part'
+STATE_SUFFIX = '.part.json'
+
+
+class DownloadStopped(Exception):
+    """下载被stop()中止（暂停或取消），已下载的分段保留"""
+
+
+def range_validator(headers):
+    """
+    选出可用于If-Range的验证信息：强ETag优先，ETag是弱的（W/"..."）时改用Last-Modified
+
+    服务器不接受弱ETag作为If-Range（总是返回200完整内容），用它会让每个分段都失败
+
+    参数:
+        headers: 响应头
+
+    返回:
+        str: ETag或Last-Modified，都没有时返回None
+    """
+    etag = headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return headers.get('Last-Modified')
+
+
+class ChunkSizer:
+    """根据每次读取的耗时调整读取块大小"""
+
+    def __init__(self, size=DOWNLOAD_CHUNK_SIZE):
+        self.size = size
+
+    def update(self, received, seconds):
+        if received >= self.size and seconds < CHUNK_TARGET_SECONDS / 2:
+            self.size = min(MAX_CHUNK_SIZE, self.size * 2)
+        elif seconds > CHUNK_TARGET_SECONDS * 2:
+            self.size = max(MIN_CHUNK_SIZE, self.size // 2)
+
+
+def iter_adaptive(response, sizer=None):
+    """
+    按自适应的块大小读取响应正文，异常转换方式与requests的iter_content一致
+
+    参数:
+        response: 以stream=True发出的响应
+        sizer (ChunkSizer): 块大小调整器，默认新建
+
+    返回:
+        生成器，逐块产生正文
+    """
+    sizer = sizer or ChunkSizer()
+    try:
+        while True:
+            start = time.monotonic()
+            chunk = response.raw.read(sizer.size, decode_content=True)
+            if not chunk:
+                break
+            sizer.update(len(chunk), time.monotonic() - start)
+            yield chunk
+    except ProtocolError as e:
+        raise requests.exceptions.ChunkedEncodingError(e)
+    except ReadTimeoutError as e:
+        raise requests.exceptions.ConnectionError(e)
+    except DecodeError as e:
+        raise requests.exceptions.ContentDecodingError(e)
+
+
+class Download:
+    """
+    一个文件的下载任务
+
+    参数:
+        session: requests会话
+        url (str): 文件URL
+        path (str): 保存路径
+        headers (dict): 附加请求头，如Referer
+        segments (int): 最大并行连接数
+        timeout (int): 连接和读取超时（秒）
+        progress: 进度回调 progress(已下载字节数, 总字节数)，总字节数未知时为0，会在下载线程中调用，
+                  可直接传入ProgressReporter.update
+    """
+
+    def __init__(self, session, url, path, headers=None, segments=DEFAULT_SEGMENTS, timeout=30, progress=None):
+        self.session = session
+        self.url = url
+        self.path = path
+        self.headers = dict(headers or {})
+        self.segments = max(1, segments)
+        self.timeout = timeout
+        self.progress = progress
+        self.part_path = path + PART_SUFFIX
+        self.state_path = path + STATE_SUFFIX
+        self.total = 0
+        self.downloaded = 0
+        self.resumed = False
+        self.lock = threading.Lock()
+        self.saved_at = 0.0
+        self.stopped = threading.Event()
+        self.aborted = threading.Event()  # 有分段失败（或下载被中止）时置位，让其他分段尽快停止
+
+    def stop(self):
+        """请求中止下载（可在其他线程调用），run()会尽快抛出DownloadStopped"""
+        self.stopped.set()
+
+    def discard(self):
+        """删除未完成的临时文件和状态文件"""
+        for path in (self.part_path, self.state_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _check_stopped(self):
+        if self.stopped.is_set() or self.aborted.is_set():
+            raise DownloadStopped(self.url)
+
+    def run(self):
+        """
+        执行下载，完成后返回文件大小；失败时抛出异常，已下载的分段保留以便下次继续
+
+        返回:
+            int: 文件大小（字节）
+        """
+        self._check_stopped()
+
+        # 请求第一个字节：206且能得到文件总大小时分段下载；200表示不支持Range，直接用这个响应单连接下载；
+        # 其他情况（206但总大小未知如 bytes 0-0/*、空文件返回的416）重新发出不带Range的请求单连接下载，
+        # 不能把只有一个字节的206响应当作完整文件保存
+        probe_headers = dict(self.headers, Range='bytes=0-0')
+        response = self.session.get(self.url, headers=probe_headers, stream=True, timeout=self.timeout)
+        try:
+            if response.status_code != 416:
+                response.raise_for_status()
+            if response.status_code == 200:
+                self._download_single(response)
+                return self.downloaded
+            total = self._range_total(response) if response.status_code == 206 else None
+            validator = range_validator(response.headers)
+        finally:
+            response.close()
+
+        if total is None:
+            return self._download_full()
+
+        self.total = total
+        self._download_segments(validator)
+        return self.total
+
+    def _download_full(self):
+        """不带Range重新请求整个文件，单连接下载"""
+        self._check_stopped()
+        with self.session.get(self.url, headers=self.headers, stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            self._download_single(response)
+        return self.downloaded
+
+    def _range_total(self, response):
+        """从 Content-Range: bytes 0-0/12345 中取出文件总大小"""
+        content_range = response.headers.get('Content-Range', '')
+        if not content_range.startswith('bytes ') or '/' not in content_range:
+            return None
+        total = content_range.rsplit('/', 1)[1]
+        return int(total) if total.isdigit() else None
+
+    def _report(self, size):
+        # 在锁内回调，多个分段线程报告的进度不会倒退
+        with self.lock:
+            self.downloaded += size
+            if self.progress:
+                self.progress(self.downloaded, self.total)
+
+    def _download_single(self, response):
+        """服务器不支持Range时单连接下载，不能断点续传"""
+        self.total = int(response.headers.get('content-length', 0) or 0)
+        with open(self.part_path, 'wb') as f:
+            for chunk in iter_adaptive(response):
+                self._check_stopped()
+                f.write(chunk)
+                self._report(len(chunk))
+        os.replace(self.part_path, self.path)
+        self._remove_state()
+
+    def _load_state(self, validator):
+        """读取状态文件，URL、大小和验证信息都一致且临时文件还在时才继续之前的下载"""
+        try:
+            with open(self.state_path, encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (state.get('url') != self.url or state.get('total') != self.total
+                or state.get('validator') != validator or not os.path.exists(self.part_path)
+                or os.path.getsize(self.part_path) != self.total):
+            return None
+        return state
+
+    def _save_state(self, state):
+        """原子地写入状态文件（调用时需持有锁）"""
+        self.saved_at = time.monotonic()
+        temp_path = self.state_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.state_path)
+
+    def _remove_state(self):
+        try:
+            os.remove(self.state_path)
+        except OSError:
+            pass
+
+    def _download_segments(self, validator):
+        state = self._load_state(validator)
+        if state is None:
+            count = max(1, min(self.segments, self.total // MIN_SEGMENT_BYTES))
+            size = -(-self.total // count)
+            state = {
+                'url': self.url,
+                'total': self.total,
+                'validator': validator,
+                # 每段为 [起始位置, 结束位置(不含), 已下载字节数]
+                'segments': [[start, min(start + size, self.total), 0] for start in range(0, self.total, size)]
+            }
+            # 预分配文件，各段直接写到自己的位置
+            with open(self.part_path, 'wb') as f:
+                f.truncate(self.total)
+            with self.lock:
+                self._save_state(state)
+        else:
+            self.resumed = True
+            self.downloaded = sum(done for _, _, done in state['segments'])
+
+        remaining = [segment for segment in state['segments'] if segment[0] + segment[2] < segment[1]]
+        if remaining:
+            try:
+                with ThreadPoolExecutor(max_workers=len(remaining)) as executor:
+                    futures = [executor.submit(self._download_segment, segment, state, validator)
+                               for segment in remaining]
+                    finished, _ = wait(futures, return_when=FIRST_EXCEPTION)
+                    error = next((future.exception() for future in finished if future.exception()), None)
+                    if error is not None:
+                        self.aborted.set()  # 一段最终失败后其他分段不必再下载，已下载的部分保留
+                if error is not None:
+                    raise error
+            finally:
+                # 无论成功与否都记下各段进度，失败时下次从这里继续
+                with self.lock:
+                    self._save_state(state)
+
+        os.replace(self.part_path, self.path)
+        self._remove_state()
+
+    def _download_segment(self, segment, state, validator):
+        """下载一段，连接中断时从已下载的位置重试"""
+        for attempt in range(SEGMENT_RETRIES + 1):
+            try:
+                self._fetch_range(segment, state, validator)
+                return
+            except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError,
+                    requests.exceptions.Timeout):
+                if attempt == SEGMENT_RETRIES:
+                    raise
+
+    def _fetch_range(self, segment, state, validator):
+        start, end, done = segment
+        if start + done >= end:
+            return
+        self._check_stopped()
+
+        headers = dict(self.headers, Range=f'bytes={start + done}-{end - 1}')
+        if validator:
+            headers['If-Range'] = validator  # 文件已变化时服务器返回200完整内容，而不是拼接出错误的文件
+
+        with self.session.get(self.url, headers=headers, stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            if response.status_code != 206:
+                raise requests.exceptions.RequestException(f"服务器文件已变化或不支持分段下载: HTTP {response.status_code}")
+
+            # 无缓冲写入：状态文件记录的字节一定已经交给操作系统，进程中断后可以放心续传
+            with open(self.part_path, 'r+b', buffering=0) as f:
+                f.seek(start + done)
+                for chunk in iter_adaptive(response):
+                    self._check_stopped()
+                    chunk = chunk[:end - start - done]
+                    f.write(chunk)
+                    done += len(chunk)
+                    with self.lock:
+                        segment[2] = done
+                        if time.monotonic() - self.saved_at >= STATE_SAVE_INTERVAL:
+                            self._save_state(state)
+                    self._report(len(chunk))
+                    if start + done >= end:
+                        break
+
+        if start + done < end:
+            raise requests.exceptions.ChunkedEncodingError(f"分段下载不完整: {start + done}/{end}")
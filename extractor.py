@@ -0,0 +1,487 @@
+"""
+网页内容提取
+与界面无关的文本、图片、视频提取函数，图形界面和命令行批处理共用
+"""
+
+import re
+from functools import lru_cache
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup, Tag
+from bs4.builder import builder_registry
+
+
+# 视频文件扩展名列表
+VIDEO_EXTENSIONS = ['.mp4', '.webm', '.avi', '.mov', '.flv', '.wmv', '.m4v', '.mkv']
+
+# 解析器后端，按速度从快到慢排列。lxml和html5lib为可选依赖，html.parser为Python内置，始终可用
+PARSER_BACKENDS = ['lxml', 'html5lib', 'html.parser']
+
+# 流式解析器：不建文档树，边下载边提取，可代替上面的解析器后端
+STREAM_PARSER = 'stream'
+
+# 提取文本时整体移除的标签
+SKIPPED_TAGS = frozenset(['script', 'style', 'noscript'])
+
+# 其中的文字不计入正文的标签（BeautifulSoup的get_text同样忽略）
+NON_TEXT_TAGS = frozenset(['template', 'rt', 'rp'])
+
+# 没有结束标签的空元素，与BeautifulSoup的HTML树构建器一致
+VOID_TAGS = frozenset([
+    'area', 'base', 'basefont', 'bgsound', 'br', 'col', 'command', 'embed', 'frame', 'hr', 'image', 'img',
+    'input', 'isindex', 'keygen', 'link', 'menuitem', 'meta', 'nextid', 'param', 'source', 'spacer', 'track', 'wbr'
+])
+
+# 脚本中视频链接的匹配规则
+SCRIPT_VIDEO_PATTERN = re.compile(r'https?://[^\s<>"]+\.(mp4|webm|avi|mov|flv|wmv|m4v|mkv)', re.IGNORECASE)
+
+
+def available_parsers():
+    """
+    列出已安装的解析器后端
+
+    返回:
+        list: 可用的后端名称，按速度从快到慢排列
+    """
+    return [name for name in PARSER_BACKENDS if builder_registry.lookup(name) is not None]
+
+
+@lru_cache(maxsize=None)
+def resolve_parser(parser='auto'):
+    """
+    选择实际使用的解析器后端
+    auto选择已安装的最快后端；指定的后端未安装时自动退回html.parser
+
+    参数:
+        parser (str): auto、lxml、html5lib或html.parser
+
+    返回:
+        str: 可以传给BeautifulSoup的解析器名称
+    """
+    if parser in (None, 'auto'):
+        candidates = PARSER_BACKENDS
+    else:
+        candidates = [parser, 'html.parser']
+
+    for name in candidates:
+        if builder_registry.lookup(name) is not None:
+            return name
+    return 'html.parser'
+
+
+def parse_html(content, parser='auto'):
+    """
+    解析HTML，所有后端都生成BeautifulSoup文档树，提取函数与后端无关
+
+    参数:
+        content (bytes|str): 网页内容
+        parser (str): 解析器后端，见resolve_parser
+
+    返回:
+        BeautifulSoup: 解析后的文档
+    """
+    return BeautifulSoup(content, resolve_parser(parser))
+
+
+def is_video_url(url):
+    """
+    检查URL是否是视频URL
+
+    参数:
+        url (str): 要检查的URL
+
+    返回:
+        bool: 如果URL包含视频扩展名则返回True
+    """
+    url = url.lower()
+    for ext in VIDEO_EXTENSIONS:
+        if ext in url:
+            return True
+    return False
+
+
+def absolute_url(url, base_url):
+    """把相对URL转换为绝对URL"""
+    if not url.startswith(('http://', 'https://')):
+        return urljoin(base_url, url)
+    return url
+
+
+def extract_text(soup):
+    """
+    提取网页纯文本（会从soup中移除script、style和noscript标签）
+
+    参数:
+        soup: BeautifulSoup对象
+
+    返回:
+        str: 去掉空行后的文本
+    """
+    for script in soup(["script", "style", "noscript"]):
+        script.decompose()
+
+    text = soup.get_text(separator=' ', strip=True)
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    return '\n'.join(lines)
+
+
+def extract_images(soup, base_url):
+    """
+    提取图片信息，支持src和data-src属性
+
+    参数:
+        soup: BeautifulSoup对象
+        base_url (str): 基础URL，用于处理相对URL
+
+    返回:
+        list: [(url, alt_text), ...]
+    """
+    images = []
+    for img in soup.find_all('img'):
+        img_url = img.get('src') or img.get('data-src')
+        if img_url:
+            img_url = absolute_url(img_url, base_url)
+            img_alt = img.get('alt', '无描述')
+            images.append((img_url, img_alt))
+    return images
+
+
+def extract_videos(soup, base_url):
+    """
+    提取视频信息：video/source标签、视频平台iframe、视频链接和脚本中的视频地址
+
+    参数:
+        soup: BeautifulSoup对象
+        base_url (str): 基础URL，用于处理相对URL
+
+    返回:
+        list: [(url, title, type), ...]，type为direct/youtube/bilibili/vimeo
+    """
+    videos = []
+
+    for video in soup.find_all('video'):
+        src = video.get('src')
+        if src:
+            src = absolute_url(src, base_url)
+            if is_video_url(src):
+                title = video.get('title', video.get('alt', '无标题'))
+                videos.append((src, title, 'direct'))
+
+        for source in video.find_all('source'):
+            src = source.get('src')
+            if src:
+                src = absolute_url(src, base_url)
+                if is_video_url(src):
+                    title = source.get('title', '无标题')
+                    videos.append((src, title, 'direct'))
+
+    for iframe in soup.find_all('iframe'):
+        src = iframe.get('src')
+        if src:
+            src = absolute_url(src, base_url)
+            title = iframe.get('title', '视频嵌入')
+            if 'youtube.com' in src or 'youtu.be' in src:
+                videos.append((src, title, 'youtube'))
+            elif 'bilibili.com' in src:
+                videos.append((src, title, 'bilibili'))
+            elif 'vimeo.com' in src:
+                videos.append((src, title, 'vimeo'))
+
+    for a in soup.find_all('a', href=True):
+        href = a['href']
+        if is_video_url(href):
+            href = absolute_url(href, base_url)
+            title = a.get_text(strip=True)
+            if not title:
+                title = '视频链接'
+            videos.append((href, title, 'direct'))
+
+    for script in soup.find_all('script'):
+        if script.string:
+            for url in SCRIPT_VIDEO_PATTERN.findall(script.string):
+                if is_video_url(url):
+                    videos.append((url, '脚本中的视频', 'direct'))
+
+    return videos
+
+
+def extract_page(soup, base_url):
+    """
+    单次遍历文档树，同时提取文本、图片、视频和链接
+    结果与依次调用extract_text、extract_images、extract_videos相同：
+    script、style和noscript整棵子树都被跳过（extract_text会先移除它们），因此也不会从脚本中提取视频
+
+    参数:
+        soup: BeautifulSoup对象（不会被修改）
+        base_url (str): 基础URL，用于处理相对URL
+
+    返回:
+        dict: {'text': str, 'images': [(url, alt)], 'videos': [(url, title, type)], 'links': [(url, text)]}
+    """
+    string_types = soup.interesting_string_types
+    strings = []
+    images = []
+    video_groups = []   # 每个video标签一组：自身src和其中的source
+    open_videos = []    # 当前所在的video标签（可能嵌套）
+    iframe_videos = []
+    links = []          # [href, 链接文本片段]
+    open_links = []     # 当前所在的a标签，收集其中的文本
+
+    # 显式栈代替递归：(子节点迭代器, 离开该节点时要关闭的标签名)
+    stack = [(iter(soup.contents), None)]
+    while stack:
+        children, closing = stack[-1]
+        node = next(children, None)
+        if node is None:
+            stack.pop()
+            if closing == 'video':
+                open_videos.pop()
+            elif closing == 'a':
+                open_links.pop()
+            continue
+
+        if not isinstance(node, Tag):
+            # 与get_text一致：只保留正文字符串类型，忽略注释、doctype等
+            if type(node) in string_types:
+                text = node.strip()
+                if text:
+                    strings.append(text)
+                    for link in open_links:
+                        link[1].append(text)
+            continue
+
+        name = node.name
+        if name in SKIPPED_TAGS:
+            continue
+
+        attrs = node.attrs
+        closing = None
+
+        if name == 'img':
+            img_url = attrs.get('src') or attrs.get('data-src')
+            if img_url:
+                images.append((absolute_url(img_url, base_url), attrs.get('alt', '无描述')))
+
+        elif name == 'video':
+            group = []
+            src = attrs.get('src')
+            if src:
+                src = absolute_url(src, base_url)
+                if is_video_url(src):
+                    group.append((src, attrs.get('title', attrs.get('alt', '无标题')), 'direct'))
+            video_groups.append(group)
+            open_videos.append(group)
+            closing = 'video'
+
+        elif name == 'source':
+            src = attrs.get('src')
+            if src and open_videos:
+                src = absolute_url(src, base_url)
+                if is_video_url(src):
+                    entry = (src, attrs.get('title', '无标题'), 'direct')
+                    # source属于所有外层video，与video.find_all('source')一致
+                    for group in open_videos:
+                        group.append(entry)
+
+        elif name == 'iframe':
+            src = attrs.get('src')
+            if src:
+                src = absolute_url(src, base_url)
+                title = attrs.get('title', '视频嵌入')
+                if 'youtube.com' in src or 'youtu.be' in src:
+                    iframe_videos.append((src, title, 'youtube'))
+                elif 'bilibili.com' in src:
+                    iframe_videos.append((src, title, 'bilibili'))
+                elif 'vimeo.com' in src:
+                    iframe_videos.append((src, title, 'vimeo'))
+
+        elif name == 'a' and attrs.get('href') is not None:
+            link = [attrs['href'], []]
+            links.append(link)
+            open_links.append(link)
+            closing = 'a'
+
+        if closing or node.contents:
+            stack.append((iter(node.contents), closing))
+
+    text = ' '.join(strings)
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+
+    videos = [entry for group in video_groups for entry in group]
+    videos.extend(iframe_videos)
+    for href, parts in links:
+        if is_video_url(href):
+            videos.append((absolute_url(href, base_url), ''.join(parts) or '视频链接', 'direct'))
+
+    return {
+        'text': '\n'.join(lines),
+        'images': images,
+        'videos': videos,
+        'links': [(absolute_url(href, base_url), ''.join(parts)) for href, parts in links]
+    }
+
+
+def _remove_record(records, record):
+    """从打开的记录中移除record本身：相同内容的记录（如两个空的video分组）可能有多个，不能按相等比较"""
+    for index in range(len(records) - 1, -1, -1):
+        if records[index] is record:
+            del records[index]
+            return
+
+
+class StreamingExtractor(HTMLParser):
+    """
+    流式提取器：基于标准库的增量HTML分词器，不建立文档树
+    网页内容可以分块调用feed()送入，已收到的部分立即提取，结果与extract_page基本一致
+
+    用法:
+        extractor = StreamingExtractor(base_url)
+        for chunk in chunks:
+            extractor.feed(chunk)
+        page = extractor.close()
+    """
+
+    def __init__(self, base_url):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.strings = []
+        self.images = []
+        self.video_groups = []
+        self.iframe_videos = []
+        self.links = []         # [href, 链接文本片段]
+        self._data = []         # 尚未结束的文本片段（文本可能跨越多次feed）
+        self._stack = []        # 打开的元素：(标签名, 该元素对应的video组或链接)
+        self._open_videos = []
+        self._open_links = []
+        self._closed_void = []  # 已自动关闭的空元素，随后出现的同名结束标签被忽略
+        self._skip_depth = 0    # 位于script/style/noscript中的层数
+        self._non_text_depth = 0
+
+    def _flush_data(self):
+        if not self._data:
+            return
+        text = ''.join(self._data).strip()
+        self._data = []
+        if text and not self._skip_depth and not self._non_text_depth:
+            self.strings.append(text)
+            for link in self._open_links:
+                link[1].append(text)
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._data.append(data)
+
+    def handle_comment(self, data):
+        self._flush_data()
+
+    def handle_decl(self, decl):
+        self._flush_data()
+
+    def handle_pi(self, data):
+        self._flush_data()
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_data()
+        attrs = {name: '' if value is None else value for name, value in attrs}
+        record = None
+
+        if self._skip_depth:
+            pass
+        elif tag == 'img':
+            img_url = attrs.get('src') or attrs.get('data-src')
+            if img_url:
+                self.images.append((absolute_url(img_url, self.base_url), attrs.get('alt', '无描述')))
+        elif tag == 'video':
+            record = []
+            src = attrs.get('src')
+            if src:
+                src = absolute_url(src, self.base_url)
+                if is_video_url(src):
+                    record.append((src, attrs.get('title', attrs.get('alt', '无标题')), 'direct'))
+            self.video_groups.append(record)
+            self._open_videos.append(record)
+        elif tag == 'source':
+            src = attrs.get('src')
+            if src and self._open_videos:
+                src = absolute_url(src, self.base_url)
+                if is_video_url(src):
+                    entry = (src, attrs.get('title', '无标题'), 'direct')
+                    for group in self._open_videos:
+                        group.append(entry)
+        elif tag == 'iframe':
+            src = attrs.get('src')
+            if src:
+                src = absolute_url(src, self.base_url)
+                title = attrs.get('title', '视频嵌入')
+                if 'youtube.com' in src or 'youtu.be' in src:
+                    self.iframe_videos.append((src, title, 'youtube'))
+                elif 'bilibili.com' in src:
+                    self.iframe_videos.append((src, title, 'bilibili'))
+                elif 'vimeo.com' in src:
+                    self.iframe_videos.append((src, title, 'vimeo'))
+        elif tag == 'a' and 'href' in attrs:
+            record = [attrs['href'], []]
+            self.links.append(record)
+            self._open_links.append(record)
+
+        if tag in VOID_TAGS:
+            self._closed_void.append(tag)
+            return
+
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag in NON_TEXT_TAGS:
+            self._non_text_depth += 1
+        self._stack.append((tag, record))
+
+    def handle_endtag(self, tag):
+        if tag in self._closed_void:
+            self._closed_void.remove(tag)
+            return
+
+        self._flush_data()
+        # 与BeautifulSoup相同：结束标签关闭最近的同名元素及其内部未关闭的元素，没有对应的开始标签时忽略
+        for index in range(len(self._stack) - 1, -1, -1):
+            if self._stack[index][0] == tag:
+                break
+        else:
+            return
+
+        while len(self._stack) > index:
+            name, record = self._stack.pop()
+            if name in SKIPPED_TAGS:
+                self._skip_depth -= 1
+            elif name in NON_TEXT_TAGS:
+                self._non_text_depth -= 1
+            elif record is not None:
+                _remove_record(self._open_videos if name == 'video' else self._open_links, record)
+
+    def result(self):
+        """
+        返回目前为止的提取结果，格式与extract_page相同
+
+        返回:
+            dict: {'text': str, 'images': [...], 'videos': [...], 'links': [...]}
+        """
+        text = ' '.join(self.strings)
+        lines = [line.strip() for line in text.splitlines() if line.strip()]
+
+        videos = [entry for group in self.video_groups for entry in group]
+        videos.extend(self.iframe_videos)
+        for href, parts in self.links:
+            if is_video_url(href):
+                videos.append((absolute_url(href, self.base_url), ''.join(parts) or '视频链接', 'direct'))
+
+        return {
+            'text': '\n'.join(lines),
+            'images': list(self.images),
+            'videos': videos,
+            'links': [(absolute_url(href, self.base_url), ''.join(parts)) for href, parts in self.links]
+        }
+
+    def close(self):
+        """结束解析（处理剩余的缓冲内容）并返回提取结果"""
+        super().close()
+        self._flush_data()
+        return self.result()
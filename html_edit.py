@@ -1,199 +1,200 @@
 # html_editor_direct.py
 import sys
 import os
+import io
 import re
 from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 
+# 没有结束标签的元素
+VOID_TAGS = frozenset(["br", "hr", "img", "input", "meta", "link"])
+
+# 标签名：到空白、'>'或'/'为止
+TAG_NAME_PATTERN = re.compile(r'[^\s>/]*')
+
+# 一个属性：前导空白、属性名，以及可选的 =值（双引号、单引号或不带引号，不带引号的值到空白、'>'或'/'为止）
+ATTRIBUTE_PATTERN = re.compile(r'''\s*([^\s=>/]*)(=\s*(?:"([^"]*)"?|'([^']*)'?|([^\s>/]*)))?''')
+
+# 没有子元素、没有属性的节点共用的空容器（只读）
+EMPTY_CHILDREN = ()
+EMPTY_ATTRIBUTES = ()
+
+# 编辑后等待多久再重新生成HTML预览（毫秒），连续编辑只在停下来后生成一次
+PREVIEW_DELAY_MS = 500
+
 class WebElement:
+    """
+    HTML元素节点
+    用__slots__省去每个节点的__dict__；属性字典和子元素列表在第一次通过attributes/children访问时才分配，
+    文本节点和叶子元素不占用这两个容器。只读遍历请用attribute_items()和child_nodes，不会触发分配
+    """
+    __slots__ = ('tag', 'content', '_attributes', '_children')
+    
     def __init__(self, tag="", content="", attributes=None, children=None):
-        self.tag = tag
+        self.tag = sys.intern(tag)
         self.content = content
-        self.attributes = attributes or {}
-        self.children = children or []
+        self._attributes = attributes or None
+        self._children = children or None
+    
+    @property
+    def attributes(self):
+        """属性字典（可修改），没有属性时分配一个空字典"""
+        if self._attributes is None:
+            self._attributes = {}
+        return self._attributes
+    
+    @attributes.setter
+    def attributes(self, value):
+        self._attributes = value
+    
+    @property
+    def children(self):
+        """子元素列表（可修改），没有子元素时分配一个空列表"""
+        if self._children is None:
+            self._children = []
+        return self._children
+    
+    @children.setter
+    def children(self, value):
+        self._children = value
+    
+    @property
+    def child_nodes(self):
+        """只读遍历用的子元素序列，没有子元素时为共享的空元组"""
+        return self._children or EMPTY_CHILDREN
+    
+    def attribute_items(self):
+        """只读遍历用的 (属性名, 属性值)，没有属性时为共享的空元组"""
+        return self._attributes.items() if self._attributes else EMPTY_ATTRIBUTES
     
     def to_html(self, indent=0):
-        indent_str = "  " * indent
-        attrs = " ".join([f'{k}="{v}"' for k, v in self.attributes.items()])
-        attr_str = f" {attrs}" if attrs else ""
-        
-        if self.tag == "text":
-            return indent_str + self.content
-        
-        if self.children:
-            children_html = "\n".join([child.to_html(indent + 1) for child in self.children])
-            return f"{indent_str}<{self.tag}{attr_str}>\n{children_html}\n{indent_str}</{self.tag}>"
-        elif self.content:
-            return f"{indent_str}<{self.tag}{attr_str}>{self.content}</{self.tag}>"
-        else:
-            return f"{indent_str}<{self.tag}{attr_str} />"
+        """生成HTML字符串"""
+        return "".join(self.iter_html(indent))
+    
+    def iter_html(self, indent=0):
+        """
+        逐行生成HTML片段（第二行起以换行开头），拼接后与to_html相同
+        用显式栈代替递归，嵌套再深也不会超过递归深度限制
+        """
+        separator = ""
+        stack = [(self, indent)]
+        while stack:
+            element, level = stack.pop()
+            if isinstance(element, str):  # 子元素都已输出，补上结束标签（栈中只存标签名，缩进到这时才生成）
+                line = f"{'  ' * level}</{element}>"
+            elif element.tag == "text":
+                line = "  " * level + element.content
+            else:
+                indent_str = "  " * level
+                attrs = " ".join([f'{k}="{v}"' for k, v in element.attribute_items()])
+                attr_str = f" {attrs}" if attrs else ""
+                
+                if element.child_nodes:
+                    line = f"{indent_str}<{element.tag}{attr_str}>"
+                    stack.append((element.tag, level))
+                    stack.extend((child, level + 1) for child in reversed(element.child_nodes))
+                elif element.content:
+                    line = f"{indent_str}<{element.tag}{attr_str}>{element.content}</{element.tag}>"
+                else:
+                    line = f"{indent_str}<{element.tag}{attr_str} />"
+            
+            yield separator + line
+            separator = "\n"
+    
+    def write_html(self, out, indent=0):
+        """把HTML逐段写入out（文件或io.StringIO），不在内存中拼出整个字符串"""
+        out.writelines(self.iter_html(indent))
 
 class HTMLParser:
-    def __init__(self):
-        self.current_index = 0
-        self.html = ""
+    """
+    HTML解析器：用正则和str.find按标记扫描，单次线性遍历生成元素树
+    未闭合的元素用栈保存，不递归，嵌套再深也不会超过递归深度限制
+    """
     
     def parse(self, html_content):
         """解析HTML字符串为元素树"""
-        self.html = html_content
-        self.current_index = 0
+        html = html_content
+        length = len(html)
         elements = []
-        
-        while self.current_index < len(self.html):
-            # 跳过空白字符
-            if self.html[self.current_index].isspace():
-                self.current_index += 1
+        stack = []  # 还没遇到结束标签的元素: (元素, 小写标签名)
+        index = 0
+        
+        while index < length:
+            # 文本节点：到下一个'<'为止，去掉首尾空白，空白文本忽略
+            tag_start = html.find('<', index)
+            if tag_start == -1:
+                tag_start = length
+            if tag_start > index:
+                text = html[index:tag_start].strip()
+                if text:
+                    (stack[-1][0].children if stack else elements).append(WebElement("text", text))
+                index = tag_start
                 continue
             
-            # 检查是否是注释
-            if self.html.startswith("<!--", self.current_index):
-                end_index = self.html.find("-->", self.current_index)
-                if end_index != -1:
-                    self.current_index = end_index + 3
+            # 顶层的注释直接跳过（元素内的注释按普通标签处理）
+            if not stack and html.startswith("<!--", index):
+                end_index = html.find("-->", index)
+                index = length if end_index == -1 else end_index + 3
                 continue
             
-            # 检查是否是标签
-            if self.html[self.current_index] == '<':
-                element = self.parse_element()
-                if element:
-                    elements.append(element)
-            else:
-                # 文本节点
-                text = self.parse_text()
-                if text.strip():
-                    text_element = WebElement("text", text.strip())
-                    elements.append(text_element)
+            # 结束标签：与当前元素的标签相同时闭合当前元素，否则忽略
+            if html.startswith("</", index):
+                end_bracket = html.find('>', index + 2)
+                if end_bracket == -1:
+                    break
+                if stack and html[index + 2:end_bracket].strip().lower() == stack[-1][1]:
+                    stack.pop()
+                index = end_bracket + 1
+                continue
+            
+            # 开始标签
+            element, index, is_self_closing = self.parse_start_tag(html, index)
+            (stack[-1][0].children if stack else elements).append(element)
+            
+            tag = element.tag.lower()
+            if not is_self_closing and tag not in VOID_TAGS:
+                stack.append((element, tag))
         
         return elements
     
-    def parse_element(self):
-        """解析单个HTML元素"""
-        if self.current_index >= len(self.html) or self.html[self.current_index] != '<':
-            return None
-        
-        # 检查是否是结束标签
-        if self.html[self.current_index + 1] == '/':
-            # 跳过结束标签
-            end_bracket = self.html.find('>', self.current_index)
-            if end_bracket != -1:
-                self.current_index = end_bracket + 1
-            return None
-        
-        # 解析开始标签
-        self.current_index += 1  # 跳过 '<'
-        
-        # 获取标签名
-        tag_end = self.current_index
-        while tag_end < len(self.html) and not self.html[tag_end].isspace() and self.html[tag_end] != '>' and self.html[tag_end] != '/':
-            tag_end += 1
-        
-        tag = self.html[self.current_index:tag_end]
-        self.current_index = tag_end
-        
-        # 解析属性
+    def parse_start_tag(self, html, index):
+        """
+        解析从index处'<'开始的开始标签
+        
+        返回:
+            tuple: (元素, 标签之后的位置, 是否自闭合)
+        """
+        length = len(html)
+        match = TAG_NAME_PATTERN.match(html, index + 1)
+        tag = match.group()
+        index = match.end()
+        
+        # 解析属性，没有'='的属性名被忽略；属性名重复很多（class、href等），驻留后所有节点共用
         attributes = {}
-        while self.current_index < len(self.html) and self.html[self.current_index] != '>' and self.html[self.current_index] != '/':
-            # 跳过空白
-            if self.html[self.current_index].isspace():
-                self.current_index += 1
-                continue
-            
-            # 解析属性名
-            attr_start = self.current_index
-            while (self.current_index < len(self.html) and 
-                   not self.html[self.current_index].isspace() and 
-                   self.html[self.current_index] != '=' and 
-                   self.html[self.current_index] != '>' and 
-                   self.html[self.current_index] != '/'):
-                self.current_index += 1
-            
-            attr_name = self.html[attr_start:self.current_index]
-            
-            if self.current_index < len(self.html) and self.html[self.current_index] == '=':
-                self.current_index += 1  # 跳过 '='
-                
-                # 跳过空白
-                while self.current_index < len(self.html) and self.html[self.current_index].isspace():
-                    self.current_index += 1
-                
-                # 解析属性值
-                quote_char = self.html[self.current_index] if self.html[self.current_index] in ('"', "'") else None
-                if quote_char:
-                    self.current_index += 1  # 跳过引号
-                    attr_start = self.current_index
-                    while (self.current_index < len(self.html) and 
-                           self.html[self.current_index] != quote_char):
-                        self.current_index += 1
-                    attr_value = self.html[attr_start:self.current_index]
-                    self.current_index += 1  # 跳过结束引号
+        while index < length and html[index] not in '>/':
+            match = ATTRIBUTE_PATTERN.match(html, index)
+            name, has_value, double_quoted, single_quoted, unquoted = match.groups()
+            if has_value is not None:
+                name = sys.intern(name)
+                if double_quoted is not None:
+                    attributes[name] = double_quoted
+                elif single_quoted is not None:
+                    attributes[name] = single_quoted
                 else:
-                    # 没有引号的属性值
-                    attr_start = self.current_index
-                    while (self.current_index < len(self.html) and 
-                           not self.html[self.current_index].isspace() and 
-                           self.html[self.current_index] != '>' and 
-                           self.html[self.current_index] != '/'):
-                        self.current_index += 1
-                    attr_value = self.html[attr_start:self.current_index]
-                
-                attributes[attr_name] = attr_value
+                    attributes[name] = unquoted
+            index = match.end()
         
         # 检查是否是自闭合标签
-        is_self_closing = False
-        if self.current_index < len(self.html) and self.html[self.current_index] == '/':
-            is_self_closing = True
-            self.current_index += 1
+        is_self_closing = index < length and html[index] == '/'
+        if is_self_closing:
+            index += 1
         
         # 跳过 '>'
-        if self.current_index < len(self.html) and self.html[self.current_index] == '>':
-            self.current_index += 1
-        
-        element = WebElement(tag, "", attributes)
-        
-        # 如果不是自闭合标签，解析子元素
-        if not is_self_closing and tag.lower() not in ["br", "hr", "img", "input", "meta", "link"]:
-            # 解析内容直到遇到结束标签
-            children = []
-            
-            while self.current_index < len(self.html):
-                # 检查是否是结束标签
-                if (self.current_index + 1 < len(self.html) and 
-                    self.html[self.current_index] == '<' and 
-                    self.html[self.current_index + 1] == '/'):
-                    
-                    # 检查是否是我们当前标签的结束标签
-                    end_tag_start = self.current_index + 2
-                    end_tag_end = self.html.find('>', end_tag_start)
-                    if end_tag_end != -1:
-                        end_tag = self.html[end_tag_start:end_tag_end].strip()
-                        if end_tag.lower() == tag.lower():
-                            self.current_index = end_tag_end + 1  # 跳过结束标签
-                            break
-                
-                # 解析子元素
-                if self.html[self.current_index] == '<':
-                    child = self.parse_element()
-                    if child:
-                        children.append(child)
-                else:
-                    text = self.parse_text()
-                    if text.strip():
-                        text_element = WebElement("text", text.strip())
-                        children.append(text_element)
-            
-            element.children = children
-        
-        return element
-    
-    def parse_text(self):
-        """解析文本内容"""
-        start_index = self.current_index
-        while (self.current_index < len(self.html) and 
-               self.html[self.current_index] != '<'):
-            self.current_index += 1
+        if index < length and html[index] == '>':
+            index += 1
         
-        return self.html[start_index:self.current_index]
+        return WebElement(tag, "", attributes), index, is_self_closing
 
 class ElementItem(QTreeWidgetItem):
     def __init__(self, element):
@@ -207,7 +208,7 @@ class ElementItem(QTreeWidgetItem):
             if len(self.element.content) > 50:
                 text += "..."
         else:
-            attrs = ", ".join([f"{k}: {v}" for k, v in self.element.attributes.items()])
+            attrs = ", ".join([f"{k}: {v}" for k, v in self.element.attribute_items()])
             text = f"<{self.element.tag}>"
             if attrs:
                 text += f" ({attrs})"
@@ -220,7 +221,15 @@ class HTMLEditor(QMainWindow):
         super().__init__()
         self.current_element = None
         self.elements = []
+        self.element_items = {}  # 元素 -> 树中对应的ElementItem，编辑时只更新这一项
         self.html_file = "html.txt"  # 要读取的文件名
+        
+        # 预览要序列化整个文档，编辑时延迟生成
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(PREVIEW_DELAY_MS)
+        self.preview_timer.timeout.connect(self.update_html_preview)
+        
         self.init_ui()
         self.load_html_file()  # 初始化时读取文件
     
@@ -399,53 +408,95 @@ class HTMLEditor(QMainWindow):
     def save_html_file(self):
         """保存当前编辑的内容到html.txt"""
         try:
-            html_content = self.generate_html()
-            with open(self.html_file, 'w', encoding='utf-8') as f:
-                f.write(html_content)
+            self.write_html_file(self.html_file)
             self.statusBar().showMessage(f"已保存到 {self.html_file}")
             QMessageBox.information(self, "保存成功", f"文件已保存到 {self.html_file}")
         except Exception as e:
             QMessageBox.critical(self, "错误", f"保存文件失败: {str(e)}")
     
+    def write_html_file(self, filename):
+        """把HTML直接写入文件：先写临时文件，写完再替换原文件，中途出错不会留下写了一半的文件"""
+        temp_file = filename + ".tmp"
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                self.write_html(f)
+            os.replace(temp_file, filename)
+        finally:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+    
     def generate_html(self):
         """从元素树生成完整的HTML"""
-        html_parts = []
-        
-        for element in self.elements:
-            html_parts.append(element.to_html())
-        
+        buffer = io.StringIO()
+        self.write_html(buffer)
+        return buffer.getvalue()
+    
+    def write_html(self, out):
+        """从元素树逐段生成完整的HTML并写入out，不在内存中拼出整个文档"""
         # 如果只有文本元素，包装在body中
-        if all(e.tag == "text" for e in self.elements):
-            body_content = "\n".join([e.to_html() for e in self.elements])
-            return f"""<!DOCTYPE html>
+        wrap_in_body = all(e.tag == "text" for e in self.elements)
+        if wrap_in_body:
+            out.write("""<!DOCTYPE html>
 <html>
 <head>
     <meta charset="UTF-8">
     <title>生成的网页</title>
 </head>
 <body>
-{body_content}
-</body>
-</html>"""
+""")
+        
+        for i, element in enumerate(self.elements):
+            if i:
+                out.write("\n")
+            element.write_html(out)
         
-        return "\n".join(html_parts)
+        if wrap_in_body:
+            out.write("""
+</body>
+</html>""")
     
     def refresh_tree(self):
-        """刷新元素树"""
+        """重建整个元素树（加载和清空时使用，编辑单个元素用update_element_item）"""
         self.element_tree.clear()
+        self.element_items = {}
         for element in self.elements:
-            item = ElementItem(element)
+            item = self.create_item(element)
             self.element_tree.addTopLevelItem(item)
-            self.add_children_to_tree(item, element.children)
+            self.add_children_to_tree(item, element.child_nodes)
         self.element_tree.expandAll()
         self.update_html_preview()
     
+    def create_item(self, element):
+        """创建元素对应的树节点并登记到索引"""
+        item = ElementItem(element)
+        self.element_items[element] = item
+        return item
+    
+    def forget_items(self, element):
+        """从索引中移除元素及其所有子元素（删除元素时使用）"""
+        stack = [element]
+        while stack:
+            element = stack.pop()
+            self.element_items.pop(element, None)
+            stack.extend(element.child_nodes)
+    
+    def update_element_item(self, element):
+        """元素被编辑后只更新它在树中的显示文本，其余节点和展开状态不变"""
+        item = self.element_items.get(element)
+        if item is not None:
+            item.update_text()
+        self.schedule_html_preview()
+    
     def add_children_to_tree(self, parent_item, children):
-        """添加子元素到树中"""
-        for child in children:
-            child_item = ElementItem(child)
-            parent_item.addChild(child_item)
-            self.add_children_to_tree(child_item, child.children)
+        """添加子元素到树中（用显式栈逐层添加，不递归）"""
+        stack = [(parent_item, children)]
+        while stack:
+            parent_item, children = stack.pop()
+            for child in children:
+                child_item = self.create_item(child)
+                parent_item.addChild(child_item)
+                if child.child_nodes:
+                    stack.append((child_item, child.child_nodes))
     
     def on_element_selected(self, item):
         """元素被选中"""
@@ -465,7 +516,7 @@ class HTMLEditor(QMainWindow):
             
             # 更新属性表格
             self.attr_table.setRowCount(0)
-            for key, value in self.current_element.attributes.items():
+            for key, value in self.current_element.attribute_items():
                 row = self.attr_table.rowCount()
                 self.attr_table.insertRow(row)
                 self.attr_table.setItem(row, 0, QTableWidgetItem(key))
@@ -498,15 +549,15 @@ class HTMLEditor(QMainWindow):
                 parent_item = selected_items[0]
                 parent_element = parent_item.element
                 parent_element.children.append(element)
-                child_item = ElementItem(element)
+                child_item = self.create_item(element)
                 parent_item.addChild(child_item)
             else:
                 self.elements.append(element)
-                item = ElementItem(element)
+                item = self.create_item(element)
                 self.element_tree.addTopLevelItem(item)
             
             self.statusBar().showMessage(f"已添加 <{tag}> 元素")
-            self.update_html_preview()
+            self.schedule_html_preview()
     
     def delete_element(self):
         """删除选中元素"""
@@ -525,9 +576,10 @@ class HTMLEditor(QMainWindow):
         else:
             self.elements.remove(item.element)
             self.element_tree.takeTopLevelItem(self.element_tree.indexOfTopLevelItem(item))
+        self.forget_items(item.element)
         
         self.statusBar().showMessage("元素已删除")
-        self.update_html_preview()
+        self.schedule_html_preview()
     
     def add_attribute(self):
         """添加属性"""
@@ -544,7 +596,7 @@ class HTMLEditor(QMainWindow):
             return
         
         self.current_element.attributes[key] = value
-        self.refresh_tree()
+        self.update_element_item(self.current_element)
         self.statusBar().showMessage(f"已添加属性 {key}=\"{value}\"")
     
     def remove_attribute(self):
@@ -557,7 +609,7 @@ class HTMLEditor(QMainWindow):
             key = selected[0].text()
             if key in self.current_element.attributes:
                 del self.current_element.attributes[key]
-                self.refresh_tree()
+                self.update_element_item(self.current_element)
                 self.statusBar().showMessage(f"已删除属性 {key}")
     
     def update_element(self):
@@ -584,11 +636,16 @@ class HTMLEditor(QMainWindow):
                 if key_item and value_item:
                     self.current_element.attributes[key_item.text()] = value_item.text()
         
-        self.refresh_tree()
+        self.update_element_item(self.current_element)
         self.statusBar().showMessage("元素已更新")
     
+    def schedule_html_preview(self):
+        """编辑后调用：PREVIEW_DELAY_MS内没有新的编辑时才更新预览，每次编辑不必序列化整个文档"""
+        self.preview_timer.start()
+    
     def update_html_preview(self):
-        """更新HTML预览"""
+        """立即更新HTML预览"""
+        self.preview_timer.stop()
         html = self.generate_html()
         self.html_preview.setText(html)
     
@@ -597,8 +654,7 @@ class HTMLEditor(QMainWindow):
         filename, _ = QFileDialog.getSaveFileName(self, "导出HTML", "", "HTML文件 (*.html)")
         if filename:
             try:
-                with open(filename, 'w', encoding='utf-8') as f:
-                    f.write(self.generate_html())
+                self.write_html_file(filename)
                 self.statusBar().showMessage(f"HTML已导出到 {filename}")
             except Exception as e:
                 QMessageBox.critical(self, "错误", f"导出失败: {str(e)}")
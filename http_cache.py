@@ -0,0 +1,359 @@
+"""
+本地HTTP缓存
+按URL把响应正文和验证信息（ETag/Last-Modified）保存在磁盘上，过期后用条件请求重新验证，
+总大小超过上限时按最近最少使用（LRU）淘汰
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from io import BytesIO
+from email.utils import formatdate
+
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+
+
+# 默认缓存目录（相对当前目录，与html.txt一样）
+DEFAULT_CACHE_DIR = '.web_cache'
+
+# 默认缓存总大小上限
+DEFAULT_CACHE_BYTES = 200 * 1024 * 1024
+
+# 单个响应的大小上限，超过的不缓存（如视频文件）
+DEFAULT_ENTRY_BYTES = 10 * 1024 * 1024
+
+# 响应没有给出max-age时的默认有效期（秒）
+DEFAULT_TTL = 3600
+
+# 缓存命中时随响应保存的响应头
+STORED_HEADERS = ['Content-Type', 'ETag', 'Last-Modified', 'Cache-Control']
+
+MAX_AGE_PATTERN = re.compile(r'max-age\s*=\s*(\d+)', re.IGNORECASE)
+
+
+class HTTPCache:
+    """
+    磁盘HTTP缓存（线程安全）
+    每个条目是一对文件：<key>.body保存正文，<key>.json保存URL、响应头、保存时间和最近访问时间
+
+    参数:
+        directory (str): 缓存目录
+        max_bytes (int): 缓存总大小上限
+        max_entry_bytes (int): 单个响应的大小上限
+        ttl (int): 响应没有给出max-age时的有效期（秒）
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_BYTES,
+                 max_entry_bytes=DEFAULT_ENTRY_BYTES, ttl=DEFAULT_TTL):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = {}  # key -> 元数据
+        self.total_bytes = 0
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _key(self, url):
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    def _path(self, key, suffix):
+        return os.path.join(self.directory, key + suffix)
+
+    def _load_index(self):
+        """启动时扫描缓存目录，建立内存索引"""
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            key = name[:-5]
+            try:
+                with open(self._path(key, '.json'), encoding='utf-8') as f:
+                    meta = json.load(f)
+                meta['size'] = os.path.getsize(self._path(key, '.body'))
+            except (OSError, ValueError):
+                self._remove_files(key)
+                continue
+            self.entries[key] = meta
+            self.total_bytes += meta['size']
+        self._evict()
+
+    def _remove_files(self, key):
+        for suffix in ('.json', '.body'):
+            try:
+                os.remove(self._path(key, suffix))
+            except OSError:
+                pass
+
+    def _write_meta(self, key, meta):
+        with open(self._path(key, '.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    def _evict(self):
+        """淘汰最久未访问的条目，直到总大小不超过上限（调用时需持有锁）"""
+        if self.total_bytes <= self.max_bytes:
+            return
+        for key, meta in sorted(self.entries.items(), key=lambda item: item[1]['accessed']):
+            if self.total_bytes <= self.max_bytes:
+                break
+            del self.entries[key]
+            self.total_bytes -= meta['size']
+            self._remove_files(key)
+
+    def lookup(self, url):
+        """
+        查找缓存条目
+
+        返回:
+            dict|None: 元数据（含fresh字段表示是否在有效期内），没有缓存时返回None
+        """
+        with self.lock:
+            meta = self.entries.get(self._key(url))
+            if meta is None or meta['url'] != url:
+                return None
+            meta = dict(meta)
+        meta['fresh'] = time.time() - meta['stored'] < meta['lifetime']
+        return meta
+
+    def read(self, url):
+        """
+        读取缓存的正文并更新访问时间
+
+        返回:
+            bytes|None: 正文，条目已被淘汰时返回None
+        """
+        key = self._key(url)
+        with self.lock:
+            meta = self.entries.get(key)
+            if meta is None:
+                return None
+            meta['accessed'] = time.time()
+            self._write_meta(key, meta)
+
+        # 在锁外读取正文，多个缓存命中可以同时读盘；
+        # 读取期间条目被替换时store用os.replace换文件，已打开的文件仍是完整的旧正文
+        try:
+            with open(self._path(key, '.body'), 'rb') as f:
+                return f.read()
+        except OSError:
+            with self.lock:
+                # 文件已被淘汰或损坏；条目在此期间被重新写入时不要删掉新的
+                if self.entries.get(key) is meta:
+                    del self.entries[key]
+                    self.total_bytes -= meta['size']
+                    self._remove_files(key)
+            return None
+
+    def refresh(self, url, headers):
+        """
+        收到304后延长条目有效期，并合并新的验证信息
+
+        参数:
+            url (str): 请求URL
+            headers: 304响应的响应头
+        """
+        key = self._key(url)
+        with self.lock:
+            meta = self.entries.get(key)
+            if meta is None:
+                return
+            for name in STORED_HEADERS:
+                if name in headers:
+                    meta['headers'][name] = headers[name]
+            meta['stored'] = time.time()
+            meta['lifetime'] = self.lifetime(meta['headers'])
+            self._write_meta(key, meta)
+
+    def lifetime(self, headers):
+        """根据Cache-Control计算有效期（秒），no-cache表示每次都要重新验证"""
+        cache_control = headers.get('Cache-Control', '')
+        if 'no-cache' in cache_control.lower():
+            return 0
+        match = MAX_AGE_PATTERN.search(cache_control)
+        if match:
+            return int(match.group(1))
+        return self.ttl
+
+    def cacheable(self, response):
+        """判断响应是否可以缓存：200、未禁止缓存、不是视频且大小未超过上限"""
+        if response.status_code != 200:
+            return False
+        headers = response.headers
+        if 'no-store' in headers.get('Cache-Control', '').lower():
+            return False
+        if headers.get('Content-Type', '').lower().startswith(('video/', 'audio/')):
+            return False
+        length = headers.get('Content-Length', '')
+        if length.isdigit() and int(length) > self.max_entry_bytes:
+            return False
+        return True
+
+    def store(self, url, headers, body_path, size):
+        """
+        提交一个已写入临时文件的条目
+
+        参数:
+            url (str): 请求URL
+            headers: 响应头
+            body_path (str): 正文临时文件
+            size (int): 正文大小
+        """
+        key = self._key(url)
+        stored_headers = {name: headers[name] for name in STORED_HEADERS if name in headers}
+        now = time.time()
+        meta = {
+            'url': url,
+            'headers': stored_headers,
+            'stored': now,
+            'accessed': now,
+            'lifetime': self.lifetime(stored_headers),
+            'size': size
+        }
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old['size']
+            os.replace(body_path, self._path(key, '.body'))
+            self._write_meta(key, meta)
+            self.entries[key] = meta
+            self.total_bytes += size
+            self._evict()
+
+    def count(self, outcome):
+        """
+        统计一次请求的结果（线程安全）
+
+        参数:
+            outcome (str): 'hits'、'revalidated'或'misses'
+        """
+        with self.lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def clear(self):
+        """清空缓存"""
+        with self.lock:
+            for key in list(self.entries):
+                self._remove_files(key)
+            self.entries.clear()
+            self.total_bytes = 0
+
+
+class _CachingStream:
+    """
+    包装urllib3响应：正文被读取的同时写入临时文件，完整读完后提交到缓存
+    中途出错、未读完或超过大小上限时丢弃临时文件
+    """
+
+    def __init__(self, raw, cache, url, headers):
+        self._raw = raw
+        self._cache = cache
+        self._url = url
+        self._headers = headers
+
+    def stream(self, amt=2 ** 16, decode_content=None):
+        fd, temp_path = tempfile.mkstemp(dir=self._cache.directory, suffix='.tmp')
+        temp_file = os.fdopen(fd, 'wb')
+        size = 0
+        complete = False
+        try:
+            for chunk in self._raw.stream(amt, decode_content=decode_content):
+                if temp_file is not None:
+                    size += len(chunk)
+                    if size > self._cache.max_entry_bytes:
+                        temp_file.close()
+                        temp_file = None
+                    else:
+                        temp_file.write(chunk)
+                yield chunk
+            complete = temp_file is not None
+        finally:
+            if temp_file is not None:
+                temp_file.close()
+            if complete and decode_content:
+                self._cache.store(self._url, self._headers, temp_path, size)
+            else:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+
+class CachingAdapter(HTTPAdapter):
+    """
+    带缓存的传输适配器：挂载到requests会话后，所有GET请求自动经过缓存
+    有效期内直接返回缓存；过期后带If-None-Match/If-Modified-Since重新验证，304时返回缓存正文
+    带Range或自定义条件头的请求不经过缓存
+    """
+
+    def __init__(self, cache, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+
+    def _cached_response(self, request, meta, body):
+        headers = dict(meta['headers'])
+        headers['Content-Length'] = str(len(body))
+        headers['X-Cache'] = 'HIT'
+        raw = HTTPResponse(
+            body=BytesIO(body),
+            headers=headers,
+            status=200,
+            reason='OK',
+            preload_content=False,
+            decode_content=False
+        )
+        return self.build_response(request, raw)
+
+    def send(self, request, **kwargs):
+        headers = request.headers
+        if (request.method != 'GET' or 'Range' in headers
+                or 'If-None-Match' in headers or 'If-Modified-Since' in headers):
+            return super().send(request, **kwargs)
+
+        url = request.url
+        meta = self.cache.lookup(url)
+        if meta is not None:
+            if meta['fresh']:
+                body = self.cache.read(url)
+                if body is not None:
+                    self.cache.count('hits')
+                    return self._cached_response(request, meta, body)
+            else:
+                validators = meta['headers']
+                if 'ETag' in validators:
+                    headers['If-None-Match'] = validators['ETag']
+                if 'Last-Modified' in validators:
+                    headers['If-Modified-Since'] = validators['Last-Modified']
+                elif 'ETag' not in validators:
+                    headers['If-Modified-Since'] = formatdate(meta['stored'], usegmt=True)
+
+        response = super().send(request, **kwargs)
+
+        if meta is not None and response.status_code == 304:
+            response.close()
+            body = self.cache.read(url)
+            if body is not None:
+                self.cache.refresh(url, response.headers)
+                self.cache.count('revalidated')
+                return self._cached_response(request, self.cache.lookup(url) or meta, body)
+
+            # 条目在验证期间被淘汰，去掉条件头重新请求完整内容
+            headers.pop('If-None-Match', None)
+            headers.pop('If-Modified-Since', None)
+            response = super().send(request, **kwargs)
+
+        self.cache.count('misses')
+        if self.cache.cacheable(response):
+            response.raw = _CachingStream(response.raw, self.cache, url, response.headers)
+        return response
@@ -0,0 +1,269 @@
+"""
+HTTP会话管理
+为网页内容提取器提供共享的连接池会话：同一主机的网页、图片预览和视频下载复用TCP/TLS连接
+以及网页字符集识别和流式读取：正文只解码一次，HTML源码和解析器共用解码结果
+"""
+
+import codecs
+import re
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.compat import chardet
+from urllib3.util.retry import Retry
+
+from http_cache import CachingAdapter
+
+
+# 默认请求头，模拟浏览器访问
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Connection': 'keep-alive'
+}
+
+
+# 网页正文的默认大小上限
+DEFAULT_MAX_BYTES = 20 * 1024 * 1024
+
+# 流式读取网页时每次读取的字节数
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# 字符集识别时检查<meta charset>的前缀长度（HTML标准要求声明位于前1024字节内，这里放宽一些）
+META_SCAN_BYTES = 4096
+
+# 以上方法都无法确定字符集时，只对正文前缀做编码探测
+SNIFF_BYTES = 64 * 1024
+
+# 按浏览器的习惯把旧字符集名映射到其超集
+ENCODING_ALIASES = {
+    'gb2312': 'gb18030',
+    'gbk': 'gb18030',
+    'iso-8859-1': 'cp1252',
+    'latin-1': 'cp1252',
+    'us-ascii': 'cp1252',
+    'ascii': 'cp1252'
+}
+
+BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16')
+]
+
+HEADER_CHARSET_PATTERN = re.compile(r'charset\s*=\s*["\']?([^"\';\s]+)', re.IGNORECASE)
+META_CHARSET_PATTERN = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([-\w.:]+)', re.IGNORECASE)
+
+
+class ContentTooLarge(requests.exceptions.RequestException):
+    """响应正文超过大小上限"""
+
+
+def create_retry(max_retries=3, backoff_factor=0.5, connect_retries=None):
+    """
+    创建重试策略（只重试幂等请求）
+
+    参数:
+        max_retries (int): 最大重试次数
+        backoff_factor (float): 退避系数，第n次重试前等待 backoff_factor * 2^(n-1) 秒
+        connect_retries (int): 连接失败的重试次数，默认与max_retries相同
+
+    返回:
+        Retry: urllib3重试策略
+    """
+    return Retry(
+        total=max_retries,
+        connect=max_retries if connect_retries is None else connect_retries,
+        read=max_retries,
+        other=0,  # SSL证书等错误重试无意义，直接失败
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        raise_on_status=False  # 重试用尽后返回最后的响应，由raise_for_status处理
+    )
+
+
+def _create_adapter(cache, pool_connections, pool_maxsize, retry):
+    """创建传输适配器，提供缓存时使用带缓存的适配器"""
+    if cache is not None:
+        return CachingAdapter(cache, pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+    return HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+
+
+def create_session(pool_connections=10, pool_maxsize=10, host_pool_sizes=None,
+                   max_retries=3, backoff_factor=0.5, headers=None, cache=None, connect_retries=None):
+    """
+    创建带连接池、重试和keep-alive的requests会话
+
+    参数:
+        pool_connections (int): 缓存的主机连接池数量
+        pool_maxsize (int): 每个主机连接池保留的最大连接数
+        host_pool_sizes (dict): 单独指定某些主机的连接数，如 {'img.example.com': 20}
+        max_retries (int): 最大重试次数
+        backoff_factor (float): 重试退避系数
+        headers (dict): 会话默认请求头，默认使用DEFAULT_HEADERS
+        cache (HTTPCache): 可选的磁盘HTTP缓存，所有GET请求都会经过它
+        connect_retries (int): 连接失败的重试次数，默认与max_retries相同
+
+    返回:
+        requests.Session: 配置好的会话对象
+    """
+    session = requests.Session()
+    session.headers.update(headers or DEFAULT_HEADERS)
+
+    adapter = _create_adapter(cache, pool_connections, pool_maxsize,
+                              create_retry(max_retries, backoff_factor, connect_retries))
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    # requests按URL前缀匹配最长的适配器，为指定主机挂载独立大小的连接池
+    for host, maxsize in (host_pool_sizes or {}).items():
+        host_adapter = _create_adapter(cache, 1, maxsize, create_retry(max_retries, backoff_factor, connect_retries))
+        session.mount(f'http://{host}/', host_adapter)
+        session.mount(f'https://{host}/', host_adapter)
+
+    return session
+
+
+def normalize_encoding(name):
+    """
+    检查字符集名称是否可用，并映射为浏览器实际使用的超集
+
+    参数:
+        name (str): 字符集名称
+
+    返回:
+        str|None: Python可用的编码名，无法识别时返回None
+    """
+    if not name:
+        return None
+    name = name.strip().lower()
+    name = ENCODING_ALIASES.get(name, name)
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def resolve_encoding(content, content_type=None):
+    """
+    确定网页正文的字符集
+    依次检查BOM、HTTP头的charset和<meta charset>，都没有时才在有限长度的前缀上探测编码
+
+    参数:
+        content (bytes): 网页正文
+        content_type (str): Content-Type响应头
+
+    返回:
+        str: 编码名
+    """
+    for bom, encoding in BOMS:
+        if content.startswith(bom):
+            return encoding
+
+    if content_type:
+        match = HEADER_CHARSET_PATTERN.search(content_type)
+        encoding = normalize_encoding(match.group(1)) if match else None
+        if encoding:
+            return encoding
+
+    match = META_CHARSET_PATTERN.search(content, 0, META_SCAN_BYTES)
+    encoding = normalize_encoding(match.group(1).decode('ascii', 'ignore')) if match else None
+    if encoding:
+        return encoding
+
+    prefix = content[:SNIFF_BYTES]
+    try:
+        # 截断位置可能落在多字节字符中间，忽略末尾不完整的字符
+        codecs.getincrementaldecoder('utf-8')().decode(prefix, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+
+    detected = chardet.detect(prefix) if chardet else None
+    encoding = normalize_encoding(detected and detected.get('encoding'))
+    return encoding or 'utf-8'
+
+
+def decode_response(response):
+    """
+    解码响应正文（只解码一次），结果同时用于HTML源码显示和解析
+
+    参数:
+        response: requests响应对象
+
+    返回:
+        tuple: (文本, 编码名)
+    """
+    content = response.content
+    encoding = resolve_encoding(content, response.headers.get('Content-Type'))
+    return content.decode(encoding, errors='replace'), encoding
+
+
+class DecodedBody:
+    """
+    流式读取并解码响应正文，超过大小上限时中止下载
+    收到前META_SCAN_BYTES字节后即确定编码（不做全文探测），之后每收到一块就解码产出一段文本
+
+    用法:
+        response = session.get(url, stream=True)
+        body = DecodedBody(response, max_bytes)
+        for text in body:
+            ...
+
+    参数:
+        response: 以stream=True发出的requests响应
+        max_bytes (int): 正文大小上限，0表示不限制
+        chunk_size (int): 每次读取的字节数
+    """
+
+    def __init__(self, response, max_bytes=DEFAULT_MAX_BYTES, chunk_size=STREAM_CHUNK_SIZE):
+        self.response = response
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.encoding = None
+        self.received = 0
+        self.total = None  # Content-Length，未知时为None
+
+        length = response.headers.get('Content-Length', '')
+        if length.isdigit():
+            self.total = int(length)
+
+    def _check_size(self, size):
+        if self.max_bytes and size > self.max_bytes:
+            self.response.close()
+            raise ContentTooLarge(
+                f"网页超过大小上限 {self.max_bytes // 1024}KB",
+                response=self.response
+            )
+
+    def __iter__(self):
+        if self.total is not None:
+            self._check_size(self.total)
+
+        content_type = self.response.headers.get('Content-Type')
+        decoder = None
+        head = b''
+
+        for chunk in self.response.iter_content(chunk_size=self.chunk_size):
+            self.received += len(chunk)
+            self._check_size(self.received)
+
+            if decoder is None:
+                # 先攒够一段前缀用于识别BOM和<meta charset>
+                head += chunk
+                if len(head) < META_SCAN_BYTES:
+                    continue
+                self.encoding = resolve_encoding(head, content_type)
+                decoder = codecs.getincrementaldecoder(self.encoding)(errors='replace')
+                chunk, head = head, b''
+
+            text = decoder.decode(chunk)
+            if text:
+                yield text
+
+        if decoder is None:
+            self.encoding = resolve_encoding(head, content_type)
+            decoder = codecs.getincrementaldecoder(self.encoding)(errors='replace')
+        text = decoder.decode(head, final=True)
+        if text:
+            yield text
@@ -0,0 +1,128 @@
+"""
+图片预览的解码和内存缓存
+预览图在后台线程解码并缩放，按URL缓存在内存中，总大小超过上限时按最近最少使用（LRU）淘汰
+"""
+
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+from PIL import Image
+
+
+# 预览窗口中图片的最大边长
+PREVIEW_MAX_SIZE = 800
+
+# 先整数倍缩小到目标尺寸的这个倍数以内，再用LANCZOS精确缩放；3.0时与直接LANCZOS的结果几乎无差别
+PREVIEW_REDUCING_GAP = 3.0
+
+# Tk可以直接显示的图片模式
+DISPLAY_MODES = ('RGB', 'RGBA', 'L', 'P', '1')
+
+# 预览缓存的默认内存上限
+DEFAULT_PREVIEW_CACHE_BYTES = 64 * 1024 * 1024
+
+# 网页加载完成后在后台预先解码的图片数量
+DEFAULT_PREWARM_COUNT = 8
+
+
+def decode_preview(data, max_size=PREVIEW_MAX_SIZE):
+    """
+    解码图片并缩放到预览尺寸，返回可直接显示的图片（应在后台线程调用）
+    JPEG在解码时按1/2、1/4、1/8缩小（draft），其他格式先用reduce整数倍缩小，
+    最后只对接近目标尺寸的图片做一次LANCZOS，超大图片不会以原始分辨率解码
+
+    参数:
+        data (bytes): 图片文件内容
+        max_size (int): 预览图的最大边长
+
+    返回:
+        tuple: (缩放后的PIL图片, 原始尺寸(宽, 高))
+    """
+    img = Image.open(BytesIO(data))
+    original_size = img.size
+    original_width, original_height = original_size
+    if original_width > max_size or original_height > max_size:
+        ratio = min(max_size / original_width, max_size / original_height)
+        new_size = (max(1, int(original_width * ratio)), max(1, int(original_height * ratio)))
+
+        # 只对JPEG有效：解码器直接输出不小于 目标尺寸×倍数 的缩小图，box为原图在缩小图中对应的区域
+        draft_size = (new_size[0] * PREVIEW_REDUCING_GAP, new_size[1] * PREVIEW_REDUCING_GAP)
+        drafted = img.draft(None, tuple(int(n) for n in draft_size))
+        box = drafted[1] if drafted else None
+
+        img = img.resize(new_size, Image.Resampling.LANCZOS, box=box, reducing_gap=PREVIEW_REDUCING_GAP)
+    else:
+        img.load()  # Image.open只读取文件头，在这里完成解码
+
+    # 转换成Tk可以直接显示的模式（CMYK、16位灰度等），带透明色的调色板图片保留透明度
+    if img.mode not in DISPLAY_MODES:
+        img = img.convert('RGBA' if 'transparency' in img.info or img.mode.endswith('A') else 'RGB')
+    return img, original_size
+
+
+def image_bytes(img):
+    """估算PIL图片占用的内存字节数"""
+    width, height = img.size
+    return width * height * len(img.getbands())
+
+
+class PreviewCache:
+    """
+    预览图内存缓存（线程安全）
+
+    参数:
+        max_bytes (int): 缓存的图片总大小上限
+    """
+
+    def __init__(self, max_bytes=DEFAULT_PREVIEW_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # url -> (预览, 字节数)，按访问顺序排列
+        self.total_bytes = 0
+
+    def get(self, url):
+        """
+        取出缓存的预览
+
+        返回:
+            tuple|None: decode_preview的返回值，没有缓存时返回None
+        """
+        with self.lock:
+            entry = self.entries.get(url)
+            if entry is None:
+                return None
+            self.entries.move_to_end(url)
+            return entry[0]
+
+    def put(self, url, preview):
+        """
+        缓存一个预览，超出上限时淘汰最久未使用的条目
+
+        参数:
+            url (str): 图片URL
+            preview (tuple): decode_preview的返回值
+        """
+        size = image_bytes(preview[0])
+        if size > self.max_bytes:
+            return
+
+        with self.lock:
+            old = self.entries.pop(url, None)
+            if old is not None:
+                self.total_bytes -= old[1]
+            self.entries[url] = (preview, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+
+    def __contains__(self, url):
+        with self.lock:
+            return url in self.entries
+
+    def clear(self):
+        """清空缓存"""
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
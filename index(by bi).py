@@ -7,19 +7,31 @@
 
 # ============================ 导入必要的库 ============================
 import requests  # 用于发送HTTP请求
-from bs4 import BeautifulSoup  # 用于解析HTML
 import tkinter as tk  # GUI库
 from tkinter import ttk, filedialog, messagebox  # Tkinter的增强组件和对话框
-from PIL import Image, ImageTk  # 图像处理库
-from io import BytesIO  # 用于内存中处理二进制数据
-from urllib.parse import urljoin, urlparse  # 用于处理URL拼接和解析
-import threading  # 多线程支持
+from PIL import ImageTk  # 图像处理库
+from urllib.parse import urlparse  # 用于处理URL解析
 import os  # 文件系统操作
-import re  # 正则表达式
 import webbrowser  # 打开浏览器
 import tempfile  # 临时文件处理
 import subprocess  # 运行外部程序
 import sys  # 系统相关功能
+from http_session import create_session, DecodedBody, DEFAULT_MAX_BYTES  # 共享的连接池会话和流式解码
+from http_cache import HTTPCache  # 本地HTTP缓存
+from image_preview import PreviewCache, decode_preview, DEFAULT_PREWARM_COUNT  # 预览图解码和内存缓存
+from progress import ProgressReporter  # 按时间合并的进度报告
+from virtual_text import VirtualTextView, ChunkedInserter  # 大文本的虚拟化显示和分批插入
+from virtual_list import VirtualListbox  # 只显示可见行的列表框，上万项也能立即显示
+from cancellation import Generations  # 网页请求的代数和协作式取消
+from worker_pool import WorkerPools  # 共用的I/O和CPU线程池
+from async_fetch import AsyncFetcher, TkBridge  # asyncio并发请求和到Tkinter的线程安全队列
+from scheme_resolver import SchemeResolver  # HTTPS失败时改用HTTP并按主机暂时记住
+from download_manager import DownloadManager, video_file_name, unique_path, RUNNING, COMPLETED, FAILED  # 下载队列
+from extractor import available_parsers, parse_html, extract_page, StreamingExtractor, STREAM_PARSER  # 与界面无关的提取函数
+
+
+# 后台任务统计的刷新间隔（毫秒）
+WORKER_STATUS_INTERVAL = 500
 
 
 # ============================ URL验证和修复函数 ============================
@@ -64,6 +76,12 @@ class WebContentExtractor:
         self.videos_list = []  # 存储视频信息列表，格式: [(url, title, type), ...]
         self.current_html = ""  # 存储当前网页的HTML源码
         
+        # 网页请求的代数：每次点击获取网页都开始新的一代，上一代的下载、解析和预热随之取消，迟到的结果被丢弃
+        self.fetch_generations = Generations()
+        
+        # 后台任务线程池：网络请求和解析/解码分别在固定大小的线程池中执行，线程数不随点击次数增长
+        self.workers = WorkerPools()
+        
         # 初始化主窗口
         self.root = None
         
@@ -72,6 +90,36 @@ class WebContentExtractor:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
         
+        # 本地HTTP缓存：重复打开同一网页或图片时直接使用缓存，过期后用条件请求验证（多为304）
+        self.cache = HTTPCache()
+        
+        # 创建共享的HTTP会话：网页、图片和视频请求复用同一个连接池，避免重复TCP/TLS握手
+        self.session = create_session(headers=self.headers, cache=self.cache)
+        
+        # HTTPS/HTTP协议选择：HTTPS出现SSL或连接错误时改用HTTP，一段时间内同一主机直接使用HTTP，之后重新尝试HTTPS
+        self.scheme_resolver = SchemeResolver(self.session)
+        
+        # asyncio请求核心：在一个后台线程的事件循环中并发检查大量图片链接（未安装aiohttp时退回少量线程）
+        self.async_fetcher = AsyncFetcher(self.headers, self.session)
+        self.image_status = {}  # 图片链接检查结果，格式: {url: AsyncFetcher.head的结果}
+        self.image_check = None  # 当前这次检查的进度，格式: {'total', 'done', 'broken', 'future'}
+        self.page_token = None  # 当前显示的网页所属一代的取消令牌，图片链接检查归入这一代
+        
+        # 已解码并缩放的预览图缓存，再次打开同一张图片时无需下载和解码
+        self.preview_cache = PreviewCache()
+        
+        # 下载队列：限制同时下载数，支持优先级、暂停、继续和取消（分段下载的进度可续传）
+        self.download_manager = DownloadManager(self.session, on_change=self._on_download_change)
+        self.download_tasks_shown = []  # 下载任务列表框中显示的任务，与列表项一一对应
+        self.notify_tasks = set()  # 完成时弹窗提示的任务（单个下载），批量下载只更新状态
+        self.download_refresh_pending = False  # 是否已安排刷新下载任务列表
+        
+        # HTML解析器后端：auto自动选择已安装的最快后端（lxml > html5lib > html.parser）
+        self.parser = 'auto'
+        
+        # 网页大小上限，超过时中止下载，防止超大或无限长的页面占满内存
+        self.max_page_bytes = DEFAULT_MAX_BYTES
+        
         # 设置UI界面
         self.setup_ui()
     
@@ -83,6 +131,10 @@ class WebContentExtractor:
         # 创建主窗口
         self.root = tk.Tk()
         self.root.title("网页内容提取器 v5.0 - 完整增强版")
+        
+        # 后台线程的结果都放入这个队列，由GUI线程定时取出执行，后台线程不直接调用Tk
+        self.bridge = TkBridge(self.root)
+        self.bridge.start()
         self.root.geometry("1200x900")
         
         # 创建主框架
@@ -106,6 +158,18 @@ class WebContentExtractor:
         fetch_button = ttk.Button(url_frame, text="获取网页内容", command=self.fetch_webpage)
         fetch_button.pack(side=tk.LEFT, padx=5)
         
+        # 解析器选择框（只列出已安装的后端；stream为边下载边提取的流式解析器）
+        ttk.Label(url_frame, text="解析器:").pack(side=tk.LEFT, padx=(10, 0))
+        self.parser_var = tk.StringVar(value=self.parser)
+        parser_box = ttk.Combobox(
+            url_frame,
+            textvariable=self.parser_var,
+            values=['auto'] + available_parsers() + [STREAM_PARSER],
+            width=12,
+            state='readonly'
+        )
+        parser_box.pack(side=tk.LEFT, padx=5)
+        
         # ========== HTML操作按钮 ==========
         html_buttons_frame = ttk.Frame(frame)
         html_buttons_frame.pack(fill=tk.X, pady=5)
@@ -143,16 +207,24 @@ class WebContentExtractor:
         video_frame = self.create_video_tab(notebook)
         notebook.add(video_frame, text="视频列表")
         
+        download_frame = self.create_download_tab(notebook)
+        notebook.add(download_frame, text="下载任务")
+        
         # ========== 状态标签 ==========
         self.status_label = ttk.Label(frame, text="就绪")
         self.status_label.pack(pady=5)
         
+        # 后台任务统计（运行数和排队数），空闲时不显示
+        self.worker_label = ttk.Label(frame, text="")
+        self.worker_label.pack()
+        self._update_worker_status()
+        
         # ========== 使用说明 ==========
         instructions = """
         使用说明 v5.0:
         1. 输入网页URL (支持输入域名如: baidu.com，系统会自动补全https://)
         2. 点击"获取网页内容"按钮或按回车键
-        3. 如果HTTPS连接失败，系统会自动尝试HTTP协议
+        3. 如果HTTPS连接失败，系统会自动尝试HTTP协议，并在一段时间内记住该网站只能使用HTTP
         4. 在"网页文字"选项卡查看提取的文本内容
         5. 在"HTML源码"选项卡查看网页源代码，并可保存或编辑
         6. 在"图片列表"选项卡查看并预览图片
@@ -186,6 +258,10 @@ class WebContentExtractor:
         # 关联滚动条和文本区域
         text_scroll.config(command=self.text_display.yview)
         
+        # 长文本分批插入，插入期间在文本区域下方显示进度条，完成后隐藏
+        self.text_progress = ttk.Progressbar(text_frame, mode='determinate')
+        self.text_inserter = ChunkedInserter(self.text_display, self._show_text_progress, self.text_progress.pack_forget)
+        
         return text_frame
     
     def create_html_tab(self, notebook):
@@ -200,16 +276,9 @@ class WebContentExtractor:
         """
         html_frame = ttk.Frame(notebook)
         
-        # 创建滚动条
-        html_scroll = ttk.Scrollbar(html_frame)
-        html_scroll.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        # 创建HTML显示区域
-        self.html_display = tk.Text(html_frame, height=20, wrap=tk.NONE, yscrollcommand=html_scroll.set)
-        self.html_display.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        # 关联滚动条和HTML区域
-        html_scroll.config(command=self.html_display.yview)
+        # 创建HTML显示区域（自带滚动条）：完整源码保存在内存中，控件里只放可见的几十行
+        self.html_display = VirtualTextView(html_frame, height=20)
+        self.html_display.pack(fill=tk.BOTH, expand=True)
         
         return html_frame
     
@@ -225,24 +294,25 @@ class WebContentExtractor:
         """
         image_frame = ttk.Frame(notebook)
         
-        # 创建图片列表框架
-        image_list_frame = ttk.Frame(image_frame)
-        image_list_frame.pack(fill=tk.BOTH, expand=True, pady=5)
-        
-        # 创建滚动条
-        image_scroll = ttk.Scrollbar(image_list_frame)
-        image_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        # 创建筛选输入框，按描述文字或URL筛选图片
+        self.image_filter_var = tk.StringVar()
+        self.create_filter_bar(image_frame, self.image_filter_var, self._filter_image_listbox)
         
-        # 创建图片列表框
-        self.image_listbox = tk.Listbox(image_list_frame, height=15, yscrollcommand=image_scroll.set)
-        self.image_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        # 创建图片列表框（虚拟化：只为可见行生成文字，自带滚动条）
+        self.image_listbox = VirtualListbox(image_frame, height=15)
+        self.image_listbox.pack(fill=tk.BOTH, expand=True, pady=5)
         
-        # 关联滚动条和列表框
-        image_scroll.config(command=self.image_listbox.yview)
+        # 创建按钮框架
+        button_frame = ttk.Frame(image_frame)
+        button_frame.pack(pady=5)
         
         # 创建查看图片按钮
-        show_button = ttk.Button(image_frame, text="查看选中图片", command=self.show_image)
-        show_button.pack(pady=5)
+        show_button = ttk.Button(button_frame, text="查看选中图片", command=self.show_image)
+        show_button.pack(side=tk.LEFT, padx=5)
+        
+        # 检查图片链接按钮：并发检查所有图片是否能访问，失效的在列表中标出
+        check_button = ttk.Button(button_frame, text="检查图片链接", command=self.check_image_links)
+        check_button.pack(side=tk.LEFT, padx=5)
         
         return image_frame
     
@@ -259,20 +329,13 @@ class WebContentExtractor:
         """
         video_frame = ttk.Frame(notebook)
         
-        # 创建视频列表框架
-        video_list_frame = ttk.Frame(video_frame)
-        video_list_frame.pack(fill=tk.BOTH, expand=True, pady=5)
+        # 创建筛选输入框，按标题、类型或URL筛选视频
+        self.video_filter_var = tk.StringVar()
+        self.create_filter_bar(video_frame, self.video_filter_var, self._filter_video_listbox)
         
-        # 创建滚动条
-        video_scroll = ttk.Scrollbar(video_list_frame)
-        video_scroll.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        # 创建视频列表框
-        self.video_listbox = tk.Listbox(video_list_frame, height=15, yscrollcommand=video_scroll.set)
-        self.video_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        # 关联滚动条和列表框
-        video_scroll.config(command=self.video_listbox.yview)
+        # 创建视频列表框（虚拟化，可按住Ctrl/Shift多选，用于批量下载）
+        self.video_listbox = VirtualListbox(video_frame, height=15, selectmode=tk.EXTENDED)
+        self.video_listbox.pack(fill=tk.BOTH, expand=True, pady=5)
         
         # 创建按钮框架
         button_frame = ttk.Frame(video_frame)
@@ -290,8 +353,78 @@ class WebContentExtractor:
         download_button = ttk.Button(button_frame, text="下载选中视频", command=self.download_video)
         download_button.pack(side=tk.LEFT, padx=5)
         
+        # 批量下载按钮：选中的视频全部加入下载队列
+        download_all_button = ttk.Button(button_frame, text="下载全部选中", command=self.download_selected_videos)
+        download_all_button.pack(side=tk.LEFT, padx=5)
+        
         return video_frame
     
+    def create_filter_bar(self, parent, variable, command):
+        """
+        创建筛选输入框，内容变化时立即调用command
+        
+        参数:
+            parent: 父控件
+            variable (tk.StringVar): 输入框绑定的变量
+            command: 筛选函数
+        """
+        filter_frame = ttk.Frame(parent)
+        filter_frame.pack(fill=tk.X, pady=(5, 0))
+        ttk.Label(filter_frame, text="筛选:").pack(side=tk.LEFT)
+        ttk.Entry(filter_frame, textvariable=variable, width=40).pack(side=tk.LEFT, padx=5)
+        
+        # 每次输入都重新筛选；筛选只在内存中比较字符串，几万项也不会卡顿
+        variable.trace_add('write', lambda *args: command())
+    
+    def create_download_tab(self, notebook):
+        """
+        创建下载任务选项卡
+        显示队列中每个任务的状态和进度，可暂停、继续、取消、优先下载和调整同时下载数
+        
+        参数:
+            notebook: ttk.Notebook对象
+        
+        返回:
+            ttk.Frame: 下载任务选项卡的框架
+        """
+        download_frame = ttk.Frame(notebook)
+        
+        # 创建下载任务列表框架
+        download_list_frame = ttk.Frame(download_frame)
+        download_list_frame.pack(fill=tk.BOTH, expand=True, pady=5)
+        
+        # 创建滚动条
+        download_scroll = ttk.Scrollbar(download_list_frame)
+        download_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        # 创建下载任务列表框
+        self.download_listbox = tk.Listbox(download_list_frame, height=15, selectmode=tk.EXTENDED, yscrollcommand=download_scroll.set)
+        self.download_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        download_scroll.config(command=self.download_listbox.yview)
+        
+        # 创建按钮框架
+        button_frame = ttk.Frame(download_frame)
+        button_frame.pack(pady=5)
+        
+        # 暂停、继续、取消、优先下载按钮，作用于所有选中的任务
+        for text, command in (("暂停", self.download_manager.pause), ("继续", self.download_manager.resume),
+                              ("取消", self.download_manager.cancel), ("优先下载", self._raise_download_priority)):
+            button = ttk.Button(button_frame, text=text, command=lambda c=command: self._apply_to_selected_downloads(c))
+            button.pack(side=tk.LEFT, padx=5)
+        
+        # 清除已完成和已取消的任务
+        clear_button = ttk.Button(button_frame, text="清除已完成", command=self.clear_finished_downloads)
+        clear_button.pack(side=tk.LEFT, padx=5)
+        
+        # 同时下载数，同时下载太多会让磁盘和网络都变慢
+        ttk.Label(button_frame, text="同时下载数:").pack(side=tk.LEFT, padx=(15, 0))
+        self.max_downloads_var = tk.IntVar(value=self.download_manager.max_concurrent)
+        max_downloads_box = ttk.Spinbox(button_frame, from_=1, to=10, width=4, textvariable=self.max_downloads_var,
+                                        command=lambda: self.download_manager.set_max_concurrent(self.max_downloads_var.get()))
+        max_downloads_box.pack(side=tk.LEFT, padx=5)
+        
+        return download_frame
+    
     def fetch_webpage(self):
         """
         从用户输入的URL获取网页内容 v5.0
@@ -310,169 +443,268 @@ class WebContentExtractor:
         self.url_entry.delete(0, tk.END)
         self.url_entry.insert(0, url)
         
+        # 在GUI线程中读取解析器选择，供后台线程使用
+        self.parser = self.parser_var.get()
+        
+        # 开始新的一代：取消上一次还在进行的下载和解析
+        token = self.fetch_generations.start()
+        
+        # 清空文本区域（流式解析时会边下载边显示文字）
+        self._update_text_display("")
+        
         # 更新状态标签
         self.status_label.config(text="正在加载网页...")
         
-        # 使用多线程加载网页，避免GUI界面卡顿
-        threading.Thread(target=self._load_webpage, args=(url,), daemon=True).start()
+        # 在I/O线程池中加载网页，避免GUI界面卡顿
+        self.workers.submit_io(self._load_webpage, url, token)
+    
+    def _post(self, token, func, *args):
+        """
+        从后台线程安排func在GUI线程中执行；执行时token已不是最新一代则丢弃
+        回调经TkBridge的队列转交，代数只在GUI线程中更新和检查，旧请求的结果不可能覆盖新请求的结果
+        
+        参数:
+            token (CancelToken): 发起操作的那一代的令牌
+            func: 要执行的函数
+            *args: 传给func的参数
+        """
+        self.bridge.post(self._run_if_current, token, func, args)
+    
+    def _run_if_current(self, token, func, args):
+        """在GUI线程中执行func，token已过期时跳过"""
+        if self.fetch_generations.is_current(token):
+            func(*args)
     
-    def _load_webpage(self, url):
+    def _load_webpage(self, url, token):
         """
         实际加载网页的内部函数 v5.0
-        整合了HTTPS失败时自动尝试HTTP的逻辑
+        HTTPS出现SSL或连接错误时改用HTTP，并按主机暂时记住（由SchemeResolver处理）
         包含4.0版的请求头和错误处理
         
         参数:
             url (str): 要加载的网页URL
+            token (CancelToken): 本次请求的取消令牌
         """
         try:
-            # 发送HTTP GET请求获取网页内容（使用4.0版的请求头）
-            response = requests.get(url, headers=self.headers, timeout=10)
-            response.raise_for_status()  # 如果请求失败则抛出异常
-            response.encoding = response.apparent_encoding  # 自动检测编码
+            # 通过共享会话发送流式GET请求（会话已带4.0版的请求头），正文分块读取
+            # 最近HTTPS失败过的主机直接使用HTTP；loaded_url为跟随重定向后的最终网址
+            loaded_url, response = self.scheme_resolver.open(url, timeout=10, stream=True)
             
-            # 保存HTML源码
-            self.current_html = response.text
-            
-            # 使用BeautifulSoup解析HTML
-            soup = BeautifulSoup(response.content, 'html.parser')
+            # 响应登记到令牌上，有新请求时被关闭，正在进行的读取随之中止
+            with token.attach(response):
+                response.raise_for_status()  # 如果请求失败则抛出异常
+                
+                # 改用了HTTP时更新输入框显示HTTP版本的URL（2改.py的功能）
+                used_http = urlparse(url).scheme == 'https' and urlparse(loaded_url).scheme == 'http'
+                if used_http:
+                    self._post(token, lambda: self.url_entry.delete(0, tk.END))
+                    self._post(token, lambda: self.url_entry.insert(0, loaded_url))
+                
+                # 下载并提取文本、图片和视频信息
+                html, page = self._download_and_extract(response, loaded_url, token)
             
-            # 提取文本、图片和视频信息
-            self._extract_text_content(soup)
-            self._extract_image_info(soup, url)
-            self._extract_video_info(soup, url)
+            # 在GUI线程中显示提取结果（已有更新的请求时丢弃）
+            self._post(token, self._show_page_content, html, page, token)
             
             # 更新状态标签显示完成信息
-            self.root.after(0, lambda: self.status_label.config(
-                text=f"加载完成。找到 {len(self.images_list)} 张图片，{len(self.videos_list)} 个视频"
+            prefix = "HTTP加载完成" if used_http else "加载完成"
+            self._post(token, lambda: self.status_label.config(
+                text=f"{prefix}。找到 {len(self.images_list)} 张图片，{len(self.videos_list)} 个视频"
             ))
             
-            # 更新HTML显示
-            self.root.after(0, self._update_html_display)
-            
         except requests.exceptions.RequestException as e:
-            # 处理网络请求相关错误
+            # 被新请求取消时，连接被关闭引起的错误不需要显示
+            if token.cancelled:
+                return
+            # 4.0版的错误处理方式（HTTPS和HTTP都失败时显示HTTPS的错误）
             error_msg = str(e)
-            
-            # 检查是否是HTTPS连接失败，尝试使用HTTP（2改.py的功能）
-            if "https" in url and ("SSLError" in error_msg or "Certificate" in error_msg or "HTTPSConnectionPool" in error_msg):
-                self.root.after(0, lambda: self.status_label.config(text="HTTPS连接失败，尝试使用HTTP..."))
-                self.try_http_version(url)
-            else:
-                # 4.0版的错误处理方式
-                self.root.after(0, lambda msg=error_msg: self.status_label.config(text=f"网络请求错误: {msg}"))
+            self._post(token, lambda msg=error_msg: self.status_label.config(text=f"网络请求错误: {msg}"))
         except Exception as e:
+            if token.cancelled:
+                return
             # 处理其他未知错误
             error_msg = str(e)
-            self.root.after(0, lambda msg=error_msg: self.status_label.config(text=f"发生错误: {msg}"))
+            self._post(token, lambda msg=error_msg: self.status_label.config(text=f"发生错误: {msg}"))
     
-    def try_http_version(self, url):
+    def _download_and_extract(self, response, base_url, token):
         """
-        尝试使用HTTP协议访问网站（当HTTPS失败时） v5.0
-        来自2改.py的HTTP重试功能
+        分块下载网页正文并提取内容
+        正文超过self.max_page_bytes时抛出ContentTooLarge（属于RequestException）
+        选择流式解析器时每收到一块就送入StreamingExtractor，文字和链接在下载过程中即开始提取和显示；
+        其他解析器在下载完成后单次遍历文档树提取
+        每收到一块和解析前后都检查令牌，被新请求取代时抛出Cancelled，不再做无用的解析
         
         参数:
-            url (str): 原始URL（HTTPS版本）
+            response: 以stream=True发出的响应
+            base_url (str): 基础URL，用于处理相对URL
+            token (CancelToken): 本次请求的取消令牌
+        
+        返回:
+            tuple: (HTML源码, extract_page格式的提取结果)
+        """
+        streamer = StreamingExtractor(base_url) if self.parser == STREAM_PARSER else None
+        body = DecodedBody(response, self.max_page_bytes)
+        parts = []
+        shown_strings = 0  # 已显示到文本区域的文字段数
+        reporter = ProgressReporter(None)  # 只用于节流和计算速度，进度文字在下面拼接
+        
+        for text in body:
+            token.check()
+            parts.append(text)
+            if streamer:
+                streamer.feed(text)
+            
+            # 每秒最多刷新10次进度，避免GUI事件队列堆积
+            if reporter.update(body.received):
+                status = f"正在下载网页: {reporter.describe()}"
+                if streamer:
+                    status += f"，已提取 {len(streamer.images)} 张图片，{len(streamer.links)} 个链接"
+                    
+                    # 把新提取到的文字先追加显示，下载完成后再替换为整理后的全文
+                    new_strings = streamer.strings[shown_strings:]
+                    shown_strings += len(new_strings)
+                    if new_strings:
+                        self._post(token, self._append_text_display, ' '.join(new_strings) + ' ')
+                self._post(token, lambda msg=status: self.status_label.config(text=msg))
+        
+        # 拼接HTML源码（正文只解码了一次），在GUI线程中显示结果时才保存到self.current_html
+        token.check()
+        html = ''.join(parts)
+        
+        if streamer:
+            return html, streamer.close()
+        
+        # 解析和提取交给CPU线程池，I/O线程池的线程只用于等待网络
+        return html, self.workers.run_cpu(self._parse_page, html, base_url, token)
+    
+    def _parse_page(self, html, base_url, token):
         """
-        # 将https://替换为http://
-        http_url = url.replace('https://', 'http://', 1)
+        解析HTML并提取内容（在CPU线程池中执行）
         
-        # 使用多线程执行HTTP请求
-        threading.Thread(target=self._try_http_request, args=(http_url,), daemon=True).start()
+        参数:
+            html (str): 网页HTML源码
+            base_url (str): 基础URL，用于处理相对URL
+            token (CancelToken): 本次请求的取消令牌
+        
+        返回:
+            dict: extract_page格式的提取结果
+        """
+        # 使用选定的解析器后端解析（未安装时自动退回html.parser），单次遍历提取
+        soup = parse_html(html, self.parser)
+        token.check()  # 解析期间有了新请求时不再提取
+        return extract_page(soup, base_url)
     
-    def _try_http_request(self, http_url):
+    def _show_page_content(self, html, page, token):
         """
-        实际执行HTTP请求的内部函数 v5.0
+        保存提取结果并更新显示（在GUI线程中调用）
         
         参数:
-            http_url (str): HTTP版本的URL
+            html (str): 网页HTML源码
+            page (dict): extract_page格式的提取结果
+            token (CancelToken): 本次请求的取消令牌，加载了新网页时预热线程据此提前结束
         """
-        try:
-            # 发送HTTP GET请求获取网页内容
-            response = requests.get(http_url, headers=self.headers, timeout=10)
-            response.raise_for_status()
-            response.encoding = response.apparent_encoding
-            
-            # 更新输入框显示HTTP版本的URL
-            self.root.after(0, lambda: self.url_entry.delete(0, tk.END))
-            self.root.after(0, lambda: self.url_entry.insert(0, http_url))
-            
-            # 保存HTML源码
-            self.current_html = response.text
-            
-            # 使用BeautifulSoup解析HTML
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # 提取文本、图片和视频信息
-            self._extract_text_content(soup)
-            self._extract_image_info(soup, http_url)
-            self._extract_video_info(soup, http_url)
-            
-            # 更新状态标签显示完成信息
-            self.root.after(0, lambda: self.status_label.config(
-                text=f"HTTP加载完成。找到 {len(self.images_list)} 张图片，{len(self.videos_list)} 个视频"
-            ))
-            
-            # 更新HTML显示
-            self.root.after(0, self._update_html_display)
-            
-        except requests.exceptions.RequestException as e:
-            # 处理HTTP请求也失败的情况
-            error_msg = str(e)
-            self.root.after(0, lambda msg=error_msg: self.status_label.config(text=f"HTTP请求也失败: {msg}"))
-        except Exception as e:
-            # 处理其他未知错误
-            error_msg = str(e)
-            self.root.after(0, lambda msg=error_msg: self.status_label.config(text=f"发生错误: {msg}"))
+        self.current_html = html
+        self.images_list = page['images']
+        self.videos_list = page['videos']
+        
+        # 上一个网页的链接检查结果作废
+        self.image_status = {}
+        self.image_check = None
+        self.page_token = token
+        
+        # 更新文本显示、图片列表框、视频列表框和HTML显示
+        self._update_text_display(page['text'])
+        self._update_image_listbox()
+        self._update_video_listbox()
+        self._update_html_display()
+        
+        # 在后台预先解码前几张图片，用户打开时可立即显示
+        prewarm_urls = [img_url for img_url, img_alt in self.images_list[:DEFAULT_PREWARM_COUNT]]
+        self.workers.submit_io(self._prewarm_previews, prewarm_urls, token)
     
-    def _extract_text_content(self, soup):
+    def _prewarm_previews(self, urls, token):
         """
-        从BeautifulSoup对象中提取文本内容
-        合并了两个版本的处理方式
+        在后台线程中依次加载预览图放入缓存，加载了新网页时停止
         
         参数:
-            soup: BeautifulSoup对象
+            urls (list): 图片URL列表
+            token (CancelToken): 加载网页时的取消令牌
         """
-        # 移除脚本、样式和noscript标签，只保留文本内容
-        for script in soup(["script", "style", "noscript"]):
-            script.decompose()
+        for img_url in urls:
+            if token.cancelled:
+                return
+            try:
+                self._get_preview(img_url)
+            except Exception:
+                pass  # 预热失败不影响使用，用户打开图片时会重新加载并显示错误
+    
+    def _get_preview(self, img_url):
+        """
+        获取预览图，优先使用内存缓存（在I/O线程池中调用，CPU线程池中的任务不能调用）
+        
+        参数:
+            img_url (str): 图片URL
         
-        # 提取并清理文本内容
-        text = soup.get_text(separator=' ', strip=True)  # 获取文本并用空格分隔
-        lines = [line.strip() for line in text.splitlines() if line.strip()]  # 移除空行
-        clean_text = '\n'.join(lines)  # 重新组合为字符串
+        返回:
+            tuple: (缩放后的PIL图片, 原始尺寸(宽, 高))
+        """
+        preview = self.preview_cache.get(img_url)
+        if preview is None:
+            # 通过共享会话获取图片数据，同一主机的多张图片复用连接
+            img_response = self.session.get(img_url, timeout=10)
+            img_response.raise_for_status()
+            preview = self.workers.run_cpu(decode_preview, img_response.content)  # 解码交给CPU线程池
+            self.preview_cache.put(img_url, preview)
+        return preview
+    
+    def _update_worker_status(self):
+        """每隔WORKER_STATUS_INTERVAL毫秒刷新后台任务统计，有任务运行或排队时显示"""
+        depth = self.workers.queue_depth()
+        busy = self.workers.io.running or self.workers.cpu.running or depth['io'] or depth['cpu']
+        self.worker_label.config(text=f"后台任务: {self.workers.describe()}" if busy else "")
+        self.root.after(WORKER_STATUS_INTERVAL, self._update_worker_status)
+    
+    def _append_text_display(self, text):
+        """
+        在文本显示区域末尾追加文本（流式解析时显示部分结果）
         
-        # 在GUI线程中更新文本显示
-        self.root.after(0, self._update_text_display, clean_text)
+        参数:
+            text (str): 要追加的文本
+        """
+        self.text_display.config(state=tk.NORMAL)
+        self.text_display.insert(tk.END, text)
+        self.text_display.config(state=tk.DISABLED)
     
     def _update_text_display(self, text):
         """
         更新文本显示区域
-        两个版本的处理方式相同
+        长文本分批插入，每批之间让出事件循环，窗口不会卡住；再次调用（如开始获取新网页）会中止未完成的插入
         
         参数:
             text (str): 要显示的文本
         """
-        self.text_display.config(state=tk.NORMAL)  # 临时启用编辑状态
-        self.text_display.delete(1.0, tk.END)  # 清空现有内容
-        self.text_display.insert(1.0, text)  # 插入新内容
-        self.text_display.config(state=tk.DISABLED)  # 重新禁用编辑
+        self.text_inserter.start(text)
+    
+    def _show_text_progress(self, inserted, total):
+        """
+        显示文字插入进度
+        
+        参数:
+            inserted (int): 已插入的字符数
+            total (int): 总字符数
+        """
+        if inserted < total:
+            # 还没插入完时显示进度条
+            if not self.text_progress.winfo_manager():
+                self.text_progress.pack(side=tk.BOTTOM, fill=tk.X, before=self.text_display)
+            self.text_progress.config(maximum=total, value=inserted)
     
     def _update_html_display(self):
         """
         更新HTML源码显示区域 v5.0
-        包含内容截断功能
+        显示完整源码，不再截断：滚动时只替换可见的行，几MB的源码也不会卡住界面
         """
-        self.html_display.config(state=tk.NORMAL)  # 临时启用编辑状态
-        self.html_display.delete(1.0, tk.END)  # 清空现有内容
-        
-        # 如果HTML内容过长，进行截断处理（来自4.0版）
-        if len(self.current_html) > 50000:
-            self.html_display.insert(1.0, self.current_html[:50000] + "\n\n... (内容过长，已截断)")
-        else:
-            self.html_display.insert(1.0, self.current_html)
-        
-        self.html_display.config(state=tk.DISABLED)  # 重新禁用编辑
+        self.html_display.set_text(self.current_html)
     
     def save_html_to_file(self):
         """
@@ -522,188 +754,128 @@ class WebContentExtractor:
             self.status_label.config(text=f"打开编辑器失败: {error_msg}")
             messagebox.showerror("错误", f"打开编辑器失败: {error_msg}")
     
-    def _extract_image_info(self, soup, base_url):
+    def _update_image_listbox(self):
         """
-        从BeautifulSoup对象中提取图片信息 v5.0
-        支持src和data-src属性
-        
-        参数:
-            soup: BeautifulSoup对象
-            base_url (str): 基础URL，用于处理相对URL
+        更新图片列表框
+        列表框直接使用self.images_list，不逐项插入，显示文字只为可见行生成
         """
-        # 初始化图片列表
-        self.images_list = []
+        self.image_listbox.set_items(self.images_list, self._format_image_row,
+                                     search_key=lambda image: f"{image[1]} {image[0]}")
         
-        # 查找所有img标签
-        images = soup.find_all('img')
-        
-        for img in images:
-            # 获取图片URL（支持src和data-src属性）
-            img_url = img.get('src') or img.get('data-src')
-            if img_url:
-                # 处理相对URL（转换为绝对URL）
-                if not img_url.startswith(('http://', 'https://')):
-                    img_url = urljoin(base_url, img_url)
-                
-                # 获取图片描述
-                img_alt = img.get('alt', '无描述')
-                
-                # 添加到图片列表
-                self.images_list.append((img_url, img_alt))
-        
-        # 在GUI线程中更新图片列表框
-        self.root.after(0, self._update_image_listbox)
+        # 新网页的列表也按输入框中已有的筛选文字筛选
+        if self.image_filter_var.get():
+            self._filter_image_listbox()
     
-    def _update_image_listbox(self):
+    def _format_image_row(self, i, image):
+        """生成图片列表中一行的显示文字"""
+        img_url, img_alt = image
+        # 截取过长的描述文字
+        text = f"{i}. {img_alt[:30]}{'...' if len(img_alt) > 30 else ''}"
+        
+        # 检查过链接且失效的图片标出原因
+        result = self.image_status.get(img_url)
+        if result and result['error']:
+            text += f"  [失效: {'无法连接' if result['status'] is None else result['error']}]"
+        return text
+    
+    def _filter_image_listbox(self):
+        """按筛选输入框的内容筛选图片列表"""
+        count = self.image_listbox.set_filter(self.image_filter_var.get())
+        self.status_label.config(text=f"显示 {count}/{len(self.images_list)} 张图片")
+    
+    def _update_video_listbox(self):
         """
-        更新图片列表框
-        两个版本的处理方式相同
+        更新视频列表框 v5.0
+        显示视频类型图标；列表框直接使用self.videos_list，显示文字只为可见行生成
         """
-        self.image_listbox.delete(0, tk.END)  # 清空现有列表
+        self.video_listbox.set_items(self.videos_list, self._format_video_row,
+                                     search_key=lambda video: f"{video[1]} {video[2]} {video[0]}")
         
-        # 遍历图片列表，添加到列表框中
-        for i, (img_url, img_alt) in enumerate(self.images_list, 1):
-            # 截取过长的描述文字
-            display_text = f"{i}. {img_alt[:30]}{'...' if len(img_alt) > 30 else ''}"
-            self.image_listbox.insert(tk.END, display_text)
+        # 新网页的列表也按输入框中已有的筛选文字筛选
+        if self.video_filter_var.get():
+            self._filter_video_listbox()
     
-    def _extract_video_info(self, soup, base_url):
+    def _format_video_row(self, i, video):
+        """生成视频列表中一行的显示文字"""
+        video_url, title, vtype = video
+        
+        # 根据视频类型设置图标
+        type_icon = {
+            'direct': '[MP4]',
+            'youtube': '[YT]',
+            'bilibili': '[B站]',
+            'vimeo': '[VM]'
+        }.get(vtype, '[VID]')
+        
+        # 截取过长的标题
+        return f"{i}. {type_icon} {title[:30]}{'...' if len(title) > 30 else ''}"
+    
+    def _filter_video_listbox(self):
+        """按筛选输入框的内容筛选视频列表（可输入youtube、bilibili等类型名）"""
+        count = self.video_listbox.set_filter(self.video_filter_var.get())
+        self.status_label.config(text=f"显示 {count}/{len(self.videos_list)} 个视频")
+    
+    def check_image_links(self):
         """
-        从BeautifulSoup对象中提取视频信息 v5.0
-        增强版视频提取功能，支持多种视频格式和平台
-        
-        参数:
-            soup: BeautifulSoup对象
-            base_url (str): 基础URL，用于处理相对URL
+        并发检查当前网页所有图片链接是否能访问
+        请求在asyncio后台线程中以协程并发执行（每个主机同时最多DEFAULT_PER_HOST个），
+        每检查完一个就更新列表中的标记和状态栏；加载新网页时剩余的检查被取消
         """
-        # 初始化视频列表
-        self.videos_list = []
-        
-        # ========== 1. 提取video标签中的视频 ==========
-        video_tags = soup.find_all('video')
-        for video in video_tags:
-            src = video.get('src')
-            if src:
-                # 处理相对URL
-                if not src.startswith(('http://', 'https://')):
-                    src = urljoin(base_url, src)
-                
-                # 检查是否是视频URL
-                if self._is_video_url(src):
-                    title = video.get('title', video.get('alt', '无标题'))
-                    self.videos_list.append((src, title, 'direct'))
-            
-            # 提取source标签中的视频
-            source_tags = video.find_all('source')
-            for source in source_tags:
-                src = source.get('src')
-                if src:
-                    # 处理相对URL
-                    if not src.startswith(('http://', 'https://')):
-                        src = urljoin(base_url, src)
-                    
-                    # 检查是否是视频URL
-                    if self._is_video_url(src):
-                        title = source.get('title', '无标题')
-                        self.videos_list.append((src, title, 'direct'))
-        
-        # ========== 2. 提取iframe标签中的视频嵌入 ==========
-        iframe_tags = soup.find_all('iframe')
-        for iframe in iframe_tags:
-            src = iframe.get('src')
-            if src:
-                # 处理相对URL
-                if not src.startswith(('http://', 'https://')):
-                    src = urljoin(base_url, src)
-                
-                title = iframe.get('title', '视频嵌入')
-                
-                # 识别不同的视频平台
-                if 'youtube.com' in src or 'youtu.be' in src:
-                    self.videos_list.append((src, title, 'youtube'))
-                elif 'bilibili.com' in src:
-                    self.videos_list.append((src, title, 'bilibili'))
-                elif 'vimeo.com' in src:
-                    self.videos_list.append((src, title, 'vimeo'))
-        
-        # ========== 3. 提取a标签中的视频链接 ==========
-        a_tags = soup.find_all('a', href=True)
-        for a in a_tags:
-            href = a['href']
-            
-            # 检查是否是视频URL
-            if self._is_video_url(href):
-                # 处理相对URL
-                if not href.startswith(('http://', 'https://')):
-                    href = urljoin(base_url, href)
-                
-                # 获取链接文本作为标题
-                title = a.get_text(strip=True)
-                if not title:
-                    title = '视频链接'
-                
-                self.videos_list.append((href, title, 'direct'))
-        
-        # ========== 4. 提取script标签中的视频链接 ==========
-        scripts = soup.find_all('script')
-        for script in scripts:
-            if script.string:
-                script_text = script.string
-                # 使用正则表达式查找视频URL
-                video_urls = re.findall(
-                    r'https?://[^\s<>"]+\.(mp4|webm|avi|mov|flv|wmv|m4v|mkv)',
-                    script_text,
-                    re.IGNORECASE
-                )
-                
-                for url in video_urls:
-                    if self._is_video_url(url):
-                        self.videos_list.append((url, '脚本中的视频', 'direct'))
+        # 同一时间只进行一次检查
+        if self.image_check and not self.image_check['future'].done():
+            self.status_label.config(text="正在检查图片链接...")
+            return
         
-        # 在GUI线程中更新视频列表框
-        self.root.after(0, self._update_video_listbox)
+        # 去掉重复的URL
+        urls = list(dict.fromkeys(img_url for img_url, img_alt in self.images_list))
+        if not urls:
+            self.status_label.config(text="没有可检查的图片")
+            return
+        
+        # 检查属于当前显示的网页这一代，加载新网页后迟到的结果被丢弃；
+        # 新网页正在加载时当前这一代已是新请求的，不能使用
+        token = self.page_token
+        if token is None or token.cancelled:
+            self.status_label.config(text="网页正在加载，请稍后再检查图片链接")
+            return
+        self.image_status = {}
+        check = self.image_check = {'total': len(urls), 'done': 0, 'broken': 0}
+        self.status_label.config(text=f"正在检查 {len(urls)} 个图片链接...")
+        
+        coroutine = self.async_fetcher.check_urls(
+            urls, on_result=lambda result: self._post(token, self._on_image_checked, check, result), token=token
+        )
+        check['future'] = self.async_fetcher.submit(coroutine)
+        check['future'].add_done_callback(lambda future: self._post(token, self._on_image_check_done, check))
     
-    def _is_video_url(self, url):
+    def _on_image_checked(self, check, result):
         """
-        检查URL是否是视频URL v5.0
-        支持多种视频格式
+        记录一个图片链接的检查结果并刷新列表（在GUI线程中调用）
         
         参数:
-            url (str): 要检查的URL
-        
-        返回:
-            bool: 如果是视频URL则返回True，否则返回False
+            check (dict): 发起检查时的进度记录，已被新的检查或新网页取代时丢弃结果
+            result (dict): AsyncFetcher.head的结果
         """
-        # 视频文件扩展名列表
-        video_extensions = ['.mp4', '.webm', '.avi', '.mov', '.flv', '.wmv', '.m4v', '.mkv']
-        
-        # 检查URL是否包含视频扩展名
-        for ext in video_extensions:
-            if ext in url.lower():
-                return True
-        
-        return False
+        if check is not self.image_check:
+            return
+        self.image_status[result['url']] = result
+        check['done'] += 1
+        if result['error']:
+            check['broken'] += 1
+        
+        # 只重新生成可见行的文字
+        self.image_listbox.refresh()
+        self.status_label.config(
+            text=f"正在检查图片链接: {check['done']}/{check['total']}，失效 {check['broken']}"
+        )
     
-    def _update_video_listbox(self):
-        """
-        更新视频列表框 v5.0
-        显示视频类型图标
-        """
-        self.video_listbox.delete(0, tk.END)  # 清空现有列表
-        
-        # 遍历视频列表，添加到列表框中
-        for i, (video_url, title, vtype) in enumerate(self.videos_list, 1):
-            # 根据视频类型设置图标
-            type_icon = {
-                'direct': '[MP4]',
-                'youtube': '[YT]',
-                'bilibili': '[B站]',
-                'vimeo': '[VM]'
-            }.get(vtype, '[VID]')
-            
-            # 截取过长的标题
-            display_text = f"{i}. {type_icon} {title[:30]}{'...' if len(title) > 30 else ''}"
-            self.video_listbox.insert(tk.END, display_text)
+    def _on_image_check_done(self, check):
+        """全部图片链接检查完成（在GUI线程中调用），check同_on_image_checked"""
+        if check is not self.image_check:
+            return
+        self.status_label.config(
+            text=f"检查完成: {check['total']} 个图片链接中 {check['broken']} 个失效"
+        )
     
     def show_image(self):
         """
@@ -726,8 +898,8 @@ class WebContentExtractor:
         img_url, img_alt = self.images_list[idx]
         self.status_label.config(text=f"正在加载图片: {img_alt[:30]}...")
         
-        # 使用多线程加载图片，避免GUI界面卡顿
-        threading.Thread(target=self._load_and_show_image, args=(img_url, img_alt), daemon=True).start()
+        # 在I/O线程池中加载图片，避免GUI界面卡顿
+        self.workers.submit_io(self._load_and_show_image, img_url, img_alt)
     
     def _load_and_show_image(self, img_url, img_alt):
         """
@@ -739,40 +911,35 @@ class WebContentExtractor:
             img_alt (str): 图片描述
         """
         try:
-            # 发送请求获取图片数据
-            img_response = requests.get(img_url, headers=self.headers, timeout=10)
+            # 获取预览图（缓存中没有时下载并解码）
+            preview = self._get_preview(img_url)
             
-            if img_response.status_code == 200:  # 如果请求成功
-                # 在内存中打开图片
-                img_data = BytesIO(img_response.content)
-                img = Image.open(img_data)
-                
-                # 在GUI线程中创建图片窗口
-                self.root.after(0, self._create_image_window, img, img_url, img_alt)
-                
-                # 更新状态标签
-                self.root.after(0, lambda: self.status_label.config(
-                    text=f"图片加载完成: {img_alt[:30]}"
-                ))
-            else:
-                # 处理HTTP错误
-                status_code = img_response.status_code
-                self.root.after(0, lambda code=status_code: self.status_label.config(
-                    text=f"加载图片失败: HTTP {code}"
-                ))
-                
+            # 在GUI线程中创建图片窗口
+            self.bridge.post(self._create_image_window, preview, img_url, img_alt)
+            
+            # 更新状态标签
+            self.bridge.post(lambda: self.status_label.config(
+                text=f"图片加载完成: {img_alt[:30]}"
+            ))
+            
+        except requests.exceptions.HTTPError as e:
+            # 处理HTTP错误
+            status_code = e.response.status_code
+            self.bridge.post(lambda code=status_code: self.status_label.config(
+                text=f"加载图片失败: HTTP {code}"
+            ))
         except Exception as e:
             # 处理图片加载错误
             error_msg = str(e)
-            self.root.after(0, lambda msg=error_msg: self.status_label.config(text=f"加载图片失败: {msg}"))
+            self.bridge.post(lambda msg=error_msg: self.status_label.config(text=f"加载图片失败: {msg}"))
     
-    def _create_image_window(self, img, img_url, img_alt):
+    def _create_image_window(self, preview, img_url, img_alt):
         """
         创建图片预览窗口 v5.0
-        包含图片尺寸调整和信息显示
+        包含图片信息显示，图片已在后台线程缩放好
         
         参数:
-            img: PIL.Image对象
+            preview (tuple): (缩放后的PIL图片, 原始尺寸(宽, 高))
             img_url (str): 图片URL
             img_alt (str): 图片描述
         """
@@ -780,16 +947,8 @@ class WebContentExtractor:
         img_window = tk.Toplevel(self.root)
         img_window.title(f"图片预览 - {img_alt[:50]}")
         
-        # 获取原始图片尺寸
-        original_width, original_height = img.size
-        max_size = 800  # 最大显示尺寸
-        
-        # 如果图片尺寸过大，按比例缩小
-        if original_width > max_size or original_height > max_size:
-            ratio = min(max_size / original_width, max_size / original_height)
-            new_width = int(original_width * ratio)
-            new_height = int(original_height * ratio)
-            img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        # 预览图和原始图片尺寸
+        img, (original_width, original_height) = preview
         
         # 转换为Tkinter可用的PhotoImage格式
         photo = ImageTk.PhotoImage(img)
@@ -837,76 +996,108 @@ class WebContentExtractor:
             ]
         )
         
-        # 如果用户选择了保存路径
+        # 如果用户选择了保存路径，加入下载队列（单个下载优先于批量下载）
         if file_path:
             self.status_label.config(text=f"正在下载视频: {title[:30]}...")
-            
-            # 使用多线程下载视频，避免GUI界面卡顿
-            threading.Thread(
-                target=self._download_video_file,
-                args=(video_url, file_path, title),
-                daemon=True
-            ).start()
+            headers = {'Referer': self.url_entry.get()}  # 添加来源页，防止某些网站拦截
+            task = self.download_manager.add(video_url, file_path, title, headers, priority=1)
+            self.notify_tasks.add(task)
     
-    def _download_video_file(self, video_url, file_path, title):
+    def download_selected_videos(self):
         """
-        下载视频文件的内部函数 v5.0
-        整合了4.0版的下载进度显示和错误处理
+        把选中的全部视频加入下载队列
+        选择一个保存目录，文件名由视频标题生成，重名时自动加序号
+        """
+        selection = self.video_listbox.curselection()
+        if not selection:
+            messagebox.showwarning("警告", "请先选择视频")
+            return
+        
+        # 弹出目录选择对话框
+        directory = filedialog.askdirectory(title="选择保存目录")
+        if not directory:
+            return
+        
+        headers = {'Referer': self.url_entry.get()}
+        taken = {task.path for task in self.download_manager.snapshot()}  # 已在队列中的文件路径
+        queued = 0  # 实际加入队列的任务数（跳过的索引不计）
+        for idx in selection:
+            if idx >= len(self.videos_list):
+                continue
+            video_url, title, vtype = self.videos_list[idx]
+            file_path = unique_path(os.path.join(directory, video_file_name(title, video_url)), taken)
+            taken.add(file_path)
+            self.download_manager.add(video_url, file_path, title, headers)
+            queued += 1
+        self.status_label.config(text=f"已添加 {queued} 个下载任务")
+    
+    def _on_download_change(self, task):
+        """
+        下载任务状态或进度变化时调用（在下载线程中调用）
         
         参数:
-            video_url (str): 视频URL
-            file_path (str): 保存路径
-            title (str): 视频标题
+            task (DownloadTask): 发生变化的任务
         """
-        try:
-            # 设置请求头（使用4.0版的headers）
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                'Referer': self.url_entry.get()  # 添加来源页，防止某些网站拦截
-            }
-            
-            # 发送流式请求下载视频
-            response = requests.get(video_url, headers=headers, stream=True, timeout=30)
-            response.raise_for_status()
-            
-            # 获取文件总大小
-            total_size = int(response.headers.get('content-length', 0))
-            downloaded = 0
-            
-            # 写入文件
-            with open(file_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        
-                        # 如果有文件总大小信息，计算并显示下载进度
-                        if total_size > 0:
-                            progress = (downloaded / total_size) * 100
-                            downloaded_kb = downloaded // 1024
-                            total_kb = total_size // 1024
-                            
-                            # 在GUI线程中更新状态标签
-                            self.root.after(0, lambda p=progress, d=downloaded_kb, t=total_kb: self.status_label.config(
-                                text=f"下载进度: {p:.1f}% ({d}KB/{t}KB)"
-                            ))
-            
-            # 下载完成
-            self.root.after(0, lambda: self.status_label.config(
-                text=f"视频下载完成: {title[:30]}"
-            ))
-            self.root.after(0, lambda: messagebox.showinfo("成功", f"视频已保存到: {file_path}"))
-            
-        except requests.exceptions.RequestException as e:
-            # 处理网络请求错误
-            error_msg = str(e)
-            self.root.after(0, lambda msg=error_msg: self.status_label.config(text=f"视频下载失败: {msg}"))
-            self.root.after(0, lambda msg=error_msg: messagebox.showerror("错误", f"下载失败: {msg}"))
-        except Exception as e:
-            # 处理其他错误
-            error_msg = str(e)
-            self.root.after(0, lambda msg=error_msg: self.status_label.config(text=f"视频下载失败: {msg}"))
-            self.root.after(0, lambda msg=error_msg: messagebox.showerror("错误", f"下载失败: {msg}"))
+        if task.state == RUNNING and task in self.notify_tasks and task.progress:
+            # 单个下载在状态标签中显示进度（每秒最多10次）
+            status = f"下载进度: {task.progress.describe()}"
+            self.bridge.post(lambda msg=status: self.status_label.config(text=msg))
+        elif task.state == COMPLETED:
+            self.bridge.post(lambda: self.status_label.config(text=f"视频下载完成: {task.title[:30]}"))
+            if task in self.notify_tasks:
+                self.notify_tasks.discard(task)
+                self.bridge.post(lambda: messagebox.showinfo("成功", f"视频已保存到: {task.path}"))
+        elif task.state == FAILED:
+            self.bridge.post(lambda: self.status_label.config(text=f"视频下载失败: {task.error}"))
+            if task in self.notify_tasks:
+                self.notify_tasks.discard(task)
+                self.bridge.post(lambda: messagebox.showerror("错误", f"下载失败: {task.error}"))
+        
+        # 多个任务的进度变化合并为每0.1秒最多刷新一次列表
+        if not self.download_refresh_pending:
+            self.download_refresh_pending = True
+            self.bridge.post(self.root.after, 100, self._update_download_listbox)
+    
+    def _update_download_listbox(self):
+        """重新显示下载任务列表，保留选中项和滚动位置"""
+        self.download_refresh_pending = False
+        selection = self.download_listbox.curselection()
+        top = self.download_listbox.yview()[0]
+        
+        self.download_tasks_shown = self.download_manager.snapshot()
+        self.download_listbox.delete(0, tk.END)
+        for i, task in enumerate(self.download_tasks_shown, 1):
+            self.download_listbox.insert(tk.END, f"{i}. {task.describe()}")
+        
+        for idx in selection:
+            if idx < len(self.download_tasks_shown):
+                self.download_listbox.selection_set(idx)
+        self.download_listbox.yview_moveto(top)
+    
+    def _apply_to_selected_downloads(self, action):
+        """
+        对选中的每个下载任务执行操作
+        
+        参数:
+            action: 接受一个DownloadTask的函数，如DownloadManager.pause
+        """
+        selection = self.download_listbox.curselection()
+        if not selection:
+            self.status_label.config(text="请先选择下载任务")
+            return
+        for idx in selection:
+            if idx < len(self.download_tasks_shown):
+                action(self.download_tasks_shown[idx])
+        self._update_download_listbox()
+    
+    def _raise_download_priority(self, task):
+        """把任务的优先级提到所有任务之上，等待中的任务会最先开始"""
+        self.download_manager.raise_priority(task)
+    
+    def clear_finished_downloads(self):
+        """从列表中移除已完成和已取消的任务"""
+        self.download_manager.clear_finished()
+        self._update_download_listbox()
     
     def play_video_external(self):
         """
@@ -979,9 +1170,18 @@ class WebContentExtractor:
     def run(self):
         """
         运行应用程序
-        启动Tkinter主循环
+        启动Tkinter主循环，退出时取消正在加载的网页，停止asyncio事件循环，关闭后台线程池，暂停未完成的下载（下次可续传）并关闭HTTP会话（包括HTTPS请求专用会话）释放连接
         """
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            self.fetch_generations.cancel()
+            self.bridge.stop()
+            self.async_fetcher.close()
+            self.workers.shutdown()
+            self.download_manager.shutdown()
+            self.scheme_resolver.close()
+            self.session.close()
 
 
 # ============================ 主函数 ============================
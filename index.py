@@ -1,29 +1,52 @@
 import requests
-from bs4 import BeautifulSoup
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from PIL import Image, ImageTk
-from io import BytesIO
-from urllib.parse import urljoin
-import threading
+from PIL import ImageTk
 import os
-import re
 import webbrowser
 import tempfile
 import subprocess
 import sys
+from http_session import create_session, DecodedBody, DEFAULT_MAX_BYTES
+from http_cache import HTTPCache
+from image_preview import PreviewCache, decode_preview, DEFAULT_PREWARM_COUNT
+from progress import ProgressReporter
+from virtual_text import VirtualTextView, ChunkedInserter
+from virtual_list import VirtualListbox
+from cancellation import Generations
+from worker_pool import WorkerPools
+from async_fetch import AsyncFetcher, TkBridge
+from download_manager import DownloadManager, video_file_name, unique_path, RUNNING, COMPLETED, FAILED
+from extractor import available_parsers, parse_html, extract_page, StreamingExtractor, STREAM_PARSER
 
 class WebContentExtractor:
     def __init__(self):
         self.images_list = []
         self.videos_list = []
         self.current_html = ""
+        self.cache = HTTPCache()
+        self.session = create_session(cache=self.cache)
+        self.preview_cache = PreviewCache()
+        self.fetch_generations = Generations()
+        self.workers = WorkerPools()
+        self.async_fetcher = AsyncFetcher(self.session.headers, self.session)
+        self.image_status = {}
+        self.image_check = None
+        self.page_token = None
+        self.download_manager = DownloadManager(self.session, on_change=self._on_download_change)
+        self.download_tasks_shown = []
+        self.notify_tasks = set()
+        self.download_refresh_pending = False
+        self.parser = 'auto'
+        self.max_page_bytes = DEFAULT_MAX_BYTES
         self.root = None
         self.setup_ui()
     
     def setup_ui(self):
         self.root = tk.Tk()
         self.root.title("网页内容提取器 v4.0")
+        self.bridge = TkBridge(self.root)
+        self.bridge.start()
         self.root.geometry("800x600")
         
         frame = ttk.Frame(self.root, padding="10")
@@ -41,6 +64,11 @@ class WebContentExtractor:
         fetch_button = ttk.Button(url_frame, text="获取网页内容", command=self.fetch_webpage)
         fetch_button.pack(side=tk.LEFT, padx=5)
         
+        self.parser_var = tk.StringVar(value=self.parser)
+        parser_box = ttk.Combobox(url_frame, textvariable=self.parser_var, values=['auto'] + available_parsers() + [STREAM_PARSER],
+                                  width=12, state='readonly')
+        parser_box.pack(side=tk.LEFT, padx=5)
+        
         html_buttons_frame = ttk.Frame(frame)
         html_buttons_frame.pack(fill=tk.X, pady=5)
         
@@ -65,8 +93,15 @@ class WebContentExtractor:
         video_frame = self.create_video_tab(notebook)
         notebook.add(video_frame, text="视频列表")
         
+        download_frame = self.create_download_tab(notebook)
+        notebook.add(download_frame, text="下载任务")
+        
         self.status_label = ttk.Label(frame, text="就绪")
         self.status_label.pack(pady=5)
+        
+        self.worker_label = ttk.Label(frame, text="")
+        self.worker_label.pack()
+        self._update_worker_status()
     
     def create_text_tab(self, notebook):
         text_frame = ttk.Frame(notebook)
@@ -79,51 +114,47 @@ class WebContentExtractor:
         self.text_display.config(state=tk.DISABLED)
         text_scroll.config(command=self.text_display.yview)
         
+        self.text_progress = ttk.Progressbar(text_frame, mode='determinate')
+        self.text_inserter = ChunkedInserter(self.text_display, self._show_text_progress, self.text_progress.pack_forget)
+        
         return text_frame
     
     def create_html_tab(self, notebook):
         html_frame = ttk.Frame(notebook)
         
-        html_scroll = ttk.Scrollbar(html_frame)
-        html_scroll.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        self.html_display = tk.Text(html_frame, height=20, wrap=tk.NONE, yscrollcommand=html_scroll.set)
-        self.html_display.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        self.html_display.config(state=tk.DISABLED)
-        html_scroll.config(command=self.html_display.yview)
+        self.html_display = VirtualTextView(html_frame, height=20)
+        self.html_display.pack(fill=tk.BOTH, expand=True)
         
         return html_frame
     
     def create_image_tab(self, notebook):
         image_frame = ttk.Frame(notebook)
         
-        image_list_frame = ttk.Frame(image_frame)
-        image_list_frame.pack(fill=tk.BOTH, expand=True, pady=5)
+        self.image_filter_var = tk.StringVar()
+        self.create_filter_bar(image_frame, self.image_filter_var, self._filter_image_listbox)
+        
+        self.image_listbox = VirtualListbox(image_frame, height=15)
+        self.image_listbox.pack(fill=tk.BOTH, expand=True, pady=5)
         
-        image_scroll = ttk.Scrollbar(image_list_frame)
-        image_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        button_frame = ttk.Frame(image_frame)
+        button_frame.pack(pady=5)
         
-        self.image_listbox = tk.Listbox(image_list_frame, height=15, yscrollcommand=image_scroll.set)
-        self.image_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        image_scroll.config(command=self.image_listbox.yview)
+        show_button = ttk.Button(button_frame, text="查看选中图片", command=self.show_image)
+        show_button.pack(side=tk.LEFT, padx=5)
         
-        show_button = ttk.Button(image_frame, text="查看选中图片", command=self.show_image)
-        show_button.pack(pady=5)
+        check_button = ttk.Button(button_frame, text="检查图片链接", command=self.check_image_links)
+        check_button.pack(side=tk.LEFT, padx=5)
         
         return image_frame
     
     def create_video_tab(self, notebook):
         video_frame = ttk.Frame(notebook)
         
-        video_list_frame = ttk.Frame(video_frame)
-        video_list_frame.pack(fill=tk.BOTH, expand=True, pady=5)
-        
-        video_scroll = ttk.Scrollbar(video_list_frame)
-        video_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.video_filter_var = tk.StringVar()
+        self.create_filter_bar(video_frame, self.video_filter_var, self._filter_video_listbox)
         
-        self.video_listbox = tk.Listbox(video_list_frame, height=15, yscrollcommand=video_scroll.set)
-        self.video_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        video_scroll.config(command=self.video_listbox.yview)
+        self.video_listbox = VirtualListbox(video_frame, height=15, selectmode=tk.EXTENDED)
+        self.video_listbox.pack(fill=tk.BOTH, expand=True, pady=5)
         
         button_frame = ttk.Frame(video_frame)
         button_frame.pack(pady=5)
@@ -137,72 +168,177 @@ class WebContentExtractor:
         download_button = ttk.Button(button_frame, text="下载选中视频", command=self.download_video)
         download_button.pack(side=tk.LEFT, padx=5)
         
+        download_all_button = ttk.Button(button_frame, text="下载全部选中", command=self.download_selected_videos)
+        download_all_button.pack(side=tk.LEFT, padx=5)
+        
         return video_frame
     
+    def create_filter_bar(self, parent, variable, command):
+        filter_frame = ttk.Frame(parent)
+        filter_frame.pack(fill=tk.X, pady=(5, 0))
+        ttk.Label(filter_frame, text="筛选:").pack(side=tk.LEFT)
+        ttk.Entry(filter_frame, textvariable=variable, width=40).pack(side=tk.LEFT, padx=5)
+        variable.trace_add('write', lambda *args: command())
+    
+    def create_download_tab(self, notebook):
+        download_frame = ttk.Frame(notebook)
+        
+        download_list_frame = ttk.Frame(download_frame)
+        download_list_frame.pack(fill=tk.BOTH, expand=True, pady=5)
+        
+        download_scroll = ttk.Scrollbar(download_list_frame)
+        download_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        self.download_listbox = tk.Listbox(download_list_frame, height=15, selectmode=tk.EXTENDED, yscrollcommand=download_scroll.set)
+        self.download_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        download_scroll.config(command=self.download_listbox.yview)
+        
+        button_frame = ttk.Frame(download_frame)
+        button_frame.pack(pady=5)
+        
+        for text, command in (("暂停", self.download_manager.pause), ("继续", self.download_manager.resume),
+                              ("取消", self.download_manager.cancel), ("优先下载", self._raise_download_priority)):
+            button = ttk.Button(button_frame, text=text, command=lambda c=command: self._apply_to_selected_downloads(c))
+            button.pack(side=tk.LEFT, padx=5)
+        
+        clear_button = ttk.Button(button_frame, text="清除已完成", command=self.clear_finished_downloads)
+        clear_button.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(button_frame, text="同时下载数:").pack(side=tk.LEFT, padx=(15, 0))
+        self.max_downloads_var = tk.IntVar(value=self.download_manager.max_concurrent)
+        max_downloads_box = ttk.Spinbox(button_frame, from_=1, to=10, width=4, textvariable=self.max_downloads_var,
+                                        command=lambda: self.download_manager.set_max_concurrent(self.max_downloads_var.get()))
+        max_downloads_box.pack(side=tk.LEFT, padx=5)
+        
+        return download_frame
+    
     def fetch_webpage(self):
         url = self.url_entry.get()
         if not url:
             self.status_label.config(text="错误: 请输入URL")
             return
         
+        self.parser = self.parser_var.get()
+        token = self.fetch_generations.start()
+        self._update_text_display("")
         self.status_label.config(text="正在加载网页...")
-        threading.Thread(target=self._load_webpage, args=(url,)).start()
+        self.workers.submit_io(self._load_webpage, url, token)
+    
+    def _post(self, token, func, *args):
+        self.bridge.post(self._run_if_current, token, func, args)
     
-    def _load_webpage(self, url):
+    def _run_if_current(self, token, func, args):
+        if self.fetch_generations.is_current(token):
+            func(*args)
+    
+    def _load_webpage(self, url, token):
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            response.encoding = response.apparent_encoding
-            
-            self.current_html = response.text
-            soup = BeautifulSoup(response.content, 'html.parser')
+            with token.attach(self.session.get(url, timeout=10, stream=True)) as response:
+                response.raise_for_status()
+                html, page = self._download_and_extract(response, url, token)
             
-            self._extract_text_content(soup)
-            self._extract_image_info(soup, url)
-            self._extract_video_info(soup, url)
+            self._post(token, self._show_page_content, html, page, token)
             
-            self.root.after(0, lambda: self.status_label.config(
-                text=f"加载完成。找到 {len(self.images_list)} 张图片，{len(self.videos_list)} 个视频"
-            ))
-            
-            self.root.after(0, self._update_html_display)
-            
-        except requests.exceptions.RequestException as e:
-            error_msg = str(e)
-            self.root.after(0, lambda msg=error_msg: self.status_label.config(text=f"网络请求错误: {msg}"))
         except Exception as e:
+            if token.cancelled:
+                return
             error_msg = str(e)
-            self.root.after(0, lambda msg=error_msg: self.status_label.config(text=f"发生错误: {msg}"))
+            if isinstance(e, requests.exceptions.RequestException):
+                error_msg = f"网络请求错误: {error_msg}"
+            else:
+                error_msg = f"发生错误: {error_msg}"
+            self._post(token, lambda: self.status_label.config(text=error_msg))
     
-    def _extract_text_content(self, soup):
-        for script in soup(["script", "style", "noscript"]):
-            script.decompose()
-        
-        text = soup.get_text(separator=' ', strip=True)
-        lines = [line.strip() for line in text.splitlines() if line.strip()]
-        clean_text = '\n'.join(lines)
-        
-        self.root.after(0, self._update_text_display, clean_text)
+    def _download_and_extract(self, response, base_url, token):
+        streamer = StreamingExtractor(base_url) if self.parser == STREAM_PARSER else None
+        body = DecodedBody(response, self.max_page_bytes)
+        parts = []
+        shown_strings = 0
+        reporter = ProgressReporter(None)
+        
+        for text in body:
+            token.check()
+            parts.append(text)
+            if streamer:
+                streamer.feed(text)
+            
+            if reporter.update(body.received):
+                status = f"正在下载网页: {reporter.describe()}"
+                if streamer:
+                    status += f"，已提取 {len(streamer.images)} 张图片，{len(streamer.links)} 个链接"
+                    new_strings = streamer.strings[shown_strings:]
+                    shown_strings += len(new_strings)
+                    if new_strings:
+                        self._post(token, self._append_text_display, ' '.join(new_strings) + ' ')
+                self._post(token, lambda msg=status: self.status_label.config(text=msg))
+        
+        token.check()
+        html = ''.join(parts)
+        if streamer:
+            return html, streamer.close()
+        return html, self.workers.run_cpu(self._parse_page, html, base_url, token)
     
-    def _update_text_display(self, text):
+    def _parse_page(self, html, base_url, token):
+        soup = parse_html(html, self.parser)
+        token.check()
+        return extract_page(soup, base_url)
+    
+    def _show_page_content(self, html, page, token):
+        self.current_html = html
+        self.images_list = page['images']
+        self.videos_list = page['videos']
+        self.image_status = {}
+        self.image_check = None
+        self.page_token = token
+        self._update_text_display(page['text'])
+        self._update_image_listbox()
+        self._update_video_listbox()
+        self._update_html_display()
+        self.status_label.config(text=f"加载完成。找到 {len(self.images_list)} 张图片，{len(self.videos_list)} 个视频")
+        
+        prewarm_urls = [img_url for img_url, img_alt in self.images_list[:DEFAULT_PREWARM_COUNT]]
+        self.workers.submit_io(self._prewarm_previews, prewarm_urls, token)
+    
+    def _prewarm_previews(self, urls, token):
+        for img_url in urls:
+            if token.cancelled:
+                return
+            try:
+                self._get_preview(img_url)
+            except Exception:
+                pass
+    
+    def _get_preview(self, img_url):
+        preview = self.preview_cache.get(img_url)
+        if preview is None:
+            img_response = self.session.get(img_url, timeout=10)
+            img_response.raise_for_status()
+            preview = self.workers.run_cpu(decode_preview, img_response.content)
+            self.preview_cache.put(img_url, preview)
+        return preview
+    
+    def _update_worker_status(self):
+        depth = self.workers.queue_depth()
+        busy = self.workers.io.running or self.workers.cpu.running or depth['io'] or depth['cpu']
+        self.worker_label.config(text=f"后台任务: {self.workers.describe()}" if busy else "")
+        self.root.after(500, self._update_worker_status)
+    
+    def _append_text_display(self, text):
         self.text_display.config(state=tk.NORMAL)
-        self.text_display.delete(1.0, tk.END)
-        self.text_display.insert(1.0, text)
+        self.text_display.insert(tk.END, text)
         self.text_display.config(state=tk.DISABLED)
     
+    def _update_text_display(self, text):
+        self.text_inserter.start(text)
+    
+    def _show_text_progress(self, inserted, total):
+        if inserted < total:
+            if not self.text_progress.winfo_manager():
+                self.text_progress.pack(side=tk.BOTTOM, fill=tk.X, before=self.text_display)
+            self.text_progress.config(maximum=total, value=inserted)
+    
     def _update_html_display(self):
-        self.html_display.config(state=tk.NORMAL)
-        self.html_display.delete(1.0, tk.END)
-        
-        if len(self.current_html) > 50000:
-            self.html_display.insert(1.0, self.current_html[:50000] + "\n\n... (内容过长，已截断)")
-        else:
-            self.html_display.insert(1.0, self.current_html)
-        
-        self.html_display.config(state=tk.DISABLED)
+        self.html_display.set_text(self.current_html)
     
     def save_html_to_file(self):
         if not self.current_html:
@@ -236,103 +372,84 @@ class WebContentExtractor:
             self.status_label.config(text=f"打开编辑器失败: {error_msg}")
             messagebox.showerror("错误", f"打开编辑器失败: {error_msg}")
     
-    def _extract_image_info(self, soup, base_url):
-        self.images_list = []
-        images = soup.find_all('img')
-        
-        for img in images:
-            img_url = img.get('src') or img.get('data-src')
-            if img_url:
-                if not img_url.startswith(('http://', 'https://')):
-                    img_url = urljoin(base_url, img_url)
-                img_alt = img.get('alt', '无描述')
-                self.images_list.append((img_url, img_alt))
-        
-        self.root.after(0, self._update_image_listbox)
-    
     def _update_image_listbox(self):
-        self.image_listbox.delete(0, tk.END)
-        for i, (img_url, img_alt) in enumerate(self.images_list, 1):
-            display_text = f"{i}. {img_alt[:30]}{'...' if len(img_alt) > 30 else ''}"
-            self.image_listbox.insert(tk.END, display_text)
+        self.image_listbox.set_items(self.images_list, self._format_image_row,
+                                     search_key=lambda image: f"{image[1]} {image[0]}")
+        if self.image_filter_var.get():
+            self._filter_image_listbox()
     
-    def _extract_video_info(self, soup, base_url):
-        self.videos_list = []
-        
-        video_tags = soup.find_all('video')
-        for video in video_tags:
-            src = video.get('src')
-            if src:
-                if not src.startswith(('http://', 'https://')):
-                    src = urljoin(base_url, src)
-                if self._is_video_url(src):
-                    title = video.get('title', video.get('alt', '无标题'))
-                    self.videos_list.append((src, title, 'direct'))
-            
-            source_tags = video.find_all('source')
-            for source in source_tags:
-                src = source.get('src')
-                if src:
-                    if not src.startswith(('http://', 'https://')):
-                        src = urljoin(base_url, src)
-                    if self._is_video_url(src):
-                        title = source.get('title', '无标题')
-                        self.videos_list.append((src, title, 'direct'))
-        
-        iframe_tags = soup.find_all('iframe')
-        for iframe in iframe_tags:
-            src = iframe.get('src')
-            if src:
-                if not src.startswith(('http://', 'https://')):
-                    src = urljoin(base_url, src)
-                title = iframe.get('title', '视频嵌入')
-                if 'youtube.com' in src or 'youtu.be' in src:
-                    self.videos_list.append((src, title, 'youtube'))
-                elif 'bilibili.com' in src:
-                    self.videos_list.append((src, title, 'bilibili'))
-                elif 'vimeo.com' in src:
-                    self.videos_list.append((src, title, 'vimeo'))
-        
-        a_tags = soup.find_all('a', href=True)
-        for a in a_tags:
-            href = a['href']
-            if self._is_video_url(href):
-                if not href.startswith(('http://', 'https://')):
-                    href = urljoin(base_url, href)
-                title = a.get_text(strip=True)
-                if not title:
-                    title = '视频链接'
-                self.videos_list.append((href, title, 'direct'))
-        
-        scripts = soup.find_all('script')
-        for script in scripts:
-            if script.string:
-                script_text = script.string
-                video_urls = re.findall(r'https?://[^\s<>"]+\.(mp4|webm|avi|mov|flv|wmv|m4v|mkv)', script_text, re.IGNORECASE)
-                for url in video_urls:
-                    if self._is_video_url(url):
-                        self.videos_list.append((url, '脚本中的视频', 'direct'))
-        
-        self.root.after(0, self._update_video_listbox)
-    
-    def _is_video_url(self, url):
-        video_extensions = ['.mp4', '.webm', '.avi', '.mov', '.flv', '.wmv', '.m4v', '.mkv']
-        for ext in video_extensions:
-            if ext in url.lower():
-                return True
-        return False
+    def _format_image_row(self, i, image):
+        img_url, img_alt = image
+        text = f"{i}. {img_alt[:30]}{'...' if len(img_alt) > 30 else ''}"
+        result = self.image_status.get(img_url)
+        if result and result['error']:
+            text += f"  [失效: {'无法连接' if result['status'] is None else result['error']}]"
+        return text
+    
+    def _filter_image_listbox(self):
+        count = self.image_listbox.set_filter(self.image_filter_var.get())
+        self.status_label.config(text=f"显示 {count}/{len(self.images_list)} 张图片")
     
     def _update_video_listbox(self):
-        self.video_listbox.delete(0, tk.END)
-        for i, (video_url, title, vtype) in enumerate(self.videos_list, 1):
-            type_icon = {
-                'direct': '[MP4]',
-                'youtube': '[YT]',
-                'bilibili': '[B站]',
-                'vimeo': '[VM]'
-            }.get(vtype, '[VID]')
-            display_text = f"{i}. {type_icon} {title[:30]}{'...' if len(title) > 30 else ''}"
-            self.video_listbox.insert(tk.END, display_text)
+        self.video_listbox.set_items(self.videos_list, self._format_video_row,
+                                     search_key=lambda video: f"{video[1]} {video[2]} {video[0]}")
+        if self.video_filter_var.get():
+            self._filter_video_listbox()
+    
+    def _format_video_row(self, i, video):
+        video_url, title, vtype = video
+        type_icon = {
+            'direct': '[MP4]',
+            'youtube': '[YT]',
+            'bilibili': '[B站]',
+            'vimeo': '[VM]'
+        }.get(vtype, '[VID]')
+        return f"{i}. {type_icon} {title[:30]}{'...' if len(title) > 30 else ''}"
+    
+    def _filter_video_listbox(self):
+        count = self.video_listbox.set_filter(self.video_filter_var.get())
+        self.status_label.config(text=f"显示 {count}/{len(self.videos_list)} 个视频")
+    
+    def check_image_links(self):
+        if self.image_check and not self.image_check['future'].done():
+            self.status_label.config(text="正在检查图片链接...")
+            return
+        urls = list(dict.fromkeys(img_url for img_url, img_alt in self.images_list))
+        if not urls:
+            self.status_label.config(text="没有可检查的图片")
+            return
+        
+        token = self.page_token
+        if token is None or token.cancelled:
+            self.status_label.config(text="网页正在加载，请稍后再检查图片链接")
+            return
+        self.image_status = {}
+        check = self.image_check = {'total': len(urls), 'done': 0, 'broken': 0}
+        self.status_label.config(text=f"正在检查 {len(urls)} 个图片链接...")
+        coroutine = self.async_fetcher.check_urls(
+            urls, on_result=lambda result: self._post(token, self._on_image_checked, check, result), token=token
+        )
+        check['future'] = self.async_fetcher.submit(coroutine)
+        check['future'].add_done_callback(lambda future: self._post(token, self._on_image_check_done, check))
+    
+    def _on_image_checked(self, check, result):
+        if check is not self.image_check:
+            return
+        self.image_status[result['url']] = result
+        check['done'] += 1
+        if result['error']:
+            check['broken'] += 1
+        self.image_listbox.refresh()
+        self.status_label.config(
+            text=f"正在检查图片链接: {check['done']}/{check['total']}，失效 {check['broken']}"
+        )
+    
+    def _on_image_check_done(self, check):
+        if check is not self.image_check:
+            return
+        self.status_label.config(
+            text=f"检查完成: {check['total']} 个图片链接中 {check['broken']} 个失效"
+        )
     
     def show_image(self):
         selection = self.image_listbox.curselection()
@@ -347,39 +464,29 @@ class WebContentExtractor:
         
         img_url, img_alt = self.images_list[idx]
         self.status_label.config(text=f"正在加载图片: {img_alt[:30]}...")
-        threading.Thread(target=self._load_and_show_image, args=(img_url, img_alt)).start()
+        self.workers.submit_io(self._load_and_show_image, img_url, img_alt)
     
     def _load_and_show_image(self, img_url, img_alt):
         try:
-            img_response = requests.get(img_url, timeout=10)
-            if img_response.status_code == 200:
-                img_data = BytesIO(img_response.content)
-                img = Image.open(img_data)
-                self.root.after(0, self._create_image_window, img, img_url, img_alt)
-                self.root.after(0, lambda: self.status_label.config(
-                    text=f"图片加载完成: {img_alt[:30]}"
-                ))
-            else:
-                status_code = img_response.status_code
-                self.root.after(0, lambda code=status_code: self.status_label.config(
-                    text=f"加载图片失败: HTTP {code}"
-                ))
+            preview = self._get_preview(img_url)
+            self.bridge.post(self._create_image_window, preview, img_url, img_alt)
+            self.bridge.post(lambda: self.status_label.config(
+                text=f"图片加载完成: {img_alt[:30]}"
+            ))
+        except requests.exceptions.HTTPError as e:
+            status_code = e.response.status_code
+            self.bridge.post(lambda code=status_code: self.status_label.config(
+                text=f"加载图片失败: HTTP {code}"
+            ))
         except Exception as e:
             error_msg = str(e)
-            self.root.after(0, lambda msg=error_msg: self.status_label.config(text=f"加载图片失败: {msg}"))
+            self.bridge.post(lambda msg=error_msg: self.status_label.config(text=f"加载图片失败: {msg}"))
     
-    def _create_image_window(self, img, img_url, img_alt):
+    def _create_image_window(self, preview, img_url, img_alt):
         img_window = tk.Toplevel(self.root)
         img_window.title(f"图片预览 - {img_alt[:50]}")
         
-        original_width, original_height = img.size
-        max_size = 800
-        if original_width > max_size or original_height > max_size:
-            ratio = min(max_size / original_width, max_size / original_height)
-            new_width = int(original_width * ratio)
-            new_height = int(original_height * ratio)
-            img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-        
+        img, (original_width, original_height) = preview
         photo = ImageTk.PhotoImage(img)
         label = tk.Label(img_window, image=photo)
         label.image = photo
@@ -416,48 +523,80 @@ class WebContentExtractor:
         
         if file_path:
             self.status_label.config(text=f"正在下载视频: {title[:30]}...")
-            threading.Thread(target=self._download_video_file, args=(video_url, file_path, title)).start()
+            task = self.download_manager.add(video_url, file_path, title, {'Referer': self.url_entry.get()}, priority=1)
+            self.notify_tasks.add(task)
     
-    def _download_video_file(self, video_url, file_path, title):
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                'Referer': self.url_entry.get()
-            }
-            
-            response = requests.get(video_url, headers=headers, stream=True, timeout=30)
-            response.raise_for_status()
-            
-            total_size = int(response.headers.get('content-length', 0))
-            downloaded = 0
-            
-            with open(file_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        
-                        if total_size > 0:
-                            progress = (downloaded / total_size) * 100
-                            downloaded_kb = downloaded // 1024
-                            total_kb = total_size // 1024
-                            self.root.after(0, lambda p=progress, d=downloaded_kb, t=total_kb: self.status_label.config(
-                                text=f"下载进度: {p:.1f}% ({d}KB/{t}KB)"
-                            ))
-            
-            self.root.after(0, lambda: self.status_label.config(
-                text=f"视频下载完成: {title[:30]}"
-            ))
-            self.root.after(0, lambda: messagebox.showinfo("成功", f"视频已保存到: {file_path}"))
-            
-        except requests.exceptions.RequestException as e:
-            error_msg = str(e)
-            self.root.after(0, lambda msg=error_msg: self.status_label.config(text=f"视频下载失败: {msg}"))
-            self.root.after(0, lambda msg=error_msg: messagebox.showerror("错误", f"下载失败: {msg}"))
-        except Exception as e:
-            error_msg = str(e)
-            self.root.after(0, lambda msg=error_msg: self.status_label.config(text=f"视频下载失败: {msg}"))
-            self.root.after(0, lambda msg=error_msg: messagebox.showerror("错误", f"下载失败: {msg}"))
+    def download_selected_videos(self):
+        selection = self.video_listbox.curselection()
+        if not selection:
+            messagebox.showwarning("警告", "请先选择视频")
+            return
+        
+        directory = filedialog.askdirectory(title="选择保存目录")
+        if not directory:
+            return
+        
+        headers = {'Referer': self.url_entry.get()}
+        taken = {task.path for task in self.download_manager.snapshot()}
+        queued = 0
+        for idx in selection:
+            if idx >= len(self.videos_list):
+                continue
+            video_url, title, vtype = self.videos_list[idx]
+            file_path = unique_path(os.path.join(directory, video_file_name(title, video_url)), taken)
+            taken.add(file_path)
+            self.download_manager.add(video_url, file_path, title, headers)
+            queued += 1
+        self.status_label.config(text=f"已添加 {queued} 个下载任务")
+    
+    def _on_download_change(self, task):
+        if task.state == RUNNING and task in self.notify_tasks and task.progress:
+            status = f"下载进度: {task.progress.describe()}"
+            self.bridge.post(lambda msg=status: self.status_label.config(text=msg))
+        elif task.state == COMPLETED:
+            self.bridge.post(lambda: self.status_label.config(text=f"视频下载完成: {task.title[:30]}"))
+            if task in self.notify_tasks:
+                self.notify_tasks.discard(task)
+                self.bridge.post(lambda: messagebox.showinfo("成功", f"视频已保存到: {task.path}"))
+        elif task.state == FAILED:
+            self.bridge.post(lambda: self.status_label.config(text=f"视频下载失败: {task.error}"))
+            if task in self.notify_tasks:
+                self.notify_tasks.discard(task)
+                self.bridge.post(lambda: messagebox.showerror("错误", f"下载失败: {task.error}"))
+        
+        if not self.download_refresh_pending:
+            self.download_refresh_pending = True
+            self.bridge.post(self.root.after, 100, self._update_download_listbox)
+    
+    def _update_download_listbox(self):
+        self.download_refresh_pending = False
+        selection = self.download_listbox.curselection()
+        top = self.download_listbox.yview()[0]
+        self.download_tasks_shown = self.download_manager.snapshot()
+        self.download_listbox.delete(0, tk.END)
+        for i, task in enumerate(self.download_tasks_shown, 1):
+            self.download_listbox.insert(tk.END, f"{i}. {task.describe()}")
+        for idx in selection:
+            if idx < len(self.download_tasks_shown):
+                self.download_listbox.selection_set(idx)
+        self.download_listbox.yview_moveto(top)
+    
+    def _apply_to_selected_downloads(self, action):
+        selection = self.download_listbox.curselection()
+        if not selection:
+            self.status_label.config(text="请先选择下载任务")
+            return
+        for idx in selection:
+            if idx < len(self.download_tasks_shown):
+                action(self.download_tasks_shown[idx])
+        self._update_download_listbox()
+    
+    def _raise_download_priority(self, task):
+        self.download_manager.raise_priority(task)
+    
+    def clear_finished_downloads(self):
+        self.download_manager.clear_finished()
+        self._update_download_listbox()
     
     def play_video_external(self):
         selection = self.video_listbox.curselection()
@@ -501,7 +640,15 @@ class WebContentExtractor:
         messagebox.showinfo("成功", "视频链接已复制到剪贴板")
     
     def run(self):
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            self.fetch_generations.cancel()
+            self.bridge.stop()
+            self.async_fetcher.close()
+            self.workers.shutdown()
+            self.download_manager.shutdown()
+            self.session.close()
 
 def main():
     app = WebContentExtractor()
@@ -0,0 +1,144 @@
+"""
+长时间操作的进度报告
+按时间合并进度更新（默认每秒最多10次），附带速度和剩余时间，避免每收到一块数据就向GUI事件队列投递一次回调
+"""
+
+import threading
+import time
+
+
+# 两次进度报告的最短间隔（秒）
+PROGRESS_INTERVAL = 0.1
+
+# 速度的指数平滑系数，越大越跟随瞬时速度
+RATE_SMOOTHING = 0.3
+
+
+def format_size(size):
+    """把字节数格式化为 B/KB/MB/GB"""
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.0f}{unit}" if unit == 'B' else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.2f}GB"
+
+
+def format_duration(seconds):
+    """把秒数格式化为 分:秒 或 时:分:秒"""
+    seconds = int(seconds)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+class ProgressReporter:
+    """
+    进度报告器（线程安全，可在多个下载线程中同时更新）
+
+    用法:
+        reporter = ProgressReporter(lambda progress: print(progress.describe()), total)
+        for chunk in ...:
+            reporter.advance(len(chunk))
+        reporter.finish()
+
+    参数:
+        callback: 报告回调 callback(reporter)，在调用update/advance的线程中执行；
+                  为None时只做节流，由调用方根据update/advance的返回值自行处理
+        total (int): 总量（字节），未知时为0
+        interval (float): 两次报告的最短间隔（秒）
+    """
+
+    def __init__(self, callback, total=0, interval=PROGRESS_INTERVAL):
+        self.callback = callback
+        self.total = total
+        self.interval = interval
+        self.done = 0
+        self.rate = 0.0  # 平滑后的速度（字节/秒）
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+        self._reported_at = self.started
+        self._reported_done = 0
+
+    def _due(self, force):
+        """判断是否应该报告，应该时更新速度（调用时需持有锁）"""
+        now = time.monotonic()
+        elapsed = now - self._reported_at
+        if not force and elapsed < self.interval:
+            return False
+
+        if elapsed > 0:
+            current = (self.done - self._reported_done) / elapsed
+            if self.rate == 0:
+                self.rate = current
+            else:
+                self.rate = RATE_SMOOTHING * current + (1 - RATE_SMOOTHING) * self.rate
+        self._reported_at = now
+        self._reported_done = self.done
+        return True
+
+    def update(self, done, total=None, force=False):
+        """
+        记录当前进度，距上次报告超过间隔时调用回调
+
+        参数:
+            done (int): 已完成的量
+            total (int): 总量有变化时传入
+            force (bool): 忽略间隔立即报告
+
+        返回:
+            bool: 本次是否调用了回调
+        """
+        with self.lock:
+            self.done = done
+            if total is not None:
+                self.total = total
+            due = self._due(force)
+        if due and self.callback:
+            self.callback(self)
+        return due
+
+    def advance(self, amount):
+        """增加已完成的量，返回本次是否调用了回调"""
+        with self.lock:
+            self.done += amount
+            due = self._due(False)
+        if due and self.callback:
+            self.callback(self)
+        return due
+
+    def finish(self):
+        """立即报告最终进度"""
+        with self.lock:
+            self._due(True)
+        if self.callback:
+            self.callback(self)
+
+    @property
+    def percent(self):
+        """完成百分比，总量未知时为None"""
+        if self.total > 0:
+            return min(100.0, self.done * 100 / self.total)
+        return None
+
+    @property
+    def eta(self):
+        """预计剩余秒数，无法估计时为None"""
+        if self.total > 0 and self.rate > 0:
+            return max(0, self.total - self.done) / self.rate
+        return None
+
+    def describe(self):
+        """
+        生成进度描述，例如 "45.0% (12.3MB/27.3MB)，5.2MB/s，剩余 0:03"
+        """
+        if self.total > 0:
+            text = f"{self.percent:.1f}% ({format_size(self.done)}/{format_size(self.total)})"
+        else:
+            text = format_size(self.done)
+        if self.rate > 0:
+            text += f"，{format_size(self.rate)}/s"
+        if self.eta is not None:
+            text += f"，剩余 {format_duration(self.eta)}"
+        return text
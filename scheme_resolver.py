@@ -0,0 +1,134 @@
+"""
+HTTPS/HTTP协议选择
+只要HTTPS能连上就使用HTTPS；HTTPS因SSL错误或连接错误失败时才改用HTTP，
+并按主机记住这次降级，一段时间内访问同一主机直接使用HTTP，过期后重新尝试HTTPS
+HTTPS请求使用单独的会话：连接超时较短且不重试连接，HTTPS不可用时很快就能改用HTTP
+"""
+
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+
+from http_session import create_session
+
+
+# 记住某主机只能用HTTP的时间（秒），过期后重新尝试HTTPS
+HTTP_FALLBACK_TTL = 600
+
+# HTTPS请求的连接超时（秒），读取超时仍使用调用者给出的timeout
+HTTPS_CONNECT_TIMEOUT = 3
+
+# 这些错误说明HTTPS本身不可用（证书、握手或连接失败），可以改用HTTP；
+# 读取超时、HTTP错误状态码等说明服务器在HTTPS上有应答，不降级
+FALLBACK_ERRORS = (requests.exceptions.SSLError, requests.exceptions.ConnectionError)
+
+
+def with_scheme(url, scheme):
+    """把URL的协议替换为scheme"""
+    parts = urlsplit(url)
+    return urlunsplit((scheme,) + tuple(parts[1:]))
+
+
+def https_timeout(timeout, connect_timeout=HTTPS_CONNECT_TIMEOUT):
+    """
+    HTTPS请求的超时：连接超时取connect_timeout（不超过调用者给出的值），读取超时保持不变
+
+    参数:
+        timeout: 调用者给出的timeout，可以是None、秒数或 (连接, 读取) 元组
+
+    返回:
+        tuple: (连接超时, 读取超时)
+    """
+    connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+    if connect is not None:
+        connect_timeout = min(connect, connect_timeout)
+    return connect_timeout, read
+
+
+class SchemeResolver:
+    """
+    HTTPS失败时改用HTTP，并按主机暂时记住降级结果（线程安全）
+
+    用法:
+        resolver = SchemeResolver(session)
+        url, response = resolver.open('https://example.com/', timeout=10, stream=True)
+        # url为响应的最终网址（跟随重定向后，协议可能已换成http）
+
+    参数:
+        session: requests会话，HTTP请求和已降级主机的请求使用它
+        ttl (float): 记住HTTP降级的时间（秒）
+        connect_timeout (float): HTTPS请求的连接超时（秒）
+    """
+
+    def __init__(self, session, ttl=HTTP_FALLBACK_TTL, connect_timeout=HTTPS_CONNECT_TIMEOUT):
+        self.session = session
+        self.ttl = ttl
+        self.connect_timeout = connect_timeout
+        # HTTPS请求专用会话：连接失败不重试（共享会话会按退避重试3次），
+        # 请求头、Cookie和HTTP缓存与共享会话相同
+        self.https_session = create_session(
+            headers=session.headers, connect_retries=0,
+            cache=getattr(session.get_adapter('https://'), 'cache', None))
+        self.https_session.cookies = session.cookies
+        self.http_hosts = {}  # 主机 -> HTTP降级的过期时间（time.monotonic()）
+        self.lock = threading.Lock()
+
+    def prefers_http(self, url):
+        """主机最近是否因HTTPS失败而改用了HTTP（记录过期后返回False并删除记录）"""
+        host = urlsplit(url).netloc
+        with self.lock:
+            expires = self.http_hosts.get(host)
+            if expires is None:
+                return False
+            if time.monotonic() >= expires:
+                del self.http_hosts[host]
+                return False
+            return True
+
+    def _remember_http(self, url):
+        with self.lock:
+            self.http_hosts[urlsplit(url).netloc] = time.monotonic() + self.ttl
+
+    def _forget(self, url):
+        with self.lock:
+            self.http_hosts.pop(urlsplit(url).netloc, None)
+
+    def open(self, url, **kwargs):
+        """
+        发出GET请求，https网址按上面的规则在HTTPS和HTTP之间选择
+
+        参数:
+            url (str): 网址，http网址按原样请求
+            **kwargs: 传给session.get的参数，如timeout、stream
+
+        返回:
+            tuple: (响应的最终网址response.url, 响应)；HTTP也失败时抛出HTTPS请求的异常
+        """
+        if urlsplit(url).scheme != 'https':
+            response = self.session.get(url, **kwargs)
+            return response.url, response
+
+        if self.prefers_http(url):
+            try:
+                response = self.session.get(with_scheme(url, 'http'), **kwargs)
+                return response.url, response
+            except requests.exceptions.RequestException:
+                self._forget(url)  # HTTP也不行了（如网站改成只支持HTTPS），重新从HTTPS开始
+
+        try:
+            https_kwargs = dict(kwargs, timeout=https_timeout(kwargs.get('timeout'), self.connect_timeout))
+            response = self.https_session.get(url, **https_kwargs)
+            return response.url, response
+        except FALLBACK_ERRORS as https_error:
+            try:
+                response = self.session.get(with_scheme(url, 'http'), **kwargs)
+            except requests.exceptions.RequestException:
+                raise https_error  # 都失败时报告HTTPS的错误，与直接请求原网址一致
+            self._remember_http(url)
+            return response.url, response
+
+    def close(self):
+        """关闭HTTPS请求专用会话"""
+        self.https_session.close()
@@ -0,0 +1,187 @@
+"""
+虚拟化列表框
+数据只保存在Python列表中，tk.Listbox里只放当前可见的几十行，显示文字只为可见行生成；
+更换数据或筛选时不需要逐项插入，几千上万张图片或视频的列表也能立即显示
+"""
+
+import tkinter as tk
+from tkinter import ttk
+import tkinter.font as tkfont
+
+
+# 可见行之外额外放入列表框的行数
+OVERSCAN_ROWS = 2
+
+# 鼠标滚轮每格滚动的行数
+WHEEL_ROWS = 3
+
+# 列表框每行除文字外的额外高度（像素）
+ROW_PADDING = 1
+
+# Tk事件中Shift和Control键的状态位
+SHIFT_MASK = 0x0001
+CONTROL_MASK = 0x0004
+
+
+class VirtualListbox(ttk.Frame):
+    """
+    只显示可见行的列表框，带垂直滚动条和筛选
+    curselection()返回的是数据列表中的原始下标，调用方可以像普通Listbox一样直接用它索引数据
+
+    用法:
+        listbox = VirtualListbox(parent, height=15)
+        listbox.set_items(images, lambda number, item: f"{number}. {item[1]}", search_key=lambda item: item[1])
+        listbox.set_filter('logo')
+        indices = listbox.curselection()
+
+    参数:
+        master: 父控件
+        **listbox_options: 传给tk.Listbox的参数，如height、selectmode
+    """
+
+    def __init__(self, master, **listbox_options):
+        super().__init__(master)
+        self.items = []
+        self.formatter = str
+        self.search_key = str
+        self.search_keys = None  # 小写的筛选关键字，第一次筛选时生成
+        self.view = []           # 筛选后显示的数据下标
+        self.top = 0             # 列表框第一行对应的view位置
+        self.selected = set()    # 选中的数据下标（包括滚动到可见范围之外的）
+        self.clear_outside = True
+
+        self.scrollbar = ttk.Scrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        listbox_options['exportselection'] = False
+        self.listbox = tk.Listbox(self, **listbox_options)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.row_height = tkfont.Font(font=self.listbox.cget('font')).metrics('linespace') + ROW_PADDING
+
+        self.listbox.bind('<Configure>', lambda event: self._render())
+        self.listbox.bind('<<ListboxSelect>>', self._on_select)
+        self.listbox.bind('<ButtonPress-1>', self._on_press, add='+')
+        self.listbox.bind('<MouseWheel>', self._on_mousewheel)
+        self.listbox.bind('<Button-4>', lambda event: self._scroll_to(self.top - WHEEL_ROWS))
+        self.listbox.bind('<Button-5>', lambda event: self._scroll_to(self.top + WHEEL_ROWS))
+        self.listbox.bind('<Up>', lambda event: self._move_selection(-1))
+        self.listbox.bind('<Down>', lambda event: self._move_selection(1))
+        self.listbox.bind('<Prior>', lambda event: self._scroll_to(self.top - self._visible_rows()))
+        self.listbox.bind('<Next>', lambda event: self._scroll_to(self.top + self._visible_rows()))
+
+    def set_items(self, items, formatter, search_key=None):
+        """
+        更换列表数据（不复制、不逐项插入），清空选择和筛选
+
+        参数:
+            items (list): 数据列表
+            formatter: 生成显示文字的函数 formatter(从1开始的序号, 数据项)，只对可见行调用
+            search_key: 生成筛选文字的函数 search_key(数据项)，默认使用显示文字
+        """
+        self.items = items
+        self.formatter = formatter
+        self.search_key = search_key or (lambda item: formatter(0, item))
+        self.search_keys = None
+        self.view = list(range(len(items)))
+        self.selected = set()
+        self.top = 0
+        self._render()
+
+    def set_filter(self, text):
+        """
+        只显示筛选文字中包含text（不区分大小写）的项，text为空时显示全部
+
+        返回:
+            int: 筛选后的项数
+        """
+        text = text.strip().lower()
+        if not text:
+            self.view = list(range(len(self.items)))
+        else:
+            if self.search_keys is None:
+                self.search_keys = [self.search_key(item).lower() for item in self.items]
+            self.view = [index for index, key in enumerate(self.search_keys) if text in key]
+        self.selected &= set(self.view)
+        self.top = 0
+        self._render()
+        return len(self.view)
+
+    def refresh(self):
+        """数据项内容变化后重新生成可见行的文字，保持滚动位置和选择"""
+        self._render()
+
+    def curselection(self):
+        """选中项在数据列表中的下标（升序）"""
+        return tuple(sorted(self.selected))
+
+    def _visible_rows(self):
+        height = self.listbox.winfo_height()
+        if height <= 1:  # 控件还没有显示
+            return int(self.listbox.cget('height'))
+        return max(1, height // self.row_height)
+
+    def _scroll_to(self, top):
+        self.top = max(0, min(top, len(self.view) - self._visible_rows()))
+        self._render()
+        return 'break'
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == 'moveto':
+            self._scroll_to(int(float(amount) * len(self.view)))
+        elif action == 'scroll':
+            step = self._visible_rows() if unit == 'pages' else 1
+            self._scroll_to(self.top + int(amount) * step)
+
+    def _on_mousewheel(self, event):
+        # Windows每格delta为120，macOS为较小的值
+        rows = -event.delta // 120 * WHEEL_ROWS if abs(event.delta) >= 120 else -event.delta
+        return self._scroll_to(self.top + rows)
+
+    def _on_press(self, event):
+        # 不按Ctrl/Shift单击时，滚动到可见范围之外的选中项也要取消
+        self.clear_outside = not (event.state & (SHIFT_MASK | CONTROL_MASK))
+
+    def _on_select(self, event=None):
+        """把列表框中可见行的选择同步到self.selected"""
+        window = self.view[self.top:self.top + self.listbox.size()]
+        rows = self.listbox.curselection()
+        if self.clear_outside or self.listbox.cget('selectmode') in (tk.SINGLE, tk.BROWSE):
+            self.selected = set()
+        else:
+            self.selected.difference_update(window)
+        self.selected.update(window[row] for row in rows if row < len(window))
+        self.clear_outside = True
+
+    def _move_selection(self, step):
+        """上下键移动选中项，必要时滚动"""
+        if not self.view:
+            return 'break'
+        rows = self.listbox.curselection()
+        position = self.top + rows[0] + step if rows else self.top
+        position = max(0, min(position, len(self.view) - 1))
+        visible = self._visible_rows()
+        if position < self.top:
+            self.top = position
+        elif position >= self.top + visible:
+            self.top = position - visible + 1
+        self.selected = {self.view[position]}
+        self._render()
+        self.listbox.activate(position - self.top)
+        self.listbox.event_generate('<<ListboxSelect>>')
+        return 'break'
+
+    def _render(self):
+        """为可见行生成显示文字放入列表框，恢复这些行的选择状态，并更新滚动条位置"""
+        visible = self._visible_rows()
+        window = self.view[self.top:self.top + visible + OVERSCAN_ROWS]
+
+        self.listbox.delete(0, tk.END)
+        if window:
+            self.listbox.insert(tk.END, *[self.formatter(index + 1, self.items[index]) for index in window])
+        for row, index in enumerate(window):
+            if index in self.selected:
+                self.listbox.selection_set(row)
+        self.listbox.yview_moveto(0)
+
+        total = max(1, len(self.view))
+        self.scrollbar.set(self.top / total, min(1.0, (self.top + visible) / total))
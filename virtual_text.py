@@ -0,0 +1,228 @@
+"""
+大文本显示
+VirtualTextView：完整文本只保存在内存中，Text控件里只放当前可见的几十行，滚动时替换为新的可见行，
+几MB的网页源码也可以完整查看而不会卡住界面
+ChunkedInserter：把长文本分批插入Text控件，每批只占用一小段时间，批与批之间让出事件循环
+"""
+
+import time
+import tkinter as tk
+from tkinter import ttk
+import tkinter.font as tkfont
+
+
+# 超过这个长度的行（如压缩过的HTML）拆成多行显示，Text控件处理超长行很慢
+MAX_ROW_CHARS = 2000
+
+# 可见行之外额外放入控件的行数
+OVERSCAN_ROWS = 2
+
+# 鼠标滚轮每格滚动的行数
+WHEEL_ROWS = 3
+
+# 分批插入时每次插入的字符数
+INSERT_CHUNK_CHARS = 16 * 1024
+
+# 分批插入时每次事件回调最多占用的时间（秒），保证界面能及时响应输入
+INSERT_SLICE_SECONDS = 0.015
+
+
+def row_offsets(text, max_chars=MAX_ROW_CHARS):
+    """
+    计算每个显示行在文本中的起始位置，超长的行按max_chars拆开
+
+    参数:
+        text (str): 完整文本
+        max_chars (int): 每个显示行的最大字符数
+
+    返回:
+        list: 各显示行的起始位置
+    """
+    starts = [0]
+    pos = 0
+    length = len(text)
+    while True:
+        newline = text.find('\n', pos)
+        end = length if newline == -1 else newline
+        for split in range(pos + max_chars, end, max_chars):
+            starts.append(split)
+        if newline == -1:
+            return starts
+        pos = newline + 1
+        starts.append(pos)
+
+
+class VirtualTextView(ttk.Frame):
+    """
+    只显示可见行的只读文本控件，带垂直滚动条
+    支持滚动条拖动、鼠标滚轮和上下/翻页/Home/End键
+
+    用法:
+        view = VirtualTextView(parent, height=20)
+        view.pack(fill=tk.BOTH, expand=True)
+        view.set_text(html)
+
+    参数:
+        master: 父控件
+        max_row_chars (int): 每个显示行的最大字符数
+        **text_options: 传给tk.Text的其他参数，如height、font
+    """
+
+    def __init__(self, master, max_row_chars=MAX_ROW_CHARS, **text_options):
+        super().__init__(master)
+        self.max_row_chars = max_row_chars
+        self.content = ''
+        self.starts = [0]
+        self.top = 0  # 控件中第一行对应的显示行号
+
+        self.scrollbar = ttk.Scrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        text_options.setdefault('wrap', tk.NONE)
+        self.text = tk.Text(self, **text_options)
+        self.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.text.config(state=tk.DISABLED)
+        self.line_height = max(1, tkfont.Font(font=self.text.cget('font')).metrics('linespace'))
+
+        self.text.bind('<Configure>', lambda event: self._render())
+        self.text.bind('<MouseWheel>', self._on_mousewheel)
+        self.text.bind('<Button-4>', lambda event: self._scroll_to(self.top - WHEEL_ROWS))
+        self.text.bind('<Button-5>', lambda event: self._scroll_to(self.top + WHEEL_ROWS))
+        self.text.bind('<Up>', lambda event: self._scroll_to(self.top - 1))
+        self.text.bind('<Down>', lambda event: self._scroll_to(self.top + 1))
+        self.text.bind('<Prior>', lambda event: self._scroll_to(self.top - self._visible_rows()))
+        self.text.bind('<Next>', lambda event: self._scroll_to(self.top + self._visible_rows()))
+        self.text.bind('<Control-Home>', lambda event: self._scroll_to(0))
+        self.text.bind('<Control-End>', lambda event: self._scroll_to(len(self.starts)))
+
+    def set_text(self, content):
+        """显示新的文本，回到第一行"""
+        self.content = content
+        self.starts = row_offsets(content, self.max_row_chars)
+        self.top = 0
+        self._render()
+
+    def clear(self):
+        """清空内容"""
+        self.set_text('')
+
+    def row_count(self):
+        """显示行总数"""
+        return len(self.starts)
+
+    def _row(self, index):
+        """取出第index个显示行的文字（不含换行符）"""
+        start = self.starts[index]
+        end = self.starts[index + 1] if index + 1 < len(self.starts) else len(self.content)
+        row = self.content[start:end]
+        if row.endswith('\n'):
+            row = row[:-1]
+            if row.endswith('\r'):
+                row = row[:-1]
+        return row
+
+    def _visible_rows(self):
+        """控件当前能显示的行数"""
+        height = self.text.winfo_height()
+        if height <= 1:  # 控件还没有显示
+            return int(self.text.cget('height'))
+        return max(1, height // self.line_height)
+
+    def _scroll_to(self, top):
+        visible = self._visible_rows()
+        self.top = max(0, min(top, len(self.starts) - visible))
+        self._render()
+        return 'break'
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == 'moveto':
+            self._scroll_to(int(float(amount) * len(self.starts)))
+        elif action == 'scroll':
+            step = self._visible_rows() if unit == 'pages' else 1
+            self._scroll_to(self.top + int(amount) * step)
+
+    def _on_mousewheel(self, event):
+        # Windows每格delta为120，macOS为较小的值
+        rows = -event.delta // 120 * WHEEL_ROWS if abs(event.delta) >= 120 else -event.delta
+        return self._scroll_to(self.top + rows)
+
+    def _render(self):
+        """把可见范围内的行放入Text控件，并更新滚动条位置"""
+        visible = self._visible_rows()
+        end = min(len(self.starts), self.top + visible + OVERSCAN_ROWS)
+        window = '\n'.join(self._row(index) for index in range(self.top, end))
+
+        xview = self.text.xview()[0]  # 保留水平滚动位置
+        self.text.config(state=tk.NORMAL)
+        self.text.delete(1.0, tk.END)
+        self.text.insert(1.0, window)
+        self.text.config(state=tk.DISABLED)
+        self.text.xview_moveto(xview)
+
+        total = len(self.starts)
+        self.scrollbar.set(self.top / total, min(1.0, (self.top + visible) / total))
+
+
+class ChunkedInserter:
+    """
+    把长文本分批插入只读的Text控件
+    每次事件回调只插入INSERT_SLICE_SECONDS内能完成的部分，其余的通过after在下一轮继续，
+    期间窗口可以正常响应；开始新的插入或调用cancel()会中止未完成的插入
+
+    参数:
+        widget: tk.Text控件（平时为DISABLED状态）
+        on_progress: 进度回调 on_progress(已插入字符数, 总字符数)，每批插入后在GUI线程中调用
+        on_done: 全部插入完成后的回调
+    """
+
+    def __init__(self, widget, on_progress=None, on_done=None):
+        self.widget = widget
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.content = ''
+        self.position = 0
+        self.job = None
+
+    @property
+    def running(self):
+        """是否有未完成的插入"""
+        return self.job is not None
+
+    def start(self, content):
+        """清空控件并开始分批插入新文本"""
+        self.cancel()
+        self.content = content
+        self.position = 0
+        self.widget.config(state=tk.NORMAL)
+        self.widget.delete(1.0, tk.END)
+        self.widget.config(state=tk.DISABLED)
+        self._step()
+
+    def cancel(self):
+        """中止未完成的插入，已插入的部分保留"""
+        if self.job is not None:
+            self.widget.after_cancel(self.job)
+            self.job = None
+
+    def _step(self):
+        self.job = None
+        deadline = time.monotonic() + INSERT_SLICE_SECONDS
+        length = len(self.content)
+
+        self.widget.config(state=tk.NORMAL)
+        while self.position < length:
+            end = self.position + INSERT_CHUNK_CHARS
+            self.widget.insert(tk.END, self.content[self.position:end])
+            self.position = min(end, length)
+            if time.monotonic() >= deadline:
+                break
+        self.widget.config(state=tk.DISABLED)
+
+        if self.on_progress:
+            self.on_progress(self.position, length)
+        if self.position < length:
+            self.job = self.widget.after(1, self._step)
+        else:
+            self.content = ''
+            if self.on_done:
+                self.on_done()
@@ -0,0 +1,158 @@
+"""
+后台任务线程池
+网络请求等I/O任务和解析、图片解码等CPU任务分别放入两个固定大小的线程池，
+线程数不随用户点击次数增长；提供排队数统计，退出时取消排队中的任务并等待运行中的任务结束
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+# I/O线程池的线程数：网络请求大部分时间在等待，可以比CPU核数多
+IO_WORKERS = 8
+
+# CPU线程池的线程数：解析和解码在GIL下无法完全并行，超过核数只会互相争抢
+CPU_WORKERS = max(1, min(4, os.cpu_count() or 1))
+
+
+class WorkerPool:
+    """
+    带排队统计的线程池（线程安全）
+
+    参数:
+        name (str): 线程名前缀，便于调试
+        max_workers (int): 最大线程数
+
+    属性:
+        queued (int): 已提交、尚未开始的任务数
+        running (int): 正在执行的任务数
+        submitted (int): 累计提交的任务数
+        peak_queued (int): 排队数的历史最大值
+    """
+
+    def __init__(self, name, max_workers):
+        self.name = name
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)  # 运行中的任务结束时通知
+        self.queued = 0
+        self.running = 0
+        self.submitted = 0
+        self.peak_queued = 0
+
+    def submit(self, func, *args, **kwargs):
+        """
+        提交任务
+
+        返回:
+            concurrent.futures.Future: 任务的Future，异常保存在其中，不会打印
+        """
+        with self.lock:
+            self.queued += 1
+            self.submitted += 1
+            self.peak_queued = max(self.peak_queued, self.queued)
+
+        def task():
+            with self.lock:
+                self.queued -= 1
+                self.running += 1
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self.lock:
+                    self.running -= 1
+                    self.idle.notify_all()
+
+        try:
+            future = self.executor.submit(task)
+        except RuntimeError:  # 已关闭
+            with self.lock:
+                self.queued -= 1
+            raise
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future):
+        # 关闭时被取消的任务不会执行task()，在这里扣除排队数
+        if future.cancelled():
+            with self.lock:
+                self.queued -= 1
+
+    def close(self):
+        """不再接受新任务，取消排队中的任务（不等待运行中的任务）"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def wait(self, timeout=None):
+        """
+        等待运行中的任务结束
+
+        返回:
+            bool: 是否都已结束（超时返回False）
+        """
+        with self.idle:
+            return self.idle.wait_for(lambda: self.running == 0, timeout)
+
+
+class WorkerPools:
+    """
+    应用程序共用的I/O线程池和CPU线程池
+
+    用法:
+        workers = WorkerPools()
+        workers.submit_io(load_page, url)                   # 后台下载
+        soup = workers.run_cpu(parse_html, html)            # 在I/O任务中把解析交给CPU线程池
+        workers.shutdown()                                  # 退出时
+
+    CPU任务中不要再调用run_cpu，线程池占满时会互相等待
+
+    参数:
+        io_workers (int): I/O线程数
+        cpu_workers (int): CPU线程数
+    """
+
+    def __init__(self, io_workers=IO_WORKERS, cpu_workers=CPU_WORKERS):
+        self.io = WorkerPool('io', io_workers)
+        self.cpu = WorkerPool('cpu', cpu_workers)
+
+    def submit_io(self, func, *args, **kwargs):
+        """提交网络请求等I/O任务，返回Future"""
+        return self.io.submit(func, *args, **kwargs)
+
+    def submit_cpu(self, func, *args, **kwargs):
+        """提交解析、解码等CPU任务，返回Future"""
+        return self.cpu.submit(func, *args, **kwargs)
+
+    def run_cpu(self, func, *args, **kwargs):
+        """在CPU线程池中执行func并等待结果（在I/O任务中调用），异常原样抛出"""
+        return self.cpu.submit(func, *args, **kwargs).result()
+
+    def queue_depth(self):
+        """
+        各线程池排队中的任务数
+
+        返回:
+            dict: {'io': 排队数, 'cpu': 排队数}
+        """
+        return {'io': self.io.queued, 'cpu': self.cpu.queued}
+
+    def describe(self):
+        """生成统计描述，例如 "I/O 8/8 运行，3 排队；CPU 1/4 运行，0 排队" """
+        return "；".join(
+            f"{label} {pool.running}/{pool.max_workers} 运行，{pool.queued} 排队"
+            for label, pool in (('I/O', self.io), ('CPU', self.cpu))
+        )
+
+    def shutdown(self, timeout=5):
+        """
+        关闭两个线程池：取消排队中的任务，等待运行中的任务结束（总共最多timeout秒）
+
+        返回:
+            bool: 运行中的任务是否都已结束
+        """
+        deadline = time.monotonic() + timeout
+        for pool in (self.io, self.cpu):
+            pool.close()
+        return all(pool.wait(max(0, deadline - time.monotonic())) for pool in (self.io, self.cpu))